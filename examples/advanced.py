@@ -2,7 +2,9 @@ import time
 
 from looptick import LoopTick  # (可选项) 帧率计算 pip install looptick
 
-from xrinput import XRRuntime, CommandLinePanel, Visualizer, PoseTransform
+from xrinput import XRRuntime, CommandLinePanel, Visualizer, PoseTransform, RemoteMonitor
+
+SEPARATE_PROCESS = True  # 可视化与面板在独立进程中运行, 渲染慢不会拖慢采集帧率
 
 if __name__ == "__main__":
 
@@ -10,9 +12,12 @@ if __name__ == "__main__":
 
     xr_device = XRRuntime()  # 初始化 xr 设备
 
-    panel = CommandLinePanel(title="XR 控制器状态")  # 创建 CLI 显示面板
-
-    visualizer = Visualizer()  # 创建可视化器实例
+    if SEPARATE_PROCESS:
+        monitor = RemoteMonitor(title="XR 控制器状态")  # 启动可视化 / 面板进程, 通过共享内存传递最新一帧
+        panel, visualizer = monitor.panel, monitor.visualizer
+    else:
+        panel = CommandLinePanel(title="XR 控制器状态")  # 创建 CLI 显示面板
+        visualizer = Visualizer()  # 创建可视化器实例
     xr2bot = PoseTransform()
 
     loop= LoopTick()   # 创建帧率计算实例
@@ -56,4 +61,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("退出程序")
     finally:
-        xr_device.close()
\ No newline at end of file
+        xr_device.close()
+        if SEPARATE_PROCESS:
+            monitor.close()
\ No newline at end of file
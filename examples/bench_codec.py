@@ -0,0 +1,102 @@
+"""
+JSON / 二进制 / 紧凑量化编码对比: 500 Hz 发布, 多个订阅进程
+
+每个订阅进程统计收到的帧数、发布 → 接收延迟与每帧 CPU 时间;
+发布端统计每帧编码 + 发送耗时. 不需要 XR 设备.
+"""
+
+import math
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from xrinput import ZMQPublisher, ZMQSubscriber, latency_breakdown
+
+RATE_HZ = 500
+DURATION = 3.0
+N_SUBSCRIBERS = 4
+ADDRESS = "tcp://127.0.0.1:5599"
+
+
+def fake_frame(k: int) -> dict:
+    t = k / RATE_HZ
+    return {
+        "a_click": k % 50 == 0, "a_touch": True, "b_click": False, "b_touch": False,
+        "x_click": False, "x_touch": False, "y_click": False, "y_touch": False,
+        "menu": False, "system": False,
+        "trigger_left": 0.5 + 0.5 * math.sin(t), "trigger_right": 0.0,
+        "trigger_touch_left": True, "trigger_touch_right": False,
+        "grip_left": 0.0, "grip_right": 1.0,
+        "thumbstick_left": (0.1 * math.sin(t), 0.0), "thumbstick_right": (0.0, 0.0),
+        "thumbstick_click_left": False, "thumbstick_click_right": False,
+        "thumbstick_touch_left": False, "thumbstick_touch_right": False,
+        "left_pos": [0.1 * math.sin(t), 1.2, -0.3], "left_rot": [0.0, 0.0, math.sin(t / 2), math.cos(t / 2)],
+        "right_pos": [-0.2, 1.1, -0.3], "right_rot": [0.0, 0.0, 0.0, 1.0],
+        "hmd_pos": [0.0, 1.6, 0.0], "hmd_rot": [0.0, 0.0, 0.0, 1.0],
+        "timing": {"capture": time.monotonic_ns()},
+    }
+
+
+def subscriber(codec, stop, results):
+    sub = ZMQSubscriber(ADDRESS, codec=codec)
+    n = 0
+    latency = []
+    cpu = 0.0
+    while not stop.is_set():
+        c0 = time.process_time()
+        msg = sub.try_recv(timeout=50)
+        if msg is None:
+            continue
+        grip = msg.get("grip_right")  # 典型消费者: 只读取少数字段
+        cpu += time.process_time() - c0
+        n += 1
+        latency.append(latency_breakdown(msg)["publish_to_recv"])
+        assert grip == 1.0
+    results.put((n, float(np.median(latency)) if latency else float("nan"), cpu / max(n, 1)))
+
+
+def run(codec):
+    stop = mp.Event()
+    results = mp.Queue()
+    procs = [mp.Process(target=subscriber, args=(codec, stop, results)) for _ in range(N_SUBSCRIBERS)]
+    for p in procs:
+        p.start()
+
+    pub = ZMQPublisher(ADDRESS, codec=codec)
+    time.sleep(1.0)  # 等待订阅端连接
+
+    period = 1.0 / RATE_HZ
+    send_us = []
+    n_frames = int(DURATION * RATE_HZ)
+    deadline = time.perf_counter()
+    for k in range(n_frames):
+        data = fake_frame(k)
+        t0 = time.perf_counter()
+        pub.send(data)
+        send_us.append((time.perf_counter() - t0) * 1e6)
+        deadline += period
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    time.sleep(0.2)
+    stop.set()
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    pub.socket.close(linger=0)
+
+    received = sum(s[0] for s in stats) / N_SUBSCRIBERS
+    print(
+        f"{codec:>6}: 发送 {np.median(send_us):6.1f} us/帧, "
+        f"每个订阅端收到 {received / n_frames * 100:5.1f}%, "
+        f"延迟中位数 {np.median([s[1] for s in stats]):.3f} ms, "
+        f"接收 CPU {np.mean([s[2] for s in stats]) * 1e6:6.1f} us/帧"
+    )
+
+
+if __name__ == "__main__":
+    print(f"{RATE_HZ} Hz, {N_SUBSCRIBERS} 个订阅进程, 每种编码 {DURATION:.0f} 秒")
+    for codec in ("json", "binary", "compact"):
+        run(codec)
@@ -0,0 +1,66 @@
+import time
+
+from xrinput import (
+    XRRuntime,
+    Pipeline,
+    DragManager,
+    PoseTransform,
+    LowPassFilter,
+    Box3D,
+    ZMQPublisher,
+    Visualizer,
+)
+
+INIT_POSE = [0.33841822, 0.0014140522, 0.104647756, -0.56119007, -0.5611902, -0.43018907, -0.43019584]
+
+if __name__ == "__main__":
+
+    # 初始化
+    xr_device = XRRuntime()  # 初始化 xr 设备
+    visualizer = Visualizer()
+
+    drag = DragManager(n_slots=2, threshold=0.5)
+    drag.init_reference(INIT_POSE)  # 对齐手柄和被操作物体初始位置
+
+    # 变换 → 映射 → 滤波 → 限幅 → 发布, 各阶段原地处理同一个帧缓冲
+    pipe = (
+        Pipeline(devices=("left", "right"))
+        .transform(PoseTransform())
+        .tap("controllers")
+        .drag(drag)
+        .filter(LowPassFilter(alpha=0.3))
+        .clamp(Box3D((-9.0, 9.0), (-9.0, 9.0), (0.0, 9.0)))
+        .publish(ZMQPublisher())
+    )
+    # pipe.disable("filter")  # 运行中可单独停用某个阶段
+
+    last_report = time.perf_counter()
+
+    try:
+        while True:
+
+            xr_data = xr_device.read_input()
+
+            if xr_data is None:
+                time.sleep(0.005)
+                continue
+
+            frame = pipe.run(xr_data)
+
+            # 按下B键和Y键 → 重置目标姿态
+            if xr_data.get("b_click") == 1 and xr_data.get("y_click") == 1:
+                drag.reset()
+
+            visualizer.update(frame.poses.tolist() + frame.taps["controllers"].tolist())
+
+            # 每 5 秒打印一次各阶段耗时
+            if time.perf_counter() - last_report > 5.0:
+                last_report = time.perf_counter()
+                print({name: round(us, 1) for name, us in pipe.timings().items()})
+
+            time.sleep(0.001)
+
+    except KeyboardInterrupt:
+        print("退出程序")
+    finally:
+        xr_device.close()
@@ -1,20 +1,25 @@
 import time
 
 
-from xrinput import XRRuntime, ZMQPublisher
+from xrinput import XRRuntime, RatePublisher
 
 if __name__ == "__main__":
 
     print("初始化 OpenXR")
 
     xr_device = XRRuntime()
-    pub = ZMQPublisher()
+
+    # 采集循环只 push 最新帧, 每个端点在自己的线程中按自己的频率发送
+    hub = RatePublisher()
+    hub.add("tcp://*:5555", rate_hz=100)                              # 默认端口, JSON
+    # hub.add("tcp://*:5556", rate_hz=500, codec="binary")            # 控制
+    # hub.add("tcp://*:5557", rate_hz=30, average=True)               # 面板, 两次发送之间的帧取平均
+    hub.start()
 
     while True:
         
         xr_data = xr_device.read_input()
         # print(xr_data)
-        pub.send(xr_data)
+        hub.push(xr_data)
 
         time.sleep(0.01)
-        
\ No newline at end of file
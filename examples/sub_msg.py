@@ -1,10 +1,18 @@
+import time
+
 from rich import print
 from xrinput import ZMQSubscriber
 
 sub = ZMQSubscriber()
+last_report = time.perf_counter()
 
 while True:
     data = sub.try_recv(timeout=500)
     if data:
         print("收到:")
-        print(data)
\ No newline at end of file
+        print(data)
+
+    # 每 5 秒打印一次链路统计 (丢帧率 / 抖动 / 帧龄)
+    if time.perf_counter() - last_report > 5.0:
+        last_report = time.perf_counter()
+        print(sub.stats.summary())
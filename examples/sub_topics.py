@@ -0,0 +1,15 @@
+from xrinput import ZMQSubscriber
+
+# 发布端需按频道发布: ZMQPublisher(codec="binary", topics=True)
+# 夹爪节点只订阅右手模拟量, 其余频道由 ZMQ 在发送端过滤, 不会到达本进程
+
+if __name__ == "__main__":
+
+    sub = ZMQSubscriber("tcp://localhost:5555", codec="binary", topics=["analog/right"])
+
+    while True:
+        data = sub.try_recv(timeout=500)
+        if data:
+            print(f"seq={data['seq']} grip_right={data['grip_right']:.3f}")
+        else:
+            print("没有收到数据")
@@ -9,32 +9,91 @@ xrinput 包入口
 from .core.xr_runtime import XRRuntime
 
 # 监控模块
+from .monitor.latency import LatencyStats, latency_breakdown, mark_timing
 from .monitor.log import logger
+from .monitor.metrics import MetricsExporter
+from .monitor.shm import RemoteMonitor, ShmFrameReader, ShmFrameWriter
 from .monitor.panel import CommandLinePanel
 from .monitor.visualizer import Visualizer
 
 # 数据处理模块
 from .processing.box3d import Box3D
-from .processing.filters import LowPassFilter
+from .processing.filters import LowPassFilter, OneEuroFilterBank, OrientationFilter
 from .processing.pose_mapper import PoseMapper
 from .processing.pose_transform import PoseTransform
+from .processing.transform_chain import TransformChain
+from .processing.kalman import PoseKalmanFilter
+from .processing.resampler import PoseResampler
+from .processing.drag_manager import DragManager
+from .processing.pipeline import Frame, Pipeline
+from .processing.calibration import CalibrationResult, PoseCalibrator
+from .processing.constraints import (
+    BoxVolume,
+    CylinderVolume,
+    OrientationCone,
+    PolytopeVolume,
+    SphereVolume,
+    UnionVolume,
+)
 
 # 通信模块
 from .comm.zmq_pub import ZMQPublisher
 from .comm.zmq_sub import ZMQSubscriber
+from .comm.zmq_async import AsyncZMQSubscriber, ZMQReactor
+from .comm.codec import BinaryCodec, BinaryFrame, CompactCodec, JsonCodec
+from .comm.buffer_pool import BufferPool
+from .comm.jitter_buffer import JitterBuffer
+from .comm.aggregator import ZMQAggregator
+from .comm.clock_sync import ClockSyncClient, ClockSyncServer
+from .comm.rate_publisher import RatePublisher
 
 __all__ = [
     "XRRuntime",
 
+    "LatencyStats",
+    "latency_breakdown",
+    "mark_timing",
     "logger",
+    "MetricsExporter",
+    "RemoteMonitor",
+    "ShmFrameReader",
+    "ShmFrameWriter",
     "CommandLinePanel",
     "Visualizer",
 
     "Box3D",
     "LowPassFilter",
+    "OneEuroFilterBank",
+    "OrientationFilter",
     "PoseMapper",
     "PoseTransform",
+    "TransformChain",
+    "PoseKalmanFilter",
+    "PoseResampler",
+    "DragManager",
+    "Frame",
+    "Pipeline",
+    "PoseCalibrator",
+    "CalibrationResult",
+    "BoxVolume",
+    "SphereVolume",
+    "CylinderVolume",
+    "PolytopeVolume",
+    "UnionVolume",
+    "OrientationCone",
 
     "ZMQPublisher",
     "ZMQSubscriber",
+    "AsyncZMQSubscriber",
+    "ZMQReactor",
+    "JsonCodec",
+    "BinaryCodec",
+    "BinaryFrame",
+    "CompactCodec",
+    "BufferPool",
+    "JitterBuffer",
+    "ZMQAggregator",
+    "ClockSyncServer",
+    "ClockSyncClient",
+    "RatePublisher",
 ]
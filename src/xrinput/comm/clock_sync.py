@@ -0,0 +1,277 @@
+"""
+发布端 / 订阅端时钟同步
+
+消息中的时间戳都是发送主机的 time.monotonic_ns(), 跨主机比较前需要知道两端的时钟差.
+这里在发布端旁边开一个 ROUTER 侧端口应答 ping, 订阅端周期性 ping 并按 NTP 的方式估计:
+
+    t1 本地发送 → t2 远端接收 → t3 远端应答 → t4 本地接收
+    offset θ = ((t2 - t1) + (t3 - t4)) / 2   (远端 - 本地)
+    rtt    δ = (t4 - t1) - (t3 - t2)
+
+- 最小 RTT 过滤: 排队 / 调度延迟只会让 δ 变大并使 θ 产生偏差, 窗口内 δ 最小的样本最可信
+- 漂移: 对过滤后的 offset 随本地时间做最小二乘, 得到频率偏差 (ppm), 两次 ping 之间按漂移外推
+
+    pub = ZMQPublisher("tcp://*:5555", clock_sync="tcp://*:5556")           # 发布端
+    sub = ZMQSubscriber("tcp://host:5555", clock_sync="tcp://host:5556")    # 订阅端
+    local_ns = sub.clock.to_local(msg["timing"]["publish"])                 # 远端时间戳 → 本地
+    # sub.stats 的帧龄统计自动使用估计的 offset
+"""
+
+from __future__ import annotations
+
+import struct
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+import zmq
+
+from ..monitor.log import logger
+
+_PING = struct.Struct("<Iq")     # seq, t1
+_PONG = struct.Struct("<Iqqq")   # seq, t1, t2, t3
+
+
+class ClockSyncServer:
+    """
+    ping 应答端 (后台线程)
+
+    参数:
+    - address: 绑定地址, 通常与发布端同一主机的另一个端口
+    - clock: 时钟函数 (纳秒), 默认 time.monotonic_ns, 需与发布端时间戳使用同一时钟
+    """
+
+    def __init__(
+        self,
+        address: str = "tcp://*:5556",
+        clock: Callable[[], int] = time.monotonic_ns,
+        context: Optional[zmq.Context] = None,
+    ):
+        self.address = address
+        self.clock = clock
+        self.context = context if context is not None else zmq.Context()
+        self.socket = self.context.socket(zmq.ROUTER)
+        self.socket.bind(address)
+        self.served = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="clock-sync-server", daemon=True)
+        self._thread.start()
+
+    def _loop(self) -> None:
+        sock, clock = self.socket, self.clock
+        while self._running:
+            if not sock.poll(100):
+                continue
+            ident, payload = sock.recv_multipart()
+            t2 = clock()
+            if len(payload) != _PING.size:
+                continue
+            seq, t1 = _PING.unpack(payload)
+            sock.send_multipart((ident, _PONG.pack(seq, t1, t2, clock())))
+            self.served += 1
+
+    def close(self) -> None:
+        self._running = False
+        self._thread.join()
+        self.socket.close(linger=0)
+
+
+class ClockSyncClient:
+    """
+    时钟偏移 / 漂移估计 (后台线程周期性 ping)
+
+    参数:
+    - address: ClockSyncServer 地址
+    - interval: ping 间隔 (s)
+    - window: 最小 RTT 过滤的样本数
+    - history: 估计漂移使用的过滤后 offset 个数 (每 window 次 ping 记录一个)
+    - timeout: 单次 ping 超时 (s)
+    - clock: 本地时钟函数 (纳秒)
+
+    属性:
+    - offset_ns: 当前时刻的 offset (远端 - 本地), 含漂移外推
+    - rtt_ns: 过滤所选样本的往返时间
+    - drift_ppm: 远端时钟相对本地的频率偏差
+    - synced: 是否已有估计
+    """
+
+    def __init__(
+        self,
+        address: str = "tcp://localhost:5556",
+        interval: float = 0.2,
+        window: int = 16,
+        history: int = 32,
+        timeout: float = 0.5,
+        clock: Callable[[], int] = time.monotonic_ns,
+        context: Optional[zmq.Context] = None,
+        start: bool = True,
+    ):
+        self.address = address
+        self.interval = interval
+        self.timeout = timeout
+        self.clock = clock
+        self.window = window
+        self.context = context if context is not None else zmq.Context()
+        self.socket = self.context.socket(zmq.DEALER)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.connect(address)
+
+        self._samples: deque = deque(maxlen=window)       # (rtt, offset, t_mid) 纳秒
+        self._filtered: deque = deque(maxlen=history)     # (t_mid, offset) 纳秒
+        self._seq = 0
+        self._n_pings = 0
+        self.lost = 0
+
+        # 当前估计 (由 ping 线程整体替换, 读取无需加锁)
+        self._estimate = None  # (t_ref, offset_ref, drift, rtt)
+
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        if start:
+            self.start()
+
+    # ------------------ 测量 ------------------
+    def ping(self) -> Optional[int]:
+        """同步 ping 一次, 返回该次 RTT (纳秒), 超时返回 None"""
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        t1 = self.clock()
+        self.socket.send(_PING.pack(self._seq, t1))
+        deadline = t1 + int(self.timeout * 1e9)
+        while True:
+            remaining = (deadline - self.clock()) / 1e6
+            if remaining <= 0 or not self.socket.poll(remaining):
+                self.lost += 1
+                return None
+            payload = self.socket.recv()
+            t4 = self.clock()
+            seq, r1, t2, t3 = _PONG.unpack(payload)
+            if seq == self._seq and r1 == t1:
+                break  # 忽略之前超时的迟到应答
+        rtt = (t4 - t1) - (t3 - t2)
+        offset = ((t2 - t1) + (t3 - t4)) // 2
+        self._add_sample(rtt, offset, (t1 + t4) // 2)
+        return rtt
+
+    def _add_sample(self, rtt: int, offset: int, t_mid: int) -> None:
+        self._samples.append((rtt, offset, t_mid))
+        self._n_pings += 1
+        best_rtt, best_offset, best_t = min(self._samples)
+
+        # 每 window 次 ping 记录一个过滤后的点, 用于估计漂移
+        if self._n_pings % self.window == 0 or not self._filtered:
+            self._filtered.append((best_t, best_offset))
+
+        drift = 0.0
+        if len(self._filtered) >= 3:
+            pts = np.array(self._filtered, dtype=float)
+            t = pts[:, 0] - pts[-1, 0]
+            if t[0] < 0:
+                drift = float(np.polyfit(t, pts[:, 1], 1)[0])
+        self._estimate = (best_t, best_offset, drift, best_rtt)
+
+    # ------------------ 换算 ------------------
+    @property
+    def synced(self) -> bool:
+        return self._estimate is not None
+
+    def offset_at(self, local_ns: Optional[int] = None) -> int:
+        """local_ns 时刻的 offset (远端 - 本地, 纳秒); 尚未同步时为 0"""
+        est = self._estimate
+        if est is None:
+            return 0
+        t_ref, offset, drift, _ = est
+        if local_ns is None:
+            local_ns = self.clock()
+        return int(offset + drift * (local_ns - t_ref))
+
+    @property
+    def offset_ns(self) -> int:
+        return self.offset_at()
+
+    @property
+    def rtt_ns(self) -> Optional[int]:
+        est = self._estimate
+        return None if est is None else est[3]
+
+    @property
+    def drift_ppm(self) -> float:
+        est = self._estimate
+        return 0.0 if est is None else est[2] * 1e6
+
+    def to_local(self, remote_ns: int) -> int:
+        """远端时间戳 → 本地时钟"""
+        return int(remote_ns - self.offset_at(remote_ns - self.offset_at()))
+
+    def to_remote(self, local_ns: int) -> int:
+        """本地时间戳 → 远端时钟"""
+        return int(local_ns + self.offset_at(local_ns))
+
+    # ------------------ 后台线程 ------------------
+    def _loop(self) -> None:
+        next_ping = time.monotonic()
+        while self._running:
+            try:
+                self.ping()
+            except zmq.ZMQError as e:
+                if not self._running:
+                    break
+                logger.warning(f"[ClockSync] ping 失败: {e}")
+            next_ping += self.interval
+            delay = next_ping - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_ping = time.monotonic()
+
+    def start(self) -> "ClockSyncClient":
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, name="clock-sync-client", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait_synced(self, timeout: float = 2.0) -> bool:
+        t_end = time.monotonic() + timeout
+        while not self.synced and time.monotonic() < t_end:
+            time.sleep(0.005)
+        return self.synced
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._running = False
+            self._thread.join()
+            self._thread = None
+        self.socket.close(linger=0)
+
+
+if __name__ == "__main__":
+    # 在 localhost 上模拟远端时钟: 偏移 +5 ms, 快 50 ppm
+    OFFSET_NS, DRIFT = 5_000_000, 50e-6
+    t0 = time.monotonic_ns()
+
+    def remote_clock() -> int:
+        now = time.monotonic_ns()
+        return int(now + OFFSET_NS + DRIFT * (now - t0))
+
+    server = ClockSyncServer("tcp://127.0.0.1:5686", clock=remote_clock)
+    client = ClockSyncClient("tcp://127.0.0.1:5686", interval=0.01, window=8)
+    client.wait_synced()
+
+    for _ in range(5):
+        time.sleep(1.0)
+        now = time.monotonic_ns()
+        true_offset = remote_clock() - now
+        err = client.offset_at(now) - true_offset
+        print(
+            f"offset {client.offset_ns / 1e6:8.4f} ms, 误差 {err / 1e3:6.1f} us, "
+            f"rtt {client.rtt_ns / 1e3:6.1f} us, 漂移 {client.drift_ppm:6.1f} ppm (真值 {DRIFT * 1e6:.0f})"
+        )
+
+    # 远端时间戳换算到本地
+    local = time.monotonic_ns()
+    remote = remote_clock()
+    print(f"to_local 误差 {(client.to_local(remote) - local) / 1e3:.1f} us, 丢失 ping {client.lost} 次")
+    client.close()
+    server.close()
@@ -0,0 +1,709 @@
+"""
+ZMQ 消息编解码
+
+send_json 每帧约 1 KB 文本 (浮点数 repr), 接收端还要 json.loads 并构造字典.
+BinaryCodec 使用固定布局的二进制格式 (小端, 164 字节):
+
+    偏移  类型          字段
+    0     2s            magic b"XR"
+    2     uint8         版本号 (VERSION)
+    3     uint8         姿态有效位 (bit0 左手, bit1 右手, bit2 头显)
+    4     uint32        序号 (帧中的 "seq", 缺失时由 codec 自增)
+    8     uint32        按键位图 (顺序见 BUTTONS)
+    12    uint32        保留
+    16    int64 x4      sample / capture / process / publish 时间戳 (monotonic_ns, 0 表示缺失)
+    48    float32 x8    模拟量 (顺序见 ANALOGS)
+    80    float32 x21   姿态 (3, 7): left / right / hmd, 每行 [x, y, z, qx, qy, qz, qw]
+
+解码端用 np.frombuffer 直接在接收缓冲区上建立视图, 不复制数据:
+
+    codec = BinaryCodec()
+    buf = codec.encode(xr_data)          # bytes
+    frame = codec.decode(buf)            # BinaryFrame
+    frame.poses                          # (3, 7) float32 视图, 无效行为 NaN
+    frame.get("grip_right")              # 与字典接口相同的按键 / 模拟量访问
+    frame.to_dict()                      # 还原为 XRRuntime.read_input() 格式的字典
+
+ZMQPublisher / ZMQSubscriber 的 codec 参数可以是 "json" / "binary" / "compact" 或任意
+实现了 encode(data) -> bytes 与 decode(buffer) 的对象.
+
+按主题分频道发布时 (ZMQPublisher(topics=True)), 每帧拆成 CHANNELS 中的若干条
+[topic, payload] 多段消息, 订阅端由 ZMQ 按前缀过滤. 频道内容由 encode_channels /
+decode_channel 处理; BinaryCodec 的频道载荷为 32 字节头 (magic, 版本, 标志, 序号,
+sample / capture / publish 时间戳) 加频道数据, 如 "analog/right" 只有 4 个 float32.
+
+带宽受限的链路 (如与 ALVR 视频流共用 Wi-Fi) 可用 CompactCodec ("compact") 量化编码,
+三个设备全部有效、8 位模拟量时 61~73 字节 (取决于时间戳个数), 无效的设备不占空间:
+
+    类型          字段
+    uint8         格式标记 COMPACT_TAG
+    uint16        标志: bit0-2 姿态有效位, bit3-8 各设备四元数最大分量的下标 (2 位),
+                  bit9-12 sample / capture / process / publish 是否存在, bit13 模拟量为 16 位
+    uint16        按键位图 (BUTTONS 共 16 个)
+    uint32        序号
+    int64         第一个存在的时间戳; 其余存在的时间戳为相对它的 int32 差值 (ns)
+    uint8 x4      trigger / grip: round(v * 255)          (16 位时 uint16, v * 65535)
+    int8 x4       thumbstick 分量: round(v * 127)         (16 位时 int16, v * 32767)
+    每个有效设备  int16 x3 位置 round(p / pos_resolution) + int16 x3 四元数 "smallest three"
+
+误差上界 (__main__ 中验证):
+- 位置: pos_resolution / 2 (默认 0.2 mm 分辨率 → 0.1 mm), 范围 ±32767 * pos_resolution
+  (默认 ±6.55 m), 超出时截断并计入 CompactCodec.clipped
+- 四元数: 丢弃最大分量, 其余三个分量 (绝对值 ≤ 1/√2) 以 32767·√2 的比例存为 int16,
+  这三个分量误差 ≤ 1.08e-5, 由单位长度还原的最大分量 (≥ 1/2) 误差 ≤ 3.3e-5,
+  旋转角误差 < 8e-5 rad (0.005°)
+- trigger / grip: 8 位 ≤ 1/510 ≈ 0.002, 16 位 ≤ 7.7e-6; thumbstick: 8 位 ≤ 1/254 ≈ 0.004,
+  16 位 ≤ 1.6e-5. 0 与 ±1 精确还原
+- 时间戳: 精确 (差值超出 int32 即 ±2.1 s 时截断)
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ..monitor.latency import TIMING_KEY
+
+MAGIC = b"XR"
+VERSION = 2  # 2: 增加 sample 时间戳
+
+# 按键位图中各位的顺序 (新增按键只能追加到末尾, 否则需要提升 VERSION)
+BUTTONS = (
+    "a_click", "a_touch", "b_click", "b_touch",
+    "x_click", "x_touch", "y_click", "y_touch",
+    "menu", "system",
+    "trigger_touch_left", "trigger_touch_right",
+    "thumbstick_click_left", "thumbstick_click_right",
+    "thumbstick_touch_left", "thumbstick_touch_right",
+)
+# 模拟量顺序, thumbstick 占两个分量
+ANALOGS = (
+    "trigger_left", "trigger_right",
+    "grip_left", "grip_right",
+    "thumbstick_left", "thumbstick_right",
+)
+DEVICES = ("left", "right", "hmd")
+TIMING_STAGES = ("sample", "capture", "process", "publish")
+
+_HEADER = struct.Struct("<2sBBIII4q")
+_PACKET = struct.Struct("<2sBBIII4q8f21f")
+
+HEADER_SIZE = _HEADER.size
+ANALOG_OFFSET = HEADER_SIZE
+POSE_OFFSET = ANALOG_OFFSET + 8 * 4
+PACKET_SIZE = _PACKET.size
+
+_BUTTON_BIT = {name: 1 << i for i, name in enumerate(BUTTONS)}
+# 模拟量在 float32 数组中的位置, thumbstick 为切片
+_ANALOG_INDEX = {
+    "trigger_left": 0, "trigger_right": 1,
+    "grip_left": 2, "grip_right": 3,
+    "thumbstick_left": slice(4, 6), "thumbstick_right": slice(6, 8),
+}
+_NAN_POSE = (float("nan"),) * 7
+
+# 频道 → 包含的字典键; 订阅端按前缀过滤, 如 "pose/" 接收全部姿态, "analog/right" 只接收右手模拟量
+CHANNEL_KEYS = {
+    "pose/left": ("left_pos", "left_rot"),
+    "pose/right": ("right_pos", "right_rot"),
+    "pose/hmd": ("hmd_pos", "hmd_rot"),
+    "buttons": BUTTONS,
+    "analog/left": ("trigger_left", "grip_left", "thumbstick_left"),
+    "analog/right": ("trigger_right", "grip_right", "thumbstick_right"),
+}
+CHANNELS = tuple(CHANNEL_KEYS)
+
+_CH_HEADER = struct.Struct("<2sBBIqqq")
+_CH_BODY = {
+    "pose": struct.Struct("<7f"),
+    "buttons": struct.Struct("<I"),
+    "analog": struct.Struct("<4f"),
+}
+_CH_PACKET = {kind: struct.Struct(_CH_HEADER.format + body.format[1:]) for kind, body in _CH_BODY.items()}
+
+
+class JsonCodec:
+    """与 send_json / recv_json 等价的文本格式"""
+
+    name = "json"
+
+    def encode(self, data: Any) -> bytes:
+        return json.dumps(data).encode("utf-8")
+
+    def decode(self, buffer) -> Any:
+        return json.loads(bytes(buffer))
+
+    def encode_channels(self, data: Dict[str, Any], channels=CHANNELS):
+        """拆分为 [(topic, payload), ...], 每个频道带上 seq 与 timing"""
+        timing = data.get(TIMING_KEY)
+        seq = data.get("seq")
+        out = []
+        for topic in channels:
+            sub = {k: data.get(k) for k in CHANNEL_KEYS[topic]}
+            sub["seq"] = seq
+            sub[TIMING_KEY] = timing
+            out.append((topic.encode(), json.dumps(sub).encode("utf-8")))
+        return out
+
+    def decode_channel(self, topic: str, buffer) -> Dict[str, Any]:
+        return json.loads(bytes(buffer))
+
+
+class BinaryFrame:
+    """
+    BinaryCodec 的解码结果, 数组字段均为接收缓冲区上的只读视图
+
+    - seq: 序号, version: 版本号
+    - buttons: 按键位图 (int)
+    - analogs: (8,) float32, 顺序见 ANALOGS
+    - poses: (3, 7) float32, 行顺序见 DEVICES
+    - valid: 姿态有效位 (int), 可用 pose_valid(dev) 查询
+    - timing: {"sample": ns, "capture": ns, "process": ns, "publish": ns[, "recv": ns]}
+    """
+
+    __slots__ = ("seq", "version", "buttons", "valid", "analogs", "poses", "timing")
+
+    def __init__(self, seq, version, buttons, valid, analogs, poses, timing):
+        self.seq = seq
+        self.version = version
+        self.buttons = buttons
+        self.valid = valid
+        self.analogs = analogs
+        self.poses = poses
+        self.timing = timing
+
+    def pose_valid(self, dev: str) -> bool:
+        return bool(self.valid >> DEVICES.index(dev) & 1)
+
+    def pose(self, dev: str) -> Optional[np.ndarray]:
+        """(7,) 姿态视图, 无效时返回 None"""
+        i = DEVICES.index(dev)
+        return self.poses[i] if self.valid >> i & 1 else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """按 XRRuntime 字典的键名读取单个字段"""
+        bit = _BUTTON_BIT.get(key)
+        if bit is not None:
+            return bool(self.buttons & bit)
+        idx = _ANALOG_INDEX.get(key)
+        if idx is not None:
+            v = self.analogs[idx]
+            return (float(v[0]), float(v[1])) if isinstance(idx, slice) else float(v)
+        if key == TIMING_KEY:
+            return self.timing
+        if key == "seq":
+            return self.seq
+        dev, _, field = key.rpartition("_")
+        if dev in DEVICES and field in ("pos", "rot"):
+            p = self.pose(dev)
+            if p is None:
+                return None
+            return (p[:3] if field == "pos" else p[3:]).tolist()
+        return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """还原为 XRRuntime.read_input() 格式的字典"""
+        data: Dict[str, Any] = {name: bool(self.buttons & bit) for name, bit in _BUTTON_BIT.items()}
+        a = self.analogs.tolist()
+        data.update(
+            trigger_left=a[0], trigger_right=a[1],
+            grip_left=a[2], grip_right=a[3],
+            thumbstick_left=(a[4], a[5]), thumbstick_right=(a[6], a[7]),
+        )
+        poses = self.poses.tolist()
+        for i, dev in enumerate(DEVICES):
+            ok = self.valid >> i & 1
+            data[f"{dev}_pos"] = poses[i][:3] if ok else None
+            data[f"{dev}_rot"] = poses[i][3:] if ok else None
+        data["seq"] = self.seq
+        data[TIMING_KEY] = dict(self.timing)
+        return data
+
+    def __repr__(self) -> str:
+        return f"BinaryFrame(seq={self.seq}, buttons={self.buttons:#06x}, valid={self.valid:#03b})"
+
+
+class BinaryCodec:
+    """固定布局二进制编解码器 (布局见模块说明)"""
+
+    name = "binary"
+    size = PACKET_SIZE
+
+    def __init__(self):
+        self.seq = 0
+
+    # ------------------ 编码 ------------------
+    def _next_seq(self, seq: Optional[int]) -> int:
+        """使用帧中的序号 (ZMQPublisher 会写入), 没有时自增"""
+        self.seq = (self.seq + 1 if seq is None else seq) & 0xFFFFFFFF
+        return self.seq
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        buf = bytearray(PACKET_SIZE)
+        self.encode_into(data, buf)
+        return bytes(buf)
+
+    def encode_into(self, data: Dict[str, Any], buf, offset: int = 0) -> int:
+        """编码到已有的可写缓冲区, 返回写入的字节数"""
+        get = data.get
+
+        buttons = 0
+        for name, bit in _BUTTON_BIT.items():
+            if get(name):
+                buttons |= bit
+
+        ts_l = get("thumbstick_left") or (0.0, 0.0)
+        ts_r = get("thumbstick_right") or (0.0, 0.0)
+        analogs = (
+            get("trigger_left") or 0.0, get("trigger_right") or 0.0,
+            get("grip_left") or 0.0, get("grip_right") or 0.0,
+            ts_l[0], ts_l[1], ts_r[0], ts_r[1],
+        )
+
+        valid = 0
+        poses = []
+        for i, dev in enumerate(DEVICES):
+            pos, rot = get(f"{dev}_pos"), get(f"{dev}_rot")
+            if pos is None or rot is None:
+                poses.extend(_NAN_POSE)
+            else:
+                valid |= 1 << i
+                poses.extend(pos)
+                poses.extend(rot)
+
+        timing = get(TIMING_KEY) or {}
+        _PACKET.pack_into(
+            buf, offset,
+            MAGIC, VERSION, valid, self._next_seq(get("seq")), buttons, 0,
+            *(timing.get(stage) or 0 for stage in TIMING_STAGES),
+            *analogs, *poses,
+        )
+        return PACKET_SIZE
+
+    def encode_channels(self, data: Dict[str, Any], channels=CHANNELS):
+        """拆分为 [(topic, payload), ...], 同一帧的各频道使用同一个序号"""
+        get = data.get
+        timing = get(TIMING_KEY) or {}
+        stamps = (timing.get("sample") or 0, timing.get("capture") or 0, timing.get("publish") or 0)
+        seq = self._next_seq(get("seq"))
+
+        out = []
+        for topic in channels:
+            kind, _, side = topic.partition("/")
+            flags = 0
+            if kind == "pose":
+                pos, rot = get(f"{side}_pos"), get(f"{side}_rot")
+                if pos is None or rot is None:
+                    body = _NAN_POSE
+                else:
+                    flags = 1
+                    body = (*pos, *rot)
+            elif kind == "buttons":
+                buttons = 0
+                for name, bit in _BUTTON_BIT.items():
+                    if get(name):
+                        buttons |= bit
+                body = (buttons,)
+            else:
+                ts = get(f"thumbstick_{side}") or (0.0, 0.0)
+                body = (get(f"trigger_{side}") or 0.0, get(f"grip_{side}") or 0.0, ts[0], ts[1])
+            out.append((
+                topic.encode(),
+                _CH_PACKET[kind].pack(MAGIC, VERSION, flags, seq, *stamps, *body),
+            ))
+        return out
+
+    # ------------------ 解码 ------------------
+    def decode_channel(self, topic: str, buffer) -> Dict[str, Any]:
+        """解码一条频道消息, 返回 XRRuntime 字典的对应子集 (附带 seq 与 timing)"""
+        kind, _, side = topic.partition("/")
+        packet = _CH_PACKET.get(kind)
+        if packet is None:
+            raise ValueError(f"未知的频道: {topic!r}")
+        if len(buffer) != packet.size:
+            raise ValueError(f"频道 {topic!r} 长度不符: {len(buffer)} != {packet.size}")
+        magic, version, flags, seq, t_sample, t_cap, t_pub, *body = packet.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不支持的频道消息: magic={magic!r}, version={version}")
+
+        if kind == "pose":
+            ok = flags & 1
+            data: Dict[str, Any] = {
+                f"{side}_pos": body[:3] if ok else None,
+                f"{side}_rot": body[3:] if ok else None,
+            }
+        elif kind == "buttons":
+            data = {name: bool(body[0] & bit) for name, bit in _BUTTON_BIT.items()}
+        else:
+            data = {
+                f"trigger_{side}": body[0],
+                f"grip_{side}": body[1],
+                f"thumbstick_{side}": (body[2], body[3]),
+            }
+        timing = {}
+        if t_sample:
+            timing["sample"] = t_sample
+        if t_cap:
+            timing["capture"] = t_cap
+        if t_pub:
+            timing["publish"] = t_pub
+        data["seq"] = seq
+        data[TIMING_KEY] = timing
+        return data
+
+    def decode(self, buffer) -> BinaryFrame:
+        """解码一帧, buffer 可以是 bytes / memoryview / zmq.Frame.buffer, 数组字段不复制"""
+        # 先检查长度再 unpack, 过短的帧报 ValueError 而不是 struct.error;
+        # 头部完整时先核对版本, 旧版本的帧给出版本不符而不是长度不足
+        if len(buffer) < HEADER_SIZE:
+            raise ValueError(f"二进制帧长度不足: {len(buffer)} < {PACKET_SIZE}")
+        magic, version, valid, seq, buttons, _, *stamps = _HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f"不是 xrinput 二进制帧: magic={magic!r}")
+        if version != VERSION:
+            raise ValueError(f"不支持的二进制帧版本: {version} (当前 {VERSION})")
+        if len(buffer) < PACKET_SIZE:
+            raise ValueError(f"二进制帧长度不足: {len(buffer)} < {PACKET_SIZE}")
+
+        analogs = np.frombuffer(buffer, dtype="<f4", count=8, offset=ANALOG_OFFSET)
+        poses = np.frombuffer(buffer, dtype="<f4", count=21, offset=POSE_OFFSET).reshape(3, 7)
+        timing = {}
+        for stage, t in zip(TIMING_STAGES, stamps):
+            if t:
+                timing[stage] = t
+        return BinaryFrame(seq, version, buttons, valid, analogs, poses, timing)
+
+
+COMPACT_TAG = 0xC2  # 高 4 位 0xC 标识紧凑格式, 低 4 位为其版本号 (2: 增加 sample 时间戳)
+
+_C_HEADER = struct.Struct("<BHHI")
+_C_ANALOG = {8: struct.Struct("<4B4b"), 16: struct.Struct("<4H4h")}
+_C_ANALOG_SCALE = {8: (255.0, 127.0), 16: (65535.0, 32767.0)}
+_C_POSE = struct.Struct("<6h")
+_C_QUAT_SCALE = 32767.0 * math.sqrt(2.0)  # 非最大分量的绝对值 ≤ 1/√2
+_C_TIMING_SHIFT = 9
+_C_ANALOG16 = 1 << 13
+_C_MAX_SIZE = _C_HEADER.size + 8 + 4 * (len(TIMING_STAGES) - 1) + _C_ANALOG[16].size + 3 * _C_POSE.size
+
+
+def _clamp(v: int, lo: int, hi: int) -> int:
+    return lo if v < lo else hi if v > hi else v
+
+
+class CompactCodec(BinaryCodec):
+    """
+    量化的紧凑二进制编解码器 (布局与误差上界见模块说明), decode() 返回 BinaryFrame
+
+    参数:
+    - pos_resolution: 位置分辨率 (m), 决定精度与可表示范围 (±32767 倍)
+    - analog_bits: 模拟量位数, 8 或 16
+
+    按频道发布 (topics) 时沿用 BinaryCodec 的频道格式.
+    解码端从数据包读取位数与有效位, 只需 pos_resolution 与编码端一致.
+    """
+
+    name = "compact"
+    size = _C_MAX_SIZE
+
+    def __init__(self, pos_resolution: float = 0.0002, analog_bits: int = 8):
+        super().__init__()
+        if analog_bits not in _C_ANALOG:
+            raise ValueError(f"analog_bits 只能是 8 或 16: {analog_bits}")
+        self.pos_resolution = pos_resolution
+        self.analog_bits = analog_bits
+        self.clipped = 0  # 位置超出可表示范围被截断的次数
+
+    # ------------------ 编码 ------------------
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        buf = bytearray(_C_MAX_SIZE)
+        n = self.encode_into(data, buf)
+        return bytes(buf[:n])
+
+    def encode_into(self, data: Dict[str, Any], buf, offset: int = 0) -> int:
+        """编码到已有的可写缓冲区 (至少 size 字节), 返回写入的字节数"""
+        get = data.get
+
+        buttons = 0
+        for name, bit in _BUTTON_BIT.items():
+            if get(name):
+                buttons |= bit
+
+        flags = _C_ANALOG16 if self.analog_bits == 16 else 0
+        poses = []
+        for i, dev in enumerate(DEVICES):
+            pos, rot = get(f"{dev}_pos"), get(f"{dev}_rot")
+            if pos is None or rot is None:
+                continue
+            largest, packed = self._pack_pose(pos, rot)
+            flags |= 1 << i | largest << (3 + 2 * i)
+            poses.append(packed)
+
+        timing = get(TIMING_KEY) or {}
+        stamps = []
+        for k, stage in enumerate(TIMING_STAGES):
+            t = timing.get(stage)
+            if t:
+                flags |= 1 << (_C_TIMING_SHIFT + k)
+                stamps.append(t)
+
+        _C_HEADER.pack_into(buf, offset, COMPACT_TAG, flags, buttons, self._next_seq(get("seq")))
+        n = offset + _C_HEADER.size
+        if stamps:
+            base = stamps[0]
+            struct.pack_into("<q", buf, n, base)
+            n += 8
+            for t in stamps[1:]:
+                struct.pack_into("<i", buf, n, _clamp(t - base, -0x80000000, 0x7FFFFFFF))
+                n += 4
+
+        unit, stick = _C_ANALOG_SCALE[self.analog_bits]
+        ts_l = get("thumbstick_left") or (0.0, 0.0)
+        ts_r = get("thumbstick_right") or (0.0, 0.0)
+        iu, isg = int(unit), int(stick)
+        _C_ANALOG[self.analog_bits].pack_into(
+            buf, n,
+            _clamp(round((get("trigger_left") or 0.0) * unit), 0, iu),
+            _clamp(round((get("trigger_right") or 0.0) * unit), 0, iu),
+            _clamp(round((get("grip_left") or 0.0) * unit), 0, iu),
+            _clamp(round((get("grip_right") or 0.0) * unit), 0, iu),
+            _clamp(round(ts_l[0] * stick), -isg, isg), _clamp(round(ts_l[1] * stick), -isg, isg),
+            _clamp(round(ts_r[0] * stick), -isg, isg), _clamp(round(ts_r[1] * stick), -isg, isg),
+        )
+        n += _C_ANALOG[self.analog_bits].size
+
+        for packed in poses:
+            _C_POSE.pack_into(buf, n, *packed)
+            n += _C_POSE.size
+        return n - offset
+
+    def _pack_pose(self, pos, rot):
+        """返回 (最大分量下标, 6 个 int16)"""
+        res = self.pos_resolution
+        p = [round(v / res) for v in pos]
+        if any(v > 32767 or v < -32767 for v in p):
+            self.clipped += 1
+            p = [_clamp(v, -32767, 32767) for v in p]
+
+        x, y, z, w = rot
+        norm = math.sqrt(x * x + y * y + z * z + w * w) or 1.0
+        q = (x / norm, y / norm, z / norm, w / norm)
+        largest = max(range(4), key=lambda k: abs(q[k]))
+        sign = _C_QUAT_SCALE if q[largest] >= 0 else -_C_QUAT_SCALE  # q 与 -q 是同一旋转
+        small = [_clamp(round(q[k] * sign), -32767, 32767) for k in range(4) if k != largest]
+        return largest, (*p, *small)
+
+    # ------------------ 解码 ------------------
+    def decode(self, buffer) -> BinaryFrame:
+        """解码一帧为 BinaryFrame (数组为新分配的 float32, 无效设备行为 NaN)"""
+        if len(buffer) < _C_HEADER.size:
+            raise ValueError(f"紧凑帧长度不足: {len(buffer)}")
+        tag, flags, buttons, seq = _C_HEADER.unpack_from(buffer)
+        if tag != COMPACT_TAG:
+            raise ValueError(f"不是 xrinput 紧凑帧: tag={tag:#04x}")
+        n = _C_HEADER.size
+
+        bits = 16 if flags & _C_ANALOG16 else 8
+        present = [k for k in range(len(TIMING_STAGES)) if flags >> (_C_TIMING_SHIFT + k) & 1]
+        valid = flags & 0b111
+        expected = (
+            n + (8 + 4 * (len(present) - 1) if present else 0)
+            + _C_ANALOG[bits].size + bin(valid).count("1") * _C_POSE.size
+        )
+        if len(buffer) < expected:
+            raise ValueError(f"紧凑帧长度不足: {len(buffer)} < {expected}")
+
+        timing = {}
+        if present:
+            (base,) = struct.unpack_from("<q", buffer, n)
+            n += 8
+            timing[TIMING_STAGES[present[0]]] = base
+            for k in present[1:]:
+                timing[TIMING_STAGES[k]] = base + struct.unpack_from("<i", buffer, n)[0]
+                n += 4
+
+        unit, stick = _C_ANALOG_SCALE[bits]
+        raw = _C_ANALOG[bits].unpack_from(buffer, n)
+        n += _C_ANALOG[bits].size
+        analogs = np.array([v / unit for v in raw[:4]] + [v / stick for v in raw[4:]], dtype=np.float32)
+
+        # 逐元素的标量运算比对 3 行小数组调用 numpy 快
+        res = self.pos_resolution
+        rows = []
+        for i in range(3):
+            if not valid >> i & 1:
+                rows.append(_NAN_POSE)
+                continue
+            px, py, pz, a, b, c = _C_POSE.unpack_from(buffer, n)
+            n += _C_POSE.size
+            q = [a / _C_QUAT_SCALE, b / _C_QUAT_SCALE, c / _C_QUAT_SCALE]
+            largest = math.sqrt(max(0.0, 1.0 - q[0] * q[0] - q[1] * q[1] - q[2] * q[2]))
+            q.insert(flags >> (3 + 2 * i) & 0b11, largest)
+            rows.append((px * res, py * res, pz * res, *q))
+        poses = np.array(rows, dtype=np.float32)
+        return BinaryFrame(seq, COMPACT_TAG, buttons, valid, analogs, poses, timing)
+
+
+def frame_poses(frame, devices=DEVICES, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """从 XRRuntime 字典或 BinaryFrame 取出 (D, 7) 姿态, 无效设备为 NaN"""
+    if out is None:
+        out = np.empty((len(devices), 7), dtype=float)
+    if isinstance(frame, BinaryFrame):
+        if devices == DEVICES:
+            out[...] = frame.poses  # 未置有效位的行编码时已写为 NaN
+            return out
+        for i, dev in enumerate(devices):
+            p = frame.pose(dev)
+            out[i] = np.nan if p is None else p
+        return out
+    get = frame.get
+    for i, dev in enumerate(devices):
+        pos, rot = get(f"{dev}_pos"), get(f"{dev}_rot")
+        if pos is None or rot is None:
+            out[i] = np.nan
+        else:
+            out[i, :3] = pos
+            out[i, 3:] = rot
+    return out
+
+
+CODECS = {
+    "json": JsonCodec,
+    "binary": BinaryCodec,
+    "compact": CompactCodec,
+}
+
+
+def get_codec(codec):
+    """"json" / "binary" / "compact" → 新的编解码器实例; 其他对象原样返回"""
+    if isinstance(codec, str):
+        try:
+            return CODECS[codec]()
+        except KeyError:
+            raise ValueError(f"未知的编解码器: {codec!r}, 可选 {sorted(CODECS)}") from None
+    return codec
+
+
+if __name__ == "__main__":
+    import time
+
+    def fake_frame(k: int) -> Dict[str, Any]:
+        t = k * 0.002
+        data: Dict[str, Any] = {name: (k >> i) & 1 == 1 for i, name in enumerate(BUTTONS)}
+        data.update(
+            trigger_left=0.5 + 0.5 * math.sin(t), trigger_right=0.25,
+            grip_left=0.0, grip_right=1.0,
+            thumbstick_left=(0.1, -0.2), thumbstick_right=(0.0, 0.0),
+            left_pos=[0.1, 0.2, 0.3 + 0.01 * math.sin(t)], left_rot=[0.0, 0.0, 0.0, 1.0],
+            right_pos=[-0.1, 0.2, 0.3], right_rot=[0.0, 0.7071068, 0.0, 0.7071068],
+            hmd_pos=None, hmd_rot=None,
+            timing={"sample": time.monotonic_ns() - 300_000, "capture": time.monotonic_ns()},
+        )
+        return data
+
+    json_codec, bin_codec = JsonCodec(), BinaryCodec()
+    data = fake_frame(5)
+
+    # 往返检查
+    frame = bin_codec.decode(bin_codec.encode(data))
+    back = frame.to_dict()
+    err = max(
+        abs(back[k] - data[k]) if isinstance(data[k], float) else 0.0
+        for k in data if k in back
+    )
+    assert all(back[k] == data[k] for k in BUTTONS)
+    assert back["hmd_pos"] is None and frame.get("hmd_rot") is None
+    assert np.allclose(back["right_rot"], data["right_rot"], atol=1e-7)
+    assert frame.get("grip_right") == 1.0 and frame.get("thumbstick_left") == back["thumbstick_left"]
+    assert back["timing"] == data["timing"]
+    print(frame, f"模拟量最大误差 {err:.2e} (float32)")
+
+    # 版本检查
+    bad = bytearray(bin_codec.encode(data))
+    bad[2] = VERSION + 1
+    try:
+        bin_codec.decode(bad)
+    except ValueError as e:
+        print("版本不符:", e)
+
+    # 过短的帧同样报 ValueError
+    try:
+        bin_codec.decode(b"garbage")
+    except ValueError as e:
+        print("长度不足:", e)
+
+    # 零拷贝: 解码视图直接指向接收缓冲区
+    buf = bytearray(bin_codec.encode(data))
+    frame = bin_codec.decode(buf)
+    struct.pack_into("<f", buf, POSE_OFFSET, 9.0)
+    print("零拷贝视图:", frame.poses[0, 0] == 9.0)
+
+    # 频道拆分往返检查
+    for codec in (json_codec, bin_codec):
+        merged: Dict[str, Any] = {}
+        for topic, payload in codec.encode_channels(data):
+            merged.update(codec.decode_channel(topic.decode(), payload))
+        assert all(merged[k] == data[k] for k in BUTTONS) and merged["hmd_pos"] is None
+        assert np.allclose(merged["left_pos"], data["left_pos"]) and np.isclose(merged["grip_right"], 1.0)
+        assert merged["timing"] == data["timing"]
+    sizes = {t.decode(): len(p) for t, p in bin_codec.encode_channels(data)}
+    print("频道载荷 (字节):", sizes)
+
+    # 紧凑格式: 随机帧检验模块说明中的误差上界
+    rng = np.random.default_rng(0)
+    for bits, (unit_bound, stick_bound) in ((8, (1 / 510, 1 / 254)), (16, (7.7e-6, 1.6e-5))):
+        compact = CompactCodec(analog_bits=bits)
+        pos_err = quat_comp_err = angle_err = trig_err = stick_err = 0.0
+        for _ in range(2000):
+            d = fake_frame(int(rng.integers(1 << 16)))
+            q = rng.normal(size=(3, 4))
+            q /= np.linalg.norm(q, axis=1, keepdims=True)
+            p = rng.uniform(-6.5, 6.5, size=(3, 3))
+            for i, dev in enumerate(DEVICES):
+                d[f"{dev}_pos"], d[f"{dev}_rot"] = p[i].tolist(), q[i].tolist()
+            a = rng.uniform(0, 1, 4)
+            st = rng.uniform(-1, 1, 4)
+            d.update(trigger_left=a[0], trigger_right=a[1], grip_left=a[2], grip_right=a[3],
+                     thumbstick_left=tuple(st[:2]), thumbstick_right=tuple(st[2:]))
+            f = compact.decode(compact.encode(d))
+            assert all(f.get(k) == d[k] for k in BUTTONS) and f.timing == d["timing"]
+            fq = f.poses[:, 3:].astype(float)
+            fq *= np.sign((fq * q).sum(axis=1, keepdims=True))
+            pos_err = max(pos_err, np.abs(f.poses[:, :3] - p).max())
+            quat_comp_err = max(quat_comp_err, np.abs(fq - q).max())
+            # 相对旋转角 2·acos|q1·q2| = 4·asin(|q1 - q2| / 2), 后者在小角度下数值稳定
+            angle_err = max(angle_err, (4 * np.arcsin(np.linalg.norm(fq - q, axis=1) / 2)).max())
+            trig_err = max(trig_err, np.abs(f.analogs[:4] - a).max())
+            stick_err = max(stick_err, np.abs(f.analogs[4:] - st).max())
+        # float32 解码结果本身带来约 1e-7 (位置约 5e-7) 的误差
+        assert pos_err <= compact.pos_resolution / 2 + 1e-6, pos_err
+        assert quat_comp_err <= 3.3e-5 and angle_err < 8e-5, (quat_comp_err, angle_err)
+        assert trig_err <= unit_bound + 1e-7 and stick_err <= stick_bound + 1e-7, (trig_err, stick_err)
+        print(
+            f"compact/{bits:2d} 位模拟量: 位置 {pos_err * 1e3:.3f} mm, 四元数分量 {quat_comp_err:.2e}, "
+            f"角度 {np.degrees(angle_err):.5f}°, trigger {trig_err:.2e}, thumbstick {stick_err:.2e}"
+        )
+
+    # 0 / ±1 精确还原, 无效设备不占空间
+    compact = CompactCodec()
+    f = compact.decode(compact.encode(data))
+    assert f.get("grip_right") == 1.0 and f.get("grip_left") == 0.0 and f.get("hmd_pos") is None
+    print(f"compact: 头显无效 {len(compact.encode(data))} 字节, 序号 {f.seq}")
+
+    n = 20000
+    for codec in (json_codec, bin_codec, compact):
+        payload = codec.encode(data)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            codec.encode(data)
+        t1 = time.perf_counter()
+        for _ in range(n):
+            codec.decode(payload)
+        t2 = time.perf_counter()
+        print(
+            f"{codec.name:>6}: {len(payload):4d} 字节, 编码 {(t1 - t0) / n * 1e6:5.1f} us, "
+            f"解码 {(t2 - t1) / n * 1e6:5.1f} us"
+        )
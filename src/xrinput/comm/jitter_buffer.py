@@ -0,0 +1,191 @@
+"""
+订阅端抖动缓冲
+
+Wi-Fi 或高负载主机上, 发布端均匀发出的帧会成批到达, 直接把 "最新一帧" 作为机械臂
+设定点会把这种抖动原样传下去. JitterBuffer 按发送端时间戳 (timing.sample, 缺失时依次用
+capture / publish) 保存最近的帧, 输出时回放 "当前时刻 - 播放延迟" 的插值姿态 (插值由
+PoseResampler 完成):
+
+    t_sender = t_local - offset - delay
+
+- offset: 窗口内 (到达时刻 - 发送时刻) 的最小值, 即最快一帧的传输时间 (跨主机时还包含两端时钟差)
+- delay: 自适应播放延迟, 取窗口内传输时间相对 offset 的 quantile 分位数 + margin;
+  变大时立即跟上, 变小时缓慢回落, 避免输出时间轴来回跳动
+
+    sub = ZMQSubscriber(codec="binary", jitter_buffer=True)
+    while True:
+        sub.recv_latest()                  # 收下所有已到达的帧
+        setpoint = sub.sample()            # (3, 7): left / right / hmd
+
+AsyncZMQSubscriber 同样支持 jitter_buffer, 对应写法为 await sub.recv_latest().
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ..monitor.latency import TIMING_KEY
+from ..processing.resampler import PoseResampler
+from .codec import DEVICES, BinaryFrame, frame_poses
+
+
+class JitterBuffer:
+    """
+    自适应播放延迟的姿态缓冲
+
+    参数:
+    - devices: 缓冲的设备, 输出 (D, 7) 的行顺序
+    - capacity: 保留的帧数, 需覆盖 "最大播放延迟 × 帧率"
+    - quantile: 播放延迟覆盖的传输时间分位数 (%)
+    - margin: 额外的固定余量 (s)
+    - min_delay / max_delay: 播放延迟范围 (s)
+    - window: 统计传输时间的帧数
+    - release: 播放延迟回落的平滑系数 (每次更新向目标靠近的比例)
+    - max_extrapolation: 缓冲耗尽时最长外推时间 (s), 见 PoseResampler
+    """
+
+    def __init__(
+        self,
+        devices: Sequence[str] = DEVICES,
+        capacity: int = 32,
+        quantile: float = 95.0,
+        margin: float = 0.001,
+        min_delay: float = 0.0,
+        max_delay: float = 0.05,
+        window: int = 256,
+        release: float = 0.05,
+        max_extrapolation: float = 0.05,
+    ):
+        self.devices = tuple(devices)
+        self.quantile = quantile
+        self.margin = margin
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.release = release
+        self.resampler = PoseResampler(
+            n_devices=len(self.devices), capacity=capacity, max_extrapolation=max_extrapolation,
+        )
+
+        self.window = window
+        self._transit = np.zeros(window, dtype=float)  # 到达时刻 - 发送时刻 (s), 环形缓冲
+        self._n = 0
+        self._poses = np.full((len(self.devices), 7), np.nan)
+
+        self.offset = 0.0
+        self.delay = min_delay
+        self.late = 0        # 到达时其播放时刻已过的帧数
+        self.underruns = 0   # sample() 超出最新一帧需要外推的次数
+
+    # ------------------ 输入 ------------------
+    def push(self, frame, recv_ns: Optional[int] = None) -> bool:
+        """
+        加入一帧 (XRRuntime 字典或 BinaryFrame), recv_ns 为本地到达时刻 (monotonic_ns)
+
+        返回 False 表示该帧没有姿态或时间戳早于已缓冲的帧而被忽略
+        """
+        if recv_ns is None:
+            recv_ns = time.monotonic_ns()
+        timing = frame.timing if isinstance(frame, BinaryFrame) else (frame.get(TIMING_KEY) or {})
+        sent_ns = timing.get("sample") or timing.get("capture") or timing.get("publish") or recv_ns
+
+        poses = frame_poses(frame, self.devices, self._poses)
+        if np.isnan(poses).all():
+            return False
+
+        t_sent = sent_ns * 1e-9
+        latest = self.resampler.latest_time()
+        if latest is not None and t_sent <= latest:
+            return False
+        self.resampler.push(poses, t=t_sent)
+
+        transit = (recv_ns - sent_ns) * 1e-9
+        self._transit[self._n % self.window] = transit
+        self._n += 1
+        if self._n == 1 or self._n % 8 == 0:
+            self._update_delay()
+        if transit > self.offset + self.delay:
+            self.late += 1
+        return True
+
+    def _update_delay(self) -> None:
+        x = self._transit[:min(self._n, self.window)]
+        self.offset = float(x.min())
+        target = float(np.percentile(x, self.quantile)) - self.offset + self.margin
+        target = min(max(target, self.min_delay), self.max_delay)
+        if target > self.delay:
+            self.delay = target  # 抖动变大: 立即加大延迟, 否则后续帧都会迟到
+        else:
+            self.delay += (target - self.delay) * self.release
+
+    # ------------------ 输出 ------------------
+    def to_sender_time(self, t_local: float) -> float:
+        """本地时刻 (秒, time.monotonic 时钟) → 回放的发送端时刻"""
+        return t_local - self.offset - self.delay
+
+    def sample(self, t: Optional[float] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        本地时刻 t (秒, 默认 time.monotonic()) 的 (D, 7) 插值姿态
+
+        追踪丢失的设备保持最后的有效姿态, 从未有效过的设备为 NaN; 尚无数据时抛出 RuntimeError
+        """
+        if t is None:
+            t = time.monotonic()
+        t_sender = self.to_sender_time(t)
+        latest = self.resampler.latest_time()
+        if latest is not None and t_sender > latest:
+            self.underruns += 1
+        return self.resampler.sample(t_sender, out=out)
+
+    def reset(self) -> None:
+        self.resampler.reset()
+        self._n = 0
+        self.offset = 0.0
+        self.delay = self.min_delay
+        self.late = 0
+        self.underruns = 0
+
+
+if __name__ == "__main__":
+    from scipy.spatial.transform import Rotation as R
+
+    rng = np.random.default_rng(0)
+
+    def truth(t):
+        return np.array([0.2 * np.sin(2 * t), 1.0, 0.1 * t, *R.from_rotvec([0.0, 0.0, 1.5 * t]).as_quat()])
+
+    # 发送端 90 Hz 均匀发出; 链路: 1 ms 基础延迟 + 指数分布抖动, 每 ~50 ms 一次 10~20 ms 的拥塞,
+    # 按顺序到达 (TCP), 因此拥塞期间的帧成批到达
+    fps, duration = 90, 10.0
+    t_send = np.arange(0.0, duration, 1 / fps) + 100.0
+    delay = 0.001 + rng.exponential(0.001, t_send.size)
+    stall = rng.random(t_send.size) < 1 / (0.05 * fps)
+    delay[stall] += rng.uniform(0.01, 0.02, stall.sum())
+    t_recv = np.maximum.accumulate(t_send + delay)
+
+    jb = JitterBuffer(devices=("left",))
+    ts = np.arange(t_send[0] + 1.0, t_send[-1], 0.002)  # 500 Hz 输出, 跳过第一秒的预热
+    out_jb, out_latest, ages = [], [], []
+    k = 0
+    for t in ts:
+        while k < t_send.size and t_recv[k] <= t:
+            jb.push({"left_pos": truth(t_send[k])[:3], "left_rot": truth(t_send[k])[3:],
+                     "timing": {"capture": int(t_send[k] * 1e9)}}, recv_ns=int(t_recv[k] * 1e9))
+            k += 1
+        out_jb.append(jb.sample(t)[0])
+        out_latest.append(truth(t_send[k - 1]))
+        ages.append(t - jb.to_sender_time(t))
+    out_jb, out_latest = np.array(out_jb), np.array(out_latest)
+
+    def roughness(x):
+        """位置二阶差分的 RMS (mm), 越小越平滑"""
+        return np.sqrt(np.mean(np.diff(x[:, :3], n=2, axis=0) ** 2)) * 1e3
+
+    # 抖动缓冲的输出应与 "真值延迟 delay 后" 吻合
+    ref = np.array([truth(t - a) for t, a in zip(ts, ages)])
+    print(f"播放延迟 {jb.delay * 1e3:.1f} ms, offset {jb.offset * 1e3:.2f} ms, 迟到 {jb.late} 帧, 外推 {jb.underruns} 次")
+    print(f"抖动缓冲: 与延迟后的真值最大误差 {np.abs(out_jb[:, :3] - ref[:, :3]).max() * 1e3:.2f} mm, "
+          f"二阶差分 RMS {roughness(out_jb):.4f} mm")
+    print(f"最新一帧: 二阶差分 RMS {roughness(out_latest):.4f} mm")
@@ -0,0 +1,368 @@
+"""
+采集与发布解耦: 一个采集循环, 多个不同频率的发布端
+
+采集循环只调用 push() 把最新一帧放入环形缓冲 (加锁追加, 不编码不发送), 每个发布端
+在自己的线程中按自己的节奏取帧、编码并发送, 慢端点或编码耗时都不会拖慢采集:
+
+    hub = RatePublisher()
+    hub.add("tcp://*:5555", rate_hz=500, codec="binary")      # 控制: 每 2 ms 发送最新一帧
+    hub.add("tcp://*:5556", rate_hz=30)                       # 面板: 30 Hz 最新一帧 (JSON)
+    hub.add("tcp://*:5557", rate_hz=30, average=True)         # 30 Hz, 两次发送之间的帧取平均
+    hub.add("tcp://*:5558", decimate=3, codec="binary")       # 每采集 3 帧发送一次
+    hub.start()
+    while True:
+        hub.push(xr.read_input())
+
+两种节奏:
+- rate_hz: 定时发送. 默认 (repeat=True) 没有新帧时重发上一帧, 输出严格等间隔;
+  repeat=False 时跳过没有新帧的周期
+- decimate: 每 N 个采集帧发送一次, 由采集节奏驱动
+
+average=True 时发送的是自上次发送以来所有新帧的平均 (抗混叠的抽取): 位置 / 模拟量取
+算术平均, 姿态取符号对齐后的四元数平均再归一化, 按键在窗口内按下过即为按下 (低频端点
+不会漏掉短按), timing 与 seq 以外的其余字段取最新一帧. 平均窗口最多 capacity 帧.
+
+push() 会浅复制该帧 (timing 单独复制), 采集端之后可以继续复用同一个字典; 但其中的
+位置 / 姿态列表等嵌套对象需每帧新建. 各端点发送前再复制一次, 互不影响 (ZMQPublisher 会
+写入 seq 与 publish 时间戳).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..monitor.latency import TIMING_KEY
+from ..monitor.log import logger
+from .codec import BUTTONS, DEVICES
+from .zmq_pub import ZMQPublisher
+
+_SCALARS = ("trigger_left", "trigger_right", "grip_left", "grip_right")
+_STICKS = ("thumbstick_left", "thumbstick_right")
+
+
+def _copy_frame(data):
+    """浅复制字典并单独复制 timing, 其他类型原样返回"""
+    if not isinstance(data, dict):
+        return data
+    frame = dict(data)
+    timing = frame.get(TIMING_KEY)
+    if timing is not None:
+        frame[TIMING_KEY] = dict(timing)
+    return frame
+
+
+def average_frames(frames: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """多帧 XRRuntime 字典的平均 (规则见模块说明), frames 按时间顺序"""
+    out = _copy_frame(frames[-1])
+    if len(frames) == 1:
+        return out
+
+    for name in BUTTONS:
+        out[name] = any(f.get(name) for f in frames)
+    for name in _SCALARS:
+        values = [f[name] for f in frames if f.get(name) is not None]
+        if values:
+            out[name] = sum(values) / len(values)
+    for name in _STICKS:
+        values = [f[name] for f in frames if f.get(name) is not None]
+        if values:
+            out[name] = tuple(np.mean(values, axis=0).tolist())
+
+    for dev in DEVICES:
+        pk, rk = f"{dev}_pos", f"{dev}_rot"
+        valid = [(f[pk], f[rk]) for f in frames if f.get(pk) is not None and f.get(rk) is not None]
+        if not valid:
+            continue
+        pos = np.array([p for p, _ in valid], dtype=float)
+        rot = np.array([r for _, r in valid], dtype=float)
+        rot[rot @ rot[-1] < 0] *= -1  # q 与 -q 是同一旋转, 对齐到最新一帧再平均
+        q = rot.mean(axis=0)
+        out[pk] = pos.mean(axis=0).tolist()
+        out[rk] = (q / np.linalg.norm(q)).tolist()
+    return out
+
+
+class RateEndpoint:
+    """
+    RatePublisher.add() 创建的单个发布端 (在自己的线程中运行)
+
+    属性:
+    - publisher: 底层 ZMQPublisher, 其 stats 为发送统计 (丢帧在订阅端统计)
+    - published: 发送帧数; repeated: 其中没有新帧而重发上一帧的次数
+    - frames_per_send: 最近一次发送覆盖的新帧数 (平均模式下即平均的帧数)
+    - cpu_time: 端点线程累计 CPU 时间 (s)
+    """
+
+    def __init__(self, hub: "RatePublisher", publisher: ZMQPublisher, rate_hz, decimate, average, repeat):
+        self.hub = hub
+        self.publisher = publisher
+        self.rate_hz = rate_hz
+        self.decimate = decimate
+        self.average = average
+        self.repeat = repeat
+
+        self.published = 0
+        self.repeated = 0
+        self.frames_per_send = 0
+        self.cpu_time = 0.0
+        self._consumed = 0   # 已消费到的采集帧计数
+        self._last = None    # 上一次发送的帧 (重发用)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _emit(self, frames) -> None:
+        if frames:
+            self.frames_per_send = len(frames)
+            self._last = average_frames(frames) if self.average else frames[-1]
+        elif self._last is None or not self.repeat:
+            return
+        else:
+            self.repeated += 1
+        try:
+            self.publisher.send(_copy_frame(self._last))
+        except Exception as e:
+            logger.exception(f"[ZMQ] {self.publisher.address} 发送失败: {e}")
+            return
+        self.published += 1
+
+    def _collect(self, since: int):
+        """取出计数 since 之后的新帧 (平均模式全部取出, 否则只取最新一帧)"""
+        frames, self._consumed = self.hub._since(since, all_frames=self.average)
+        return frames
+
+    def _loop(self) -> None:
+        c0 = time.thread_time()
+        hub = self.hub
+        if self.decimate:
+            while self._running:
+                with hub._cond:
+                    hub._cond.wait_for(
+                        lambda: hub._count - self._consumed >= self.decimate or not self._running, 0.1,
+                    )
+                    if hub._count - self._consumed < self.decimate:
+                        continue
+                # 落后时只发送最近的 decimate 帧, 不补发
+                since = max(self._consumed, hub._count - self.decimate)
+                self._emit(self._collect(since))
+                self.cpu_time = time.thread_time() - c0
+            return
+
+        period = 1.0 / self.rate_hz
+        next_tick = time.monotonic()
+        while self._running:
+            remaining = next_tick - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+                continue
+            self._emit(self._collect(self._consumed))
+            next_tick += period
+            if time.monotonic() - next_tick > period:
+                next_tick = time.monotonic()  # 落后太多时不补发
+            self.cpu_time = time.thread_time() - c0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._consumed = self.hub._count  # 只发送启动之后采集的帧
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._loop, name=f"rate-pub-{self.publisher.address}", daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._running = False
+            with self.hub._cond:
+                self.hub._cond.notify_all()
+            self._thread.join()
+            self._thread = None
+
+    def __repr__(self) -> str:
+        mode = f"{self.rate_hz} Hz" if self.rate_hz else f"1/{self.decimate}"
+        return f"RateEndpoint({self.publisher.address}, {mode}, average={self.average}, published={self.published})"
+
+
+class RatePublisher:
+    """
+    最新帧中心 + 多个独立频率的发布端
+
+    参数:
+    - capacity: 环形缓冲的帧数, 即平均模式的最大窗口
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._frames: deque = deque(maxlen=capacity)
+        self._count = 0  # 累计 push 的帧数
+        self._cond = threading.Condition(threading.Lock())
+        self.endpoints: List[RateEndpoint] = []
+        self._n_decimate = 0
+        self._running = False
+
+    # ------------------ 采集端 ------------------
+    def push(self, data) -> None:
+        """放入最新一帧 (采集循环中调用, 浅复制后加锁追加)"""
+        frame = _copy_frame(data)
+        with self._cond:
+            self._frames.append(frame)
+            self._count += 1
+            if self._n_decimate:
+                self._cond.notify_all()  # 只有 decimate 端点在等待
+
+    @property
+    def latest(self):
+        with self._cond:
+            return self._frames[-1] if self._frames else None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def _since(self, since: int, all_frames: bool):
+        """(计数 since 之后的帧列表, 当前计数); 超出 capacity 的旧帧已被覆盖"""
+        with self._cond:
+            count = self._count
+            n = min(count - since, len(self._frames))
+            if n <= 0:
+                return [], count
+            if not all_frames:
+                return [self._frames[-1]], count
+            return list(self._frames)[-n:], count
+
+    # ------------------ 发布端 ------------------
+    def add(
+        self,
+        address: str,
+        rate_hz: Optional[float] = None,
+        decimate: Optional[int] = None,
+        average: bool = False,
+        repeat: bool = True,
+        **kwargs,
+    ) -> RateEndpoint:
+        """
+        新建发布端, rate_hz 与 decimate 二选一
+
+        - rate_hz: 定时发送的频率
+        - decimate: 每 N 个采集帧发送一次
+        - average: 发送自上次发送以来新帧的平均, 否则发送最新一帧
+        - repeat: 仅 rate_hz 模式, 没有新帧时是否重发上一帧
+        - 其余参数传给 ZMQPublisher (codec / topics / hwm / pool / clock_sync ...);
+          发送已在端点线程中, 不需要 threaded
+        """
+        if (rate_hz is None) == (decimate is None):
+            raise ValueError("rate_hz 与 decimate 必须且只能指定一个")
+        if rate_hz is not None and rate_hz <= 0:
+            raise ValueError(f"rate_hz 必须为正数: {rate_hz}")
+        if decimate is not None and decimate < 1:
+            raise ValueError(f"decimate 必须 >= 1: {decimate}")
+        endpoint = RateEndpoint(self, ZMQPublisher(address, **kwargs), rate_hz, decimate, average, repeat)
+        self.endpoints.append(endpoint)
+        self._n_decimate += decimate is not None
+        if self._running:
+            endpoint.start()
+        return endpoint
+
+    def remove(self, endpoint: RateEndpoint) -> None:
+        """停止并关闭一个发布端"""
+        endpoint.stop()
+        endpoint.publisher.close()
+        self.endpoints.remove(endpoint)
+        self._n_decimate -= endpoint.decimate is not None
+
+    # ------------------ 生命周期 ------------------
+    def start(self) -> "RatePublisher":
+        self._running = True
+        for endpoint in self.endpoints:
+            endpoint.start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        for endpoint in self.endpoints:
+            endpoint.stop()
+
+    def close(self) -> None:
+        self.stop()
+        for endpoint in self.endpoints:
+            endpoint.publisher.close()
+        self.endpoints.clear()
+        self._n_decimate = 0
+
+    def __enter__(self) -> "RatePublisher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    import math
+
+    from .zmq_sub import ZMQSubscriber
+
+    CAPTURE_HZ = 90
+    DURATION = 3.0
+
+    def frame(t: float) -> Dict[str, Any]:
+        return {
+            "left_pos": [0.2 * math.sin(2 * t), 1.0, 0.0], "left_rot": [0.0, 0.0, math.sin(t / 2), math.cos(t / 2)],
+            "grip_right": 0.5 + 0.5 * math.sin(5 * t), "a_click": int(t * CAPTURE_HZ) % 45 == 0,
+            "timing": {"capture": time.monotonic_ns()},
+        }
+
+    # 采集端复用同一个字典: 环形缓冲中仍是各帧的快照, 只在第 0 帧按下的 a_click 不会丢
+    hub = RatePublisher()
+    reused: Dict[str, Any] = {"timing": {}}
+    for k in range(3):
+        reused.update(a_click=k == 0, left_pos=[float(k), 0.0, 0.0], left_rot=[0.0, 0.0, 0.0, 1.0])
+        reused["timing"]["capture"] = k + 1
+        hub.push(reused)
+    avg = average_frames(hub._since(0, all_frames=True)[0])
+    assert avg["a_click"] and avg["left_pos"] == [1.0, 0.0, 0.0] and avg["timing"] == {"capture": 3}, avg
+    print("复用字典 push: 3 帧平均", avg["left_pos"], "a_click", avg["a_click"])
+
+    configs = [
+        ("控制 500 Hz 最新帧", dict(rate_hz=500, codec="binary")),
+        ("面板 30 Hz 最新帧", dict(rate_hz=30)),
+        ("面板 30 Hz 平均", dict(rate_hz=30, average=True)),
+        ("抽取 1/3 平均", dict(decimate=3, average=True, codec="binary")),
+    ]
+    hub = RatePublisher()
+    subs = []
+    for port, (name, cfg) in enumerate(configs, start=5731):
+        hub.add(f"tcp://127.0.0.1:{port}", **cfg)
+        codec = cfg.get("codec")
+        subs.append(ZMQSubscriber(f"tcp://127.0.0.1:{port}", codec=codec, conflate=False, hwm=10000))
+    time.sleep(0.3)
+
+    # 采集循环: push() 的耗时即端点给采集循环带来的全部开销
+    hub.start()
+    cost = []
+    t0 = time.monotonic()
+    deadline = t0
+    while (t := time.monotonic() - t0) < DURATION:
+        c = time.perf_counter()
+        hub.push(frame(t))
+        cost.append(time.perf_counter() - c)
+        deadline += 1.0 / CAPTURE_HZ
+        time.sleep(max(0.0, deadline - time.monotonic()))
+    time.sleep(0.1)
+    hub.stop()
+
+    print(f"采集 {hub.count} 帧 ({CAPTURE_HZ} Hz), push() 中位数 {np.median(cost) * 1e6:.1f} us, 最大 {max(cost) * 1e6:.1f} us")
+    for (name, _), ep, sub in zip(configs, hub.endpoints, subs):
+        received, clicks = 0, 0
+        while (msg := sub.try_recv(0)) is not None:
+            received += 1
+            clicks += bool(msg.get("a_click"))
+        print(
+            f"{name:>14}: 发送 {ep.published:5d} 帧 ({ep.published / DURATION:5.1f} Hz), 重发 {ep.repeated:4d}, "
+            f"收到 {received:5d}, 含 a_click {clicks:3d} 帧, 线程 CPU {ep.cpu_time / DURATION * 100:4.1f}%"
+        )
+    hub.close()
+    for sub in subs:
+        sub.close()
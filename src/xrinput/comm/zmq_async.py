@@ -0,0 +1,313 @@
+"""
+事件驱动的 ZMQ 接收
+
+ZMQSubscriber.try_recv 需要消费者自己轮询, 一个进程订阅多个地址时只能依次 poll(0) 空转.
+这里提供两种不轮询的方式:
+
+- AsyncZMQSubscriber: 基于 zmq.asyncio, 在 asyncio 事件循环中等待消息
+
+    sub = AsyncZMQSubscriber("tcp://localhost:5555", codec="binary")
+    async for msg in sub:
+        ...
+
+- ZMQReactor: 一个后台线程用同一个 Poller 等待所有订阅, 有消息时调用回调
+
+    reactor = ZMQReactor()
+    reactor.subscribe("tcp://host-a:5555", on_frame_a, codec="binary")
+    reactor.subscribe("tcp://host-b:5555", on_grip, codec="binary", topics=["analog/right"])
+    reactor.start()       # 回调在 reactor 线程中执行, 不要在回调里长时间阻塞
+    ...
+    reactor.stop()
+
+两者收到的消息与 ZMQSubscriber 相同 (同样的 codec / topics / conflate 参数, 同样更新 stats).
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import zmq
+import zmq.asyncio
+
+from ..monitor.log import logger
+from .zmq_sub import ZMQSubscriber
+
+_reactor_ids = itertools.count()
+
+
+class AsyncZMQSubscriber(ZMQSubscriber):
+    """
+    asyncio 订阅端, 参数同 ZMQSubscriber; 默认共用 zmq.asyncio.Context.instance()
+
+    - await sub.recv(): 等待下一条消息
+    - await sub.try_recv(timeout): 超时 (毫秒) 返回 None
+    - await sub.recv_latest(timeout): 收下所有已到达的消息, 返回最新一条 (配合抖动缓冲)
+    - async for msg in sub: 持续接收
+    """
+
+    def __init__(
+        self,
+        address="tcp://localhost:5555",
+        codec=None,
+        topics=None,
+        conflate=None,
+        hwm=64,
+        context=None,
+        jitter_buffer=None,
+        clock_sync=None,
+    ):
+        if context is None:
+            context = zmq.asyncio.Context.instance()
+        super().__init__(
+            address, codec=codec, topics=topics, conflate=conflate, hwm=hwm,
+            context=context, jitter_buffer=jitter_buffer, clock_sync=clock_sync,
+        )
+
+    async def recv(self):
+        sock = self.socket
+        if self.topics is not None:
+            data = self._decode_channel(await sock.recv_multipart(copy=False))
+        elif self.codec is None:
+            data = await sock.recv_json()
+        else:
+            data = self.codec.decode((await sock.recv(copy=False)).buffer)
+        return self._on_recv(data)
+
+    async def try_recv(self, timeout: int = 0):
+        if await self.socket.poll(timeout, zmq.POLLIN):
+            return await self.recv()
+        return None
+
+    async def recv_latest(self, timeout: int = 0, max_msgs: int = 256):
+        """同 ZMQSubscriber.recv_latest, 等待期间让出事件循环"""
+        latest = await self.try_recv(timeout)
+        if latest is None:
+            return None
+        for _ in range(max_msgs - 1):
+            if not self.socket.getsockopt(zmq.EVENTS) & zmq.POLLIN:
+                break
+            latest = await self.recv()
+        return latest
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.recv()
+
+
+class ZMQReactor:
+    """
+    回调式多路接收: 一个线程, 一个 Poller, 任意多个订阅
+
+    参数:
+    - context: 共享的 zmq.Context, 默认新建; 由 subscribe() 创建的订阅端都使用它
+    - max_batch: 每个 socket 每次唤醒最多连续处理的消息数, 避免一个高频订阅饿死其他订阅
+    """
+
+    def __init__(self, context: Optional[zmq.Context] = None, max_batch: int = 64):
+        self.context = context if context is not None else zmq.Context()
+        self.max_batch = max_batch
+        self.poller = zmq.Poller()
+        self._handlers: Dict[zmq.Socket, Tuple[ZMQSubscriber, Callable]] = {}
+
+        # 增删订阅与停止都通过 inproc 唤醒 reactor 线程, Poller 只在 reactor 线程中修改
+        endpoint = f"inproc://xrinput-reactor-{next(_reactor_ids)}"
+        self._wake_rx = self.context.socket(zmq.PAIR)
+        self._wake_rx.bind(endpoint)
+        self._wake_tx = self.context.socket(zmq.PAIR)
+        self._wake_tx.connect(endpoint)
+        self._wake_lock = threading.Lock()
+        self.poller.register(self._wake_rx, zmq.POLLIN)
+
+        self._pending: list = []  # ("add" / "remove", sub, callback)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.dispatched = 0
+        self.errors = 0          # 回调抛出异常的次数
+        self.decode_errors = 0   # 无法解码而丢弃的消息数
+
+    # ------------------ 订阅管理 ------------------
+    def subscribe(self, address: str, callback: Callable, **kwargs) -> ZMQSubscriber:
+        """新建订阅 (参数同 ZMQSubscriber) 并注册回调 callback(msg)"""
+        sub = ZMQSubscriber(address, context=self.context, **kwargs)
+        self.add(sub, callback)
+        return sub
+
+    def add(self, sub: ZMQSubscriber, callback: Callable) -> None:
+        """注册已有的订阅端; reactor 运行后该订阅端只应由 reactor 线程读取"""
+        self._request(("add", sub, callback))
+
+    def remove(self, sub: ZMQSubscriber) -> None:
+        self._request(("remove", sub, None))
+
+    def _request(self, op) -> None:
+        self._pending.append(op)
+        if self._running:
+            with self._wake_lock:
+                self._wake_tx.send(b"", zmq.NOBLOCK)
+        else:
+            self._apply_pending()
+
+    def _apply_pending(self) -> None:
+        while self._pending:
+            op, sub, callback = self._pending.pop(0)
+            if op == "add":
+                self._handlers[sub.socket] = (sub, callback)
+                self.poller.register(sub.socket, zmq.POLLIN)
+            elif sub.socket in self._handlers:
+                del self._handlers[sub.socket]
+                self.poller.unregister(sub.socket)
+
+    # ------------------ 事件循环 ------------------
+    def run_once(self, timeout: Optional[int] = None) -> int:
+        """等待一次并分发所有就绪的消息 (timeout 毫秒, None 表示一直等待), 返回分发条数"""
+        n = 0
+        for sock, _ in self.poller.poll(timeout):
+            if sock is self._wake_rx:
+                while self._wake_rx.poll(0):
+                    self._wake_rx.recv()
+                self._apply_pending()
+                continue
+            handler = self._handlers.get(sock)
+            if handler is None:
+                continue
+            sub, callback = handler
+            for _ in range(self.max_batch):
+                try:
+                    msg = sub._on_recv(sub._recv_one())
+                except zmq.ZMQError:
+                    raise
+                except Exception as e:
+                    # 格式错误 / 长度不足的消息已被取出, 丢弃后继续, 不能让一个坏帧停掉 reactor 线程
+                    self.decode_errors += 1
+                    logger.warning(f"[ZMQ] 消息解码失败, 已丢弃: {e!r}")
+                else:
+                    try:
+                        callback(msg)
+                    except Exception as e:
+                        self.errors += 1
+                        logger.exception(f"[ZMQ] 回调异常: {e}")
+                    n += 1
+                if not sock.getsockopt(zmq.EVENTS) & zmq.POLLIN:
+                    break
+        self.dispatched += n
+        return n
+
+    def _loop(self) -> None:
+        while self._running:
+            self.run_once()
+
+    def start(self) -> "ZMQReactor":
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, name="zmq-reactor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._running = False
+            with self._wake_lock:
+                self._wake_tx.send(b"", zmq.NOBLOCK)
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """停止并关闭所有订阅端"""
+        self.stop()
+        self._apply_pending()
+        for sub, _ in list(self._handlers.values()):
+            sub.close()
+        self._handlers.clear()
+        self._wake_rx.close(linger=0)
+        self._wake_tx.close(linger=0)
+
+    def __enter__(self) -> "ZMQReactor":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    import asyncio
+    import time
+
+    from .zmq_pub import ZMQPublisher
+
+    N = 16
+    RATE_HZ = 200
+    DURATION = 2.0
+    pubs = [ZMQPublisher(f"tcp://127.0.0.1:{5700 + i}", codec="binary") for i in range(N)]
+
+    def publish_for(seconds: float) -> None:
+        """所有发布端同时以 RATE_HZ 发送"""
+        deadline = time.perf_counter()
+        t_end = deadline + seconds
+        while deadline < t_end:
+            for pub in pubs:
+                pub.send({"left_pos": [0.0, 0.0, 0.0], "left_rot": [0.0, 0.0, 0.0, 1.0], "timing": {}})
+            deadline += 1.0 / RATE_HZ
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+
+    def report(name: str, subs, cpu: float) -> None:
+        received = sum(s.stats.received for s in subs)
+        lost = sum(s.stats.lost for s in subs)
+        print(f"{name}: {N} 个订阅共收到 {received} 条, 丢 {lost} 条, 进程 CPU {cpu / DURATION * 100:.0f}%")
+
+    # 1. 轮询: 依次 try_recv(0) 空转
+    subs = [ZMQSubscriber(f"tcp://127.0.0.1:{5700 + i}", codec="binary") for i in range(N)]
+    time.sleep(0.5)
+    running = True
+
+    def spin():
+        while running:
+            for s in subs:
+                s.try_recv(0)
+
+    th = threading.Thread(target=spin)
+    c0 = time.process_time()
+    th.start()
+    publish_for(DURATION)
+    running = False
+    th.join()
+    report("轮询 try_recv(0)", subs, time.process_time() - c0)
+    for s in subs:
+        s.close()
+
+    # 2. reactor: 一个线程一个 Poller
+    reactor = ZMQReactor()
+    subs = [reactor.subscribe(f"tcp://127.0.0.1:{5700 + i}", lambda msg: None, codec="binary") for i in range(N)]
+    time.sleep(0.5)
+    with reactor:
+        c0 = time.process_time()
+        publish_for(DURATION)
+        time.sleep(0.05)
+        report("ZMQReactor", subs, time.process_time() - c0)
+
+    # 3. asyncio: 每个订阅一个协程
+    async def consume(sub):
+        async for _ in sub:
+            pass
+
+    async def main():
+        subs = [AsyncZMQSubscriber(f"tcp://127.0.0.1:{5700 + i}", codec="binary") for i in range(N)]
+        await asyncio.sleep(0.5)
+        tasks = [asyncio.create_task(consume(s)) for s in subs]
+        c0 = time.process_time()
+        await asyncio.to_thread(publish_for, DURATION)
+        await asyncio.sleep(0.05)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        report("AsyncZMQSubscriber", subs, time.process_time() - c0)
+        for s in subs:
+            s.close()
+
+    asyncio.run(main())
+    for pub in pubs:
+        pub.close()
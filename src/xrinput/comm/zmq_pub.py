@@ -1,20 +1,226 @@
 # zmq_pub.py
 # 广播端（PUB）
 
+import threading
+from collections import deque
+
 import zmq
 from rich import print
 
+from ..monitor.latency import mark_timing
+from ..monitor.log import logger
+from ..monitor.metrics import FrameStats
+from .buffer_pool import BufferPool
+from .clock_sync import ClockSyncServer
+from .codec import CHANNELS, JsonCodec, get_codec
+
 class ZMQPublisher:
     """简单的 ZMQ 广播器，不绑定任何数据源"""
 
-    def __init__(self, address: str = "tcp://*:5555"):
+    def __init__(
+        self,
+        address: str = "tcp://*:5555",
+        codec=None,
+        topics=None,
+        threaded: bool = False,
+        queue_size: int = 1,
+        hwm=None,
+        pool=None,
+        clock_sync=None,
+    ):
+        """
+        参数:
+        - address: 绑定地址
+        - codec: None 使用 send_json; "json" / "binary" / "compact" 或自定义编解码器 (见 comm.codec),
+          订阅端需使用相同的 codec
+        - topics: None 时整帧单段发送; True 或频道列表 (见 codec.CHANNELS) 时, dict 数据
+          按频道拆成 [topic, payload] 多段消息发送, 订阅端只接收订阅的频道
+        - threaded: True 时 send() 只把帧放入队列立即返回, 由后台发送线程编码并发送,
+          慢订阅端或编码耗时不会阻塞采集循环. 放入队列后不要再修改该帧
+        - queue_size: 发送队列长度, 1 即单槽 "只发最新帧"; 队列满时最旧的帧被覆盖 (coalesced)
+        - hwm: 发送高水位 (ZMQ SNDHWM, 每个订阅端最多缓存的消息数), None 使用 ZMQ 默认值.
+          PUB 对超出高水位的订阅端静默丢弃消息, send() 不会报错, 发布端无法得知;
+          丢帧请在订阅端按序号统计 (ZMQSubscriber.stats, 即 recv_lost_total 指标)
+        - pool: 缓冲区个数, 仅对支持 encode_into 的定长 codec (如 "binary") 有效: 编码到
+          预分配的缓冲池并以 copy=False + track=True 零拷贝发送, ZMQ 用完后缓冲区回到池中.
+          不设置时这类 codec 编码到单个复用的缓冲区再由 ZMQ 复制, 同样没有逐帧的 bytes 分配;
+          对 164 字节的小帧复制反而更快 (零拷贝需要 pyzmq 额外创建 Frame / tracker),
+          零拷贝适合较大的自定义帧
+        - clock_sync: 时钟同步应答端口地址 (如 "tcp://*:5556"), 订阅端据此估计两端时钟差,
+          见 comm.clock_sync
+        """
         self.address = address
+        self.codec = get_codec(codec)
+        if topics is True:
+            topics = CHANNELS
+        self.topics = tuple(topics) if topics else None
+        # 频道模式下 codec=None 等价于 JSON
+        self._channel_codec = self.codec if self.codec is not None else JsonCodec()
+
         self.context = zmq.Context()
         self.socket = self.context.socket(zmq.PUB)
+        if hwm is not None:
+            self.socket.setsockopt(zmq.SNDHWM, int(hwm))
         self.socket.bind(self.address)
+        self.clock_server = ClockSyncServer(clock_sync, context=self.context) if clock_sync else None
+
+        # 定长 codec: 编码到预分配的缓冲区, 不逐帧创建 bytes
+        self._scratch = None
+        self._pool = None
+        if self.codec is not None and hasattr(self.codec, "encode_into"):
+            if pool:
+                self._pool = BufferPool(self.codec.size, count=int(pool))
+                self.socket.copy_threshold = 0  # 否则 pyzmq 仍会复制小消息
+            else:
+                self._scratch = bytearray(self.codec.size)
+
+        # 发布统计（供 MetricsExporter 读取）
+        self.stats = FrameStats()
+        self.coalesced = 0   # 线程模式下未发出就被新帧覆盖的帧
+        self.errors = 0      # 线程模式下编码 / 发送异常
+        self.seq = 0         # 最近一次发送的序号 (32 位回绕)
+
+        # 线程模式: "队列已满 → 计入 coalesced → append" 与发送线程的 popleft 之间需要加锁,
+        # 否则发送线程恰好在两者之间取走一帧时, 会把并未被覆盖的帧计入 coalesced
+        self.threaded = threaded
+        self._queue = deque(maxlen=max(1, queue_size))
+        self._queue_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        if threaded:
+            self._running = True
+            self._thread = threading.Thread(target=self._sender_loop, name="zmq-publisher", daemon=True)
+            self._thread.start()
+
         print(f"[ZMQ] 广播端启动: {self.address}")
 
     def send(self, data):
-        """发送任意可 JSON 化的数据（dict/list/...）"""
-        self.socket.send_json(data)
+        """
+        发送任意可 JSON 化的数据（dict/list/...）, 设置了 codec 时由 codec 编码
+        dict 数据会写入序号 "seq", 并在 "timing" 中记录 publish 时间戳 (线程模式下为实际发送时刻),
+        订阅端据此统计丢帧与帧龄 (见 ZMQSubscriber.stats)
+        """
+        if not self.threaded:
+            self._send_now(data)
+            return
+        with self._queue_lock:
+            if len(self._queue) == self._queue.maxlen:
+                self.coalesced += 1  # append 会挤掉最旧的帧
+            self._queue.append(data)
+        self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        """线程模式下队列中等待发送的帧数"""
+        return len(self._queue)
+
+    def _send_now(self, data):
+        if isinstance(data, dict):
+            self.seq = (self.seq + 1) & 0xFFFFFFFF
+            data["seq"] = self.seq
+            mark_timing(data, "publish")
+        # PUB 的 NOBLOCK 发送不会因高水位报错 (超出时 ZMQ 静默丢弃), 丢帧只能在订阅端按序号统计
+        if self.topics is not None and isinstance(data, dict):
+            for topic, payload in self._channel_codec.encode_channels(data, self.topics):
+                self.socket.send_multipart((topic, payload), flags=zmq.NOBLOCK)
+        elif self.codec is None:
+            self.socket.send_json(data, flags=zmq.NOBLOCK)
+        elif self._scratch is not None:
+            buf = self._scratch
+            n = self.codec.encode_into(data, buf)
+            self.socket.send(buf if n == len(buf) else memoryview(buf)[:n], flags=zmq.NOBLOCK)
+        elif self._pool is not None:
+            self._send_pooled(data)
+        else:
+            self.socket.send(self.codec.encode(data), flags=zmq.NOBLOCK)
+        self.stats.tick()
         # print(f"[发送] {data}")
+
+    def _send_pooled(self, data):
+        buf = self._pool.acquire()
+        if buf is None:
+            # 缓冲区都还被 ZMQ 持有 (订阅端过慢), 退回普通发送
+            self.socket.send(self.codec.encode(data), flags=zmq.NOBLOCK)
+            return
+        try:
+            n = self.codec.encode_into(data, buf)
+            view = buf if n == len(buf) else memoryview(buf)[:n]
+            tracker = self.socket.send(view, flags=zmq.NOBLOCK, copy=False, track=True)
+        except BaseException:
+            self._pool.release(buf)
+            raise
+        self._pool.release(buf, tracker)
+
+    def _sender_loop(self):
+        """后台发送线程: 被唤醒后把队列中的帧依次发出; socket 只在本线程中使用"""
+        queue, lock = self._queue, self._queue_lock
+        while self._running:
+            self._wake.wait()
+            self._wake.clear()
+            while True:
+                with lock:
+                    if not queue:
+                        break
+                    data = queue.popleft()
+                try:
+                    self._send_now(data)
+                except Exception as e:
+                    self.errors += 1
+                    logger.exception(f"[ZMQ] 发送失败: {e}")
+
+    def close(self, linger: int = 0):
+        """停止发送线程 (先发完队列中剩余的帧) 并关闭 socket"""
+        if self._thread is not None:
+            self._running = False
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+            while self._queue:
+                self._send_now(self._queue.popleft())
+        if self.clock_server is not None:
+            self.clock_server.close()
+        self.socket.close(linger=linger)
+
+
+if __name__ == "__main__":
+    import time
+
+    from .zmq_sub import ZMQSubscriber
+
+    def frame(k):
+        return {"k": k, "pos": [0.1 * k, 0.0, 0.0], "timing": {"capture": time.monotonic_ns()}}
+
+    # 模拟一次编码尖峰: 每 100 帧有一帧编码耗时 20 ms
+    class SlowCodec(JsonCodec):
+        def encode(self, data):
+            if data["k"] % 100 == 0:
+                time.sleep(0.02)
+            return super().encode(data)
+
+    for threaded in (False, True):
+        pub = ZMQPublisher("tcp://127.0.0.1:5621", codec=SlowCodec(), threaded=threaded, hwm=100)
+        sub = ZMQSubscriber("tcp://127.0.0.1:5621", codec="json")
+        time.sleep(0.3)
+
+        worst = 0.0
+        deadline = time.perf_counter()
+        for k in range(1, 501):  # 500 Hz, 1 秒
+            t0 = time.perf_counter()
+            pub.send(frame(k))
+            worst = max(worst, time.perf_counter() - t0)
+            deadline += 0.002
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+        pub.close()
+
+        last = None
+        while (msg := sub.try_recv(timeout=50)) is not None:
+            last = msg
+        sub.socket.close(linger=0)
+        # 每一帧要么发出, 要么被覆盖
+        assert pub.stats.count + pub.coalesced == 500, (pub.stats.count, pub.coalesced)
+        mode = "线程模式" if threaded else "同步模式"
+        print(
+            f"{mode}: send() 最长阻塞 {worst * 1e3:.2f} ms, 发出 {pub.stats.count} 帧, "
+            f"覆盖 {pub.coalesced}, 订阅端丢帧 {sub.stats.lost}, 最后收到 k={last and last['k']}"
+        )
@@ -1,18 +1,83 @@
 # zmq_sub.py
 # 接收端（SUB）
 
+import time
+
 import zmq
 from rich import print
 
+from ..monitor.latency import TIMING_KEY, mark_timing
+from ..monitor.metrics import LinkStats
+from .clock_sync import ClockSyncClient
+from .codec import CHANNELS, BinaryFrame, JsonCodec, get_codec
+from .jitter_buffer import JitterBuffer
+
 class ZMQSubscriber:
     """使用 Poller 的非阻塞 SUB"""
 
-    def __init__(self, address="tcp://localhost:5555"):
-        self.context = zmq.Context()
+    def __init__(
+        self,
+        address="tcp://localhost:5555",
+        codec=None,
+        topics=None,
+        conflate=None,
+        hwm=64,
+        context=None,
+        jitter_buffer=None,
+        clock_sync=None,
+    ):
+        """
+        参数:
+        - address: 连接地址
+        - codec: 与发布端一致; None 使用 recv_json, "binary" / "compact" 时返回 BinaryFrame
+          (数组字段是接收缓冲区上的视图, 不复制)
+        - topics: 发布端按频道发布时使用; True 订阅全部频道, 或前缀列表如
+          ["analog/right"], ["pose/"]. 收到的是该频道的字典子集 (附带 "topic")
+        - conflate: True 时只保留最新 1 帧 (ZMQ CONFLATE), 被覆盖的帧在 stats 中计为丢帧;
+          False 时按顺序接收, 接收队列最多 hwm 条. 频道模式的多段消息不支持 CONFLATE.
+          默认 (None) 在未启用抖动缓冲时开启
+        - context: 共享的 zmq.Context, 同一进程中的多个订阅端可共用 IO 线程; 默认新建
+        - jitter_buffer: True 或 JitterBuffer 实例时, 收到的每一帧都放入抖动缓冲,
+          用 sample(t) 取得按发送端时间戳插值的平滑姿态 (仅整帧模式, 不支持 topics)
+        - clock_sync: 发布端时钟同步端口地址或 ClockSyncClient; 设置后 clock.to_local()
+          可把远端时间戳换算为本地时钟, stats 的帧龄也按估计的时钟差修正
+
+        stats: LinkStats, 按发布端写入的序号 / publish 时间戳统计丢帧率、序号间隔直方图、
+        到达抖动与接收时帧龄; 频道模式下按帧统计 (每帧只计第一个到达的频道)
+        """
+        self.codec = get_codec(codec)
+        if topics is True:
+            topics = CHANNELS
+        self.topics = tuple(topics) if topics else None
+        self._channel_codec = self.codec if self.codec is not None else JsonCodec()
+
+        if jitter_buffer is True:
+            jitter_buffer = JitterBuffer()
+        if jitter_buffer is not None and self.topics is not None:
+            raise ValueError("抖动缓冲需要整帧消息, 不能与 topics 同时使用")
+        self.jitter = jitter_buffer
+        if conflate is None:
+            conflate = jitter_buffer is None  # 抖动缓冲需要每一帧
+
+        self.context = context if context is not None else zmq.Context()
         self.socket = self.context.socket(zmq.SUB)
-        self.socket.setsockopt(zmq.CONFLATE, 1)  # 仅保留最新的1帧消息
+        self.conflate = conflate and self.topics is None
+        if self.conflate:
+            self.socket.setsockopt(zmq.CONFLATE, 1)  # 仅保留最新的1帧消息
+        else:
+            self.socket.setsockopt(zmq.RCVHWM, int(hwm))
         self.socket.connect(address)
-        self.socket.setsockopt_string(zmq.SUBSCRIBE, "")
+        for topic in self.topics or ("",):
+            self.socket.setsockopt_string(zmq.SUBSCRIBE, topic)
+
+        self.stats = LinkStats()
+        # 频道模式: 同一帧的各频道携带相同的序号, 只有每帧第一个到达的频道计入 stats
+        self._frame_seq = None
+        self._topic_seq = {}
+        self._owns_clock = isinstance(clock_sync, str)
+        if self._owns_clock:
+            clock_sync = ClockSyncClient(clock_sync)  # 独立 context: 订阅端可能使用 asyncio context
+        self.clock = clock_sync
 
         self.poller = zmq.Poller()
         self.poller.register(self.socket, zmq.POLLIN)
@@ -23,12 +88,88 @@ class ZMQSubscriber:
         """timeout 毫秒，0 表示完全非阻塞"""
         socks = dict(self.poller.poll(timeout))
         if self.socket in socks and socks[self.socket] == zmq.POLLIN:
-            return self.socket.recv_json()
+            return self._on_recv(self._recv_one())
         return None
 
     def recv(self):
         """阻塞接收一条消息"""
-        return self.socket.recv_json()
+        return self._on_recv(self._recv_one())
+
+    def recv_latest(self, timeout: int = 0, max_msgs: int = 256):
+        """接收所有已到达的消息 (最多 max_msgs 条), 返回最新一条; timeout 毫秒内没有消息时返回 None"""
+        latest = self.try_recv(timeout)
+        if latest is None:
+            return None
+        for _ in range(max_msgs - 1):
+            if not self.socket.getsockopt(zmq.EVENTS) & zmq.POLLIN:
+                break
+            latest = self._on_recv(self._recv_one())
+        return latest
+
+    def sample(self, t=None, out=None):
+        """抖动缓冲输出: 本地时刻 t (秒, time.monotonic) 的 (D, 7) 插值姿态, 见 JitterBuffer.sample"""
+        if self.jitter is None:
+            raise RuntimeError("未启用抖动缓冲 (jitter_buffer)")
+        return self.jitter.sample(t, out)
+
+    def _recv_one(self):
+        if self.topics is not None:
+            return self._decode_channel(self.socket.recv_multipart(copy=False))
+        if self.codec is None:
+            return self.socket.recv_json()
+        # copy=False: 解码结果直接引用 zmq 的消息缓冲区
+        return self.codec.decode(self.socket.recv(copy=False).buffer)
+
+    def close(self, linger: int = 0):
+        if self._owns_clock:
+            self.clock.close()
+        self.socket.close(linger=linger)
+
+    def _decode_channel(self, parts):
+        topic, payload = parts
+        topic = bytes(topic.buffer).decode()
+        data = self._channel_codec.decode_channel(topic, payload.buffer)
+        data["topic"] = topic
+        return data
+
+    def _first_channel(self, data) -> bool:
+        """
+        是否为该帧第一个到达的频道消息; 同一频道重复收到同一序号时仍返回 True,
+        由 stats 计为重复帧
+        """
+        seq = data.get("seq")
+        if seq is None:
+            return True
+        topic = data.get("topic")
+        repeated = self._topic_seq.get(topic) == seq
+        self._topic_seq[topic] = seq
+        if seq == self._frame_seq and not repeated:
+            return False
+        self._frame_seq = seq
+        return True
+
+    def _on_recv(self, data):
+        """
+        带有 timing 的消息记录 recv 时间戳, 可用 latency_breakdown() 计算逐跳延迟;
+        同时更新链路统计
+        """
+        now = time.monotonic_ns()
+        if self.clock is not None:
+            self.stats.clock_offset_ns = self.clock.offset_at(now)
+        if self.jitter is not None and isinstance(data, (dict, BinaryFrame)):
+            self.jitter.push(data, now)
+        if isinstance(data, BinaryFrame):
+            data.timing["recv"] = now
+            self.stats.update(data.seq, data.timing.get("publish"), now)
+        elif isinstance(data, dict):
+            timing = data.get(TIMING_KEY)
+            if timing is not None:
+                mark_timing(data, "recv", now)
+            if self.topics is None or self._first_channel(data):
+                self.stats.update(data.get("seq"), timing.get("publish") if timing else None, now)
+        else:
+            self.stats.update(None, None, now)
+        return data
 
 
 if __name__ == "__main__":
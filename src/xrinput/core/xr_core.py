@@ -68,11 +68,19 @@ class TimeConverter:
         """
         返回当前的 XrTime
         """
+        return self.sample_time()[0]
+
+    def sample_time(self) -> Tuple[xr.Time, int]:
+        """
+        返回当前的 XrTime 及其对应的 monotonic 纳秒 (与 time.monotonic_ns() 同一时钟),
+        用于把 OpenXR 采样时刻接入端到端延迟统计
+        """
 
         xr_time = xr.Time()
 
         if self._mode == "win32":
             self._kernel32.QueryPerformanceCounter(ctypes.byref(self._pc_time))
+            mono_ns = time.monotonic_ns()
             result = self._func(
                 self.instance,
                 ctypes.pointer(self._pc_time),
@@ -92,6 +100,8 @@ class TimeConverter:
             
             self._timespec_time.tv_sec = ts.tv_sec
             self._timespec_time.tv_nsec = ts.tv_nsec
+            # Linux 上 time.monotonic_ns() 即 CLOCK_MONOTONIC, 直接使用换算 XrTime 的同一读数
+            mono_ns = ts.tv_sec * 1_000_000_000 + ts.tv_nsec
             
             result = self._func(
                 self.instance,
@@ -102,7 +112,7 @@ class TimeConverter:
         result = xr.check_result(result)
         if result.is_exception():
             raise result
-        return xr_time
+        return xr_time, mono_ns
 
 
 @dataclass
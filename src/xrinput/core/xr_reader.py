@@ -10,13 +10,19 @@
 from __future__ import annotations
 
 import ctypes
+import time
 from typing import Any, Dict, Optional
 
 import xr
 
+from ..monitor.latency import TIMING_KEY
 from .xr_config import ACTION_CONFIG
 from .xr_core import XRContext
 
+# 位置 / 姿态有效 (VALID) 且正在被追踪 (TRACKED) 的标志位
+_POSE_VALID = int(xr.SpaceLocationFlags.POSITION_VALID_BIT | xr.SpaceLocationFlags.ORIENTATION_VALID_BIT)
+_POSE_TRACKED = int(xr.SpaceLocationFlags.POSITION_TRACKED_BIT | xr.SpaceLocationFlags.ORIENTATION_TRACKED_BIT)
+
 
 class XRInputReader:
     """
@@ -25,10 +31,15 @@ class XRInputReader:
     使用方式:
     - 先调用 sync_actions() 同步状态
     - 然后用 read_all() 或 read_action_state() 获取具体值
+
+    参数:
+    - require_tracked: True (默认) 时姿态必须处于 TRACKED 状态, 否则视为追踪丢失;
+      False 时只要求 VALID (允许运行时外推 / 仅 IMU 的姿态)
     """
 
-    def __init__(self, context: XRContext):
+    def __init__(self, context: XRContext, require_tracked: bool = True):
         self.ctx = context
+        self._required_flags = _POSE_VALID | (_POSE_TRACKED if require_tracked else 0)
         self.data_template = self._create_data_template()
 
     def _create_data_template(self) -> Dict[str, Any]:
@@ -55,6 +66,7 @@ class XRInputReader:
                 
         template["hmd_pos"] = None
         template["hmd_rot"] = None
+        template[TIMING_KEY] = None
         return template
 
     # 同步当前动作状态（必须每帧调用一次）
@@ -125,15 +137,16 @@ class XRInputReader:
         return None
 
     # 读取 pose（左右手）
-    def read_hand_pose(self, side: str) -> Dict[str, Any]:
+    def read_hand_pose(self, side: str, xr_time: Optional[xr.Time] = None) -> Dict[str, Any]:
         """
         读取控制器姿态
 
         参数:
         - side: "left" 或 "right"
+        - xr_time: 可选，采样时刻，默认取当前 XrTime
 
         返回:
-        - 字典:
+        - 字典 (追踪丢失或定位失败时均为 None):
           {
             "pos": (x, y, z) 或 None,
             "rot": (x, y, z, w) 或 None,
@@ -143,50 +156,52 @@ class XRInputReader:
         if space is None:
             return {"pos": None, "rot": None}
 
-        try:
-            state = xr.locate_space(
-                space=space,
-                base_space=self.ctx.reference_space,
-                time=self.ctx.time_converter.get_xr_time(),
-            )
-            pos = state.pose.position
-            rot = state.pose.orientation
-
-            return {
-                "pos": [pos.x, pos.y, pos.z],
-                "rot": [rot.x, rot.y, rot.z, rot.w],
-            }
-        except Exception:
-            return {"pos": None, "rot": None}
+        return self._locate(space, xr_time)
 
-    def read_hmd_pose(self) -> Dict[str, Any]:
+    def read_hmd_pose(self, xr_time: Optional[xr.Time] = None) -> Dict[str, Any]:
         """
         读取头显(HMD)姿态
 
+        参数:
+        - xr_time: 可选，采样时刻，默认取当前 XrTime
+
         返回:
-        - 字典:
+        - 字典 (追踪丢失或定位失败时均为 None):
           {
             "pos": (x, y, z) 或 None,
             "rot": (x, y, z, w) 或 None,
           }
         """
+        return self._locate(self.ctx.view_space, xr_time)
+
+    def _locate(self, space, xr_time: Optional[xr.Time]) -> Dict[str, Any]:
+        """
+        定位 space, 追踪丢失时返回 None
+
+        设备开着但未被追踪时 locate_space 不会报错, 而是返回上一次的 (过期) 姿态,
+        只在 location_flags 中清除 VALID / TRACKED 位, 因此必须检查标志位.
+        """
         try:
+            if xr_time is None:
+                xr_time = self.ctx.time_converter.get_xr_time()
             state = xr.locate_space(
-                space=self.ctx.view_space,
+                space=space,
                 base_space=self.ctx.reference_space,
-                time=self.ctx.time_converter.get_xr_time(),
+                time=xr_time,
             )
-            
-            pos = state.pose.position
-            rot = state.pose.orientation
-            
-            return {
-                "pos": [pos.x, pos.y, pos.z],
-                "rot": [rot.x, rot.y, rot.z, rot.w],
-            }
         except Exception:
             return {"pos": None, "rot": None}
 
+        if int(state.location_flags) & self._required_flags != self._required_flags:
+            return {"pos": None, "rot": None}
+
+        pos = state.pose.position
+        rot = state.pose.orientation
+        return {
+            "pos": [pos.x, pos.y, pos.z],
+            "rot": [rot.x, rot.y, rot.z, rot.w],
+        }
+
 
     # 一次性读取所有动作
     def read_all(self) -> Dict[str, Any]:
@@ -195,15 +210,23 @@ class XRInputReader:
 
         返回:
         - dict, key 为动作名 / 动作名_左右等
+          另含 "timing": {"xr_time": 采样 XrTime, "sample": 该 XrTime 对应的 monotonic 纳秒,
+                          "capture": 采集完成的 monotonic 纳秒}
         """
         # 使用预创建的模板副本，避免每次都重新创建
         data: Dict[str, Any] = self.data_template.copy()
 
+        # 本帧所有姿态使用同一采样时刻
+        try:
+            xr_time, sample_ns = self.ctx.time_converter.sample_time()
+        except Exception:
+            xr_time, sample_ns = None, None
+
         for name, cfg in ACTION_CONFIG.items():
             # 特殊处理 pose
             if cfg["type"] == xr.ActionType.POSE_INPUT and name == "hand_pose":
                 for side in ("left", "right"):
-                    pose = self.read_hand_pose(side)
+                    pose = self.read_hand_pose(side, xr_time)
                     data[f"{side}_pos"] = pose["pos"]
                     data[f"{side}_rot"] = pose["rot"]
                 continue
@@ -221,8 +244,14 @@ class XRInputReader:
                 data[name] = self.read_action_state(name)
 
         # 添加HMD pose数据
-        hmd_pose = self.read_hmd_pose()
+        hmd_pose = self.read_hmd_pose(xr_time)
         data["hmd_pos"] = hmd_pose["pos"]
         data["hmd_rot"] = hmd_pose["rot"]
 
+        data[TIMING_KEY] = {
+            "xr_time": xr_time.value if xr_time is not None else None,
+            "sample": sample_ns,
+            "capture": time.monotonic_ns(),
+        }
+
         return data
@@ -29,6 +29,7 @@ from typing import Any, Dict
 
 import xr
 
+from ..monitor.metrics import FrameStats
 from .xr_core import create_context, XRContext
 from .xr_reader import XRInputReader
 
@@ -50,6 +51,10 @@ class XRRuntime:
         # 会话状态
         self.session_state = xr.SessionState.UNKNOWN
 
+        # 运行指标（供 MetricsExporter 等在其他线程读取）
+        self.frame_stats = FrameStats()
+        self.tracking_lost: Dict[str, int] = {"left": 0, "right": 0, "hmd": 0}
+
         print("\n🎮 Quest 3 无头模式按键读取准备就绪")
         print("按键映射:")
         print("  左手: X/Y 按键, 左摇杆, 左扳机, 左握把, 菜单键")
@@ -102,8 +107,10 @@ class XRRuntime:
         - dict, 可直接用于 ControlPanel.update()
         """
         self._poll_events()
+        self.frame_stats.tick()
 
-        result_data: Dict[str, Any] = self.reader.data_template  # 从数据模板创建
+        # 每帧新建字典: 返回值可能被其他线程持有 (如 RatePublisher 的环形缓冲), 不能复用模板本身
+        result_data: Dict[str, Any] = self.reader.data_template.copy()
 
         if self.session_state == xr.SessionState.FOCUSED:
             # 同步动作
@@ -113,6 +120,7 @@ class XRRuntime:
             try:
                 all_inputs = self.reader.read_all()
                 result_data.update(all_inputs)
+                self._count_tracking_lost(all_inputs)
             except Exception as e:
                 result_data["错误"] = f"读取输入异常: {e}"
 
@@ -122,6 +130,14 @@ class XRRuntime:
 
         return result_data
 
+    def _count_tracking_lost(self, data: Dict[str, Any]) -> None:
+        """
+        统计各设备追踪丢失的帧数（reader 在定位失败或 location_flags 无效 / 未追踪时返回 None）
+        """
+        for dev in self.tracking_lost:
+            if data.get(f"{dev}_pos") is None:
+                self.tracking_lost[dev] += 1
+
     # 资源清理
     def close(self) -> None:
         """
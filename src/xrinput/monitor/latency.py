@@ -0,0 +1,131 @@
+"""
+端到端延迟追踪模块
+
+每帧数据携带一个 "timing" 字典:
+
+    {
+        "xr_time": OpenXR 采样时刻 (XrTime, 纳秒),
+        "sample":  xr_time 对应的 monotonic 时刻 (姿态的采样时刻),
+        "capture": 采集完成时刻,
+        "process": 处理完成时刻 (由应用调用 mark_timing 标记),
+        "publish": ZMQPublisher.send 发送时刻,
+        "recv":    ZMQSubscriber 接收时刻,
+    }
+
+除 xr_time 外均为 time.monotonic_ns(), 同一主机上的进程之间可直接比较.
+sample → recv / now 即动作到接收端的延迟 (motion-to-robot 预算的起点)
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+TIMING_KEY = "timing"
+
+# 各阶段按先后顺序排列, latency_breakdown 按此顺序计算相邻两段的耗时
+STAGES = ("sample", "capture", "process", "publish", "recv")
+
+
+def mark_timing(frame: Dict[str, Any], stage: str, t_ns: Optional[int] = None) -> Dict[str, Any]:
+    """
+    在帧数据上记录某个阶段的时间戳 (原地修改并返回 frame)
+
+    参数:
+    - stage: "sample" / "capture" / "process" / "publish" / "recv" 或自定义阶段名
+    - t_ns: 默认使用 time.monotonic_ns()
+    """
+    timing = frame.get(TIMING_KEY)
+    if timing is None:
+        timing = frame[TIMING_KEY] = {}
+    timing[stage] = time.monotonic_ns() if t_ns is None else t_ns
+    return frame
+
+
+def latency_breakdown(frame: Dict[str, Any], now_ns: Optional[int] = None) -> Dict[str, float]:
+    """
+    计算逐跳延迟 (毫秒)
+
+    返回:
+    - dict, 如 {"sample_to_capture": 0.2, "capture_to_process": 0.3, "process_to_publish": 0.1,
+                "publish_to_recv": 0.4, "recv_to_now": 0.05, "total": 1.05}
+      缺失的阶段会被跳过, 相邻的已有阶段直接相连
+    """
+    timing = frame.get(TIMING_KEY) or {}
+    if now_ns is None:
+        now_ns = time.monotonic_ns()
+
+    hops: Dict[str, float] = {}
+    prev_stage, prev_t = None, None
+    for stage in STAGES:
+        t = timing.get(stage)
+        if t is None:
+            continue
+        if prev_stage is not None:
+            hops[f"{prev_stage}_to_{stage}"] = (t - prev_t) * 1e-6
+        prev_stage, prev_t = stage, t
+
+    if prev_stage is not None:
+        hops[f"{prev_stage}_to_now"] = (now_ns - prev_t) * 1e-6
+        first = next(timing[s] for s in STAGES if timing.get(s) is not None)
+        hops["total"] = (now_ns - first) * 1e-6
+
+    return hops
+
+
+class LatencyStats:
+    """
+    逐跳延迟统计 (订阅端使用)
+
+    - add(frame): 每收到一帧调用一次
+    - summary(): 各跳延迟的分位数 (毫秒)
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._hops: Dict[str, np.ndarray] = {}
+        self._counts: Dict[str, int] = {}
+
+    def add(self, frame: Dict[str, Any], now_ns: Optional[int] = None) -> Dict[str, float]:
+        hops = latency_breakdown(frame, now_ns)
+        for name, ms in hops.items():
+            buf = self._hops.get(name)
+            if buf is None:
+                buf = self._hops[name] = np.zeros(self.window, dtype=float)
+                self._counts[name] = 0
+            buf[self._counts[name] % self.window] = ms
+            self._counts[name] += 1
+        return hops
+
+    def summary(self, qs=(50, 90, 99)) -> Dict[str, Dict[float, float]]:
+        result: Dict[str, Dict[float, float]] = {}
+        for name, buf in self._hops.items():
+            n = min(self._counts[name], self.window)
+            values = np.percentile(buf[:n], qs)
+            result[name] = {q: float(v) for q, v in zip(qs, values)}
+        return result
+
+    def reset(self) -> None:
+        self._hops.clear()
+        self._counts.clear()
+
+
+if __name__ == "__main__":
+    stats = LatencyStats()
+
+    for _ in range(100):
+        frame: Dict[str, Any] = {"left_pos": [0.0, 0.0, 0.0]}
+        mark_timing(frame, "sample")
+        time.sleep(0.0002)
+        mark_timing(frame, "capture")
+        time.sleep(0.001)
+        mark_timing(frame, "process")
+        mark_timing(frame, "publish")
+        time.sleep(0.0005)
+        mark_timing(frame, "recv")
+        stats.add(frame)
+
+    for hop, q in stats.summary().items():
+        print(f"{hop:>22}: " + ", ".join(f"p{k}={v:.3f}ms" for k, v in q.items()))
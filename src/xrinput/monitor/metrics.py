@@ -0,0 +1,347 @@
+"""
+运行时指标模块
+
+负责:
+- FrameStats: 帧间隔环形缓冲, 计算帧率 / 帧时间分位数
+- LinkStats: 订阅端链路统计 (丢帧率, 序号间隔直方图, 到达抖动, 接收时帧龄)
+- MetricsExporter: 在 localhost 上以 Prometheus 文本格式暴露指标 (后台线程)
+
+采集线程只做计数器自增 + 环形缓冲写入一个元素,
+导出线程读取时复制快照, 全程不加锁, 不会阻塞采集线程
+
+    from xrinput import XRRuntime, ZMQPublisher, MetricsExporter
+
+    rt = XRRuntime()
+    pub = ZMQPublisher()
+    exporter = MetricsExporter(runtime=rt, publisher=pub, port=9464)
+    exporter.start()   # curl http://127.0.0.1:9464/metrics
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class FrameStats:
+    """
+    帧间隔统计 (单写多读)
+
+    - tick(): 每帧调用一次, 记录与上一帧的间隔
+    - rate() / percentiles(): 供其他线程读取
+    """
+
+    def __init__(self, window: int = 256):
+        self.window = window
+        self._intervals = np.zeros(window, dtype=float)  # 预分配环形缓冲, 单位秒
+        self._n_intervals = 0
+        self._last_ns: Optional[int] = None
+        self.count = 0
+
+    def tick(self, now_ns: Optional[int] = None) -> None:
+        """记录一帧, now_ns 默认使用 time.perf_counter_ns()"""
+        if now_ns is None:
+            now_ns = time.perf_counter_ns()
+
+        if self._last_ns is not None:
+            self._intervals[self._n_intervals % self.window] = (now_ns - self._last_ns) * 1e-9
+            self._n_intervals += 1
+
+        self._last_ns = now_ns
+        self.count += 1
+
+    def snapshot(self) -> np.ndarray:
+        """复制当前窗口内的帧间隔 (秒)"""
+        n = min(self._n_intervals, self.window)
+        return self._intervals[:n].copy()
+
+    def rate(self) -> float:
+        """窗口内平均帧率 (Hz), 无数据时返回 0"""
+        intervals = self.snapshot()
+        if intervals.size == 0:
+            return 0.0
+        mean = float(intervals.mean())
+        return 1.0 / mean if mean > 0 else 0.0
+
+    def percentiles(self, qs=(50, 90, 99)) -> Dict[float, float]:
+        """窗口内帧间隔分位数 (秒), key 为百分位"""
+        intervals = self.snapshot()
+        if intervals.size == 0:
+            return {q: 0.0 for q in qs}
+        values = np.percentile(intervals, qs)
+        return {q: float(v) for q, v in zip(qs, values)}
+
+    def reset(self) -> None:
+        self._n_intervals = 0
+        self._last_ns = None
+        self.count = 0
+
+
+class LinkStats:
+    """
+    订阅端链路统计 (单写多读, 由 ZMQSubscriber 在每次接收时调用 update)
+
+    - 丢帧: 相邻两次收到的序号间隔 gap > 1 记为丢失 gap - 1 帧; 订阅端开启 CONFLATE 时,
+      消费者来不及处理而被覆盖的帧也计入, 丢帧率升高即说明消费者过载
+    - gap_hist: 序号间隔直方图, gap_hist[k] 为间隔 k 的次数, 最后一格为 >= 最大值
+    - jitter: RFC 3550 到达抖动 (毫秒), 比较相邻两帧的到达间隔与发送间隔, 不受两端时钟偏差影响
+    - age: 接收时帧龄 recv - publish (毫秒); 跨主机时需设置 clock_offset_ns (远端 - 本地)
+    """
+
+    SEQ_MOD = 1 << 32
+    RESTART_GAP = 1 << 20  # 序号跳变超过该值视为发布端重启, 不计入丢帧
+
+    def __init__(self, window: int = 256, max_gap: int = 16):
+        self.arrivals = FrameStats(window)
+        self.window = window
+        self._ages = np.zeros(window, dtype=float)  # 预分配环形缓冲, 单位毫秒
+        self._n_ages = 0
+        self.gap_hist = np.zeros(max_gap + 1, dtype=np.int64)
+        self.clock_offset_ns = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.arrivals.reset()
+        self._n_ages = 0
+        self.gap_hist[:] = 0
+        self.received = 0
+        self.lost = 0
+        self.duplicates = 0   # 同一序号重复到达 (频道模式下同一帧的多个频道)
+        self.reordered = 0    # 序号回退 (乱序或迟到)
+        self.restarts = 0
+        self.jitter_ms = 0.0
+        self._in_order = 0
+        self._last_seq: Optional[int] = None
+        self._last_pub: Optional[int] = None
+        self._last_recv: Optional[int] = None
+
+    def update(self, seq: Optional[int], publish_ns: Optional[int], recv_ns: int) -> None:
+        """记录一条消息; seq / publish_ns 缺失的消息只统计到达间隔"""
+        self.received += 1
+
+        if seq is not None:
+            last = self._last_seq
+            if last is not None:
+                gap = (seq - last) % self.SEQ_MOD
+                if gap == 0:
+                    self.duplicates += 1
+                    return
+                if gap >= self.SEQ_MOD // 2:
+                    self.reordered += 1
+                    return
+                if gap > self.RESTART_GAP:
+                    self.restarts += 1
+                else:
+                    self.lost += gap - 1
+                    self.gap_hist[min(gap, self.gap_hist.size - 1)] += 1
+            self._last_seq = seq
+            self._in_order += 1
+
+        self.arrivals.tick(recv_ns)
+        if publish_ns:
+            self._ages[self._n_ages % self.window] = (recv_ns - publish_ns + self.clock_offset_ns) * 1e-6
+            self._n_ages += 1
+            if self._last_pub is not None:
+                d = abs((recv_ns - self._last_recv) - (publish_ns - self._last_pub)) * 1e-6
+                self.jitter_ms += (d - self.jitter_ms) / 16.0
+            self._last_pub = publish_ns
+            self._last_recv = recv_ns
+
+    def loss_rate(self) -> float:
+        """丢帧率 lost / (lost + 按序到达的帧)"""
+        total = self.lost + self._in_order
+        return self.lost / total if total > 0 else 0.0
+
+    def age_percentiles(self, qs=(50, 90, 99)) -> Dict[float, float]:
+        """窗口内接收帧龄分位数 (毫秒)"""
+        n = min(self._n_ages, self.window)
+        if n == 0:
+            return {q: 0.0 for q in qs}
+        values = np.percentile(self._ages[:n], qs)
+        return {q: float(v) for q, v in zip(qs, values)}
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "received": self.received,
+            "lost": self.lost,
+            "loss_rate": self.loss_rate(),
+            "duplicates": self.duplicates,
+            "reordered": self.reordered,
+            "restarts": self.restarts,
+            "rate_hz": self.arrivals.rate(),
+            "jitter_ms": self.jitter_ms,
+            "interval_ms": {q: v * 1e3 for q, v in self.arrivals.percentiles().items()},
+            "age_ms": self.age_percentiles(),
+            "gap_hist": self.gap_hist.tolist(),
+        }
+
+
+class MetricsExporter:
+    """
+    本地 Prometheus 文本格式指标导出器
+
+    参数:
+    - runtime: XRRuntime (可选), 导出采集帧率 / 帧时间 / 会话状态 / 追踪丢失计数
+    - publisher: ZMQPublisher (可选), 导出发布帧率 / 丢帧计数
+    - subscriber: ZMQSubscriber (可选), 导出链路统计 (丢帧率 / 抖动 / 帧龄)
+    - host / port: 监听地址, 默认仅本机可访问
+    """
+
+    QUANTILES = (50, 90, 99)
+
+    def __init__(
+        self,
+        runtime=None,
+        publisher=None,
+        subscriber=None,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+        prefix: str = "xrinput",
+    ):
+        self.runtime = runtime
+        self.publisher = publisher
+        self.subscriber = subscriber
+        self.host = host
+        self.port = port
+        self.prefix = prefix
+
+        # 额外自定义指标: name -> (读取函数, 类型, 说明)
+        self._extra: Dict[str, Tuple[Callable[[], float], str, str]] = {}
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------ 自定义指标 ------------------
+    def register(self, name: str, fn: Callable[[], float], kind: str = "gauge", help: str = "") -> None:
+        """注册一个自定义指标, fn 在导出线程中调用, 需保证无阻塞"""
+        self._extra[name] = (fn, kind, help)
+
+    # ------------------ 渲染 ------------------
+    def _metric(self, lines: list, name: str, kind: str, help: str, samples) -> None:
+        full = f"{self.prefix}_{name}"
+        lines.append(f"# HELP {full} {help}")
+        lines.append(f"# TYPE {full} {kind}")
+        for labels, value in samples:
+            if labels:
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{full}{{{label_str}}} {value}")
+            else:
+                lines.append(f"{full} {value}")
+
+    def _render_frame_stats(self, lines: list, name: str, what: str, stats: FrameStats) -> None:
+        self._metric(lines, f"{name}_total", "counter", f"{what}帧总数", [({}, stats.count)])
+        self._metric(lines, f"{name}_rate_hz", "gauge", f"{what}帧率", [({}, stats.rate())])
+        quantiles = stats.percentiles(self.QUANTILES)
+        self._metric(
+            lines,
+            f"{name}_interval_seconds",
+            "summary",
+            f"{what}帧间隔分位数",
+            [({"quantile": q / 100}, v) for q, v in quantiles.items()],
+        )
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式的全部指标"""
+        lines: list = []
+
+        rt = self.runtime
+        if rt is not None:
+            self._render_frame_stats(lines, "capture_frames", "采集", rt.frame_stats)
+            state = rt.session_state
+            self._metric(
+                lines, "session_state", "gauge", "OpenXR 会话状态",
+                [({"state": state.name}, int(state.value))],
+            )
+            self._metric(
+                lines, "tracking_lost_total", "counter", "追踪丢失帧数",
+                [({"device": dev}, n) for dev, n in rt.tracking_lost.items()],
+            )
+
+        pub = self.publisher
+        if pub is not None:
+            self._render_frame_stats(lines, "publish_frames", "发布", pub.stats)
+            if getattr(pub, "threaded", False):
+                self._metric(lines, "publish_coalesced_total", "counter", "发送队列覆盖帧数", [({}, pub.coalesced)])
+                self._metric(lines, "publish_pending", "gauge", "发送队列长度", [({}, pub.pending)])
+
+        sub = self.subscriber
+        if sub is not None:
+            link = sub.stats
+            self._render_frame_stats(lines, "recv_frames", "接收", link.arrivals)
+            self._metric(lines, "recv_lost_total", "counter", "按序号统计的接收丢帧数", [({}, link.lost)])
+            self._metric(lines, "recv_loss_ratio", "gauge", "接收丢帧率", [({}, link.loss_rate())])
+            self._metric(lines, "recv_jitter_ms", "gauge", "到达抖动 (RFC 3550)", [({}, link.jitter_ms)])
+            self._metric(
+                lines, "recv_age_ms", "summary", "接收时帧龄",
+                [({"quantile": q / 100}, v) for q, v in link.age_percentiles(self.QUANTILES).items()],
+            )
+
+        for name, (fn, kind, help) in self._extra.items():
+            try:
+                value = fn()
+            except Exception:
+                continue
+            self._metric(lines, name, kind, help, [({}, value)])
+
+        return "\n".join(lines) + "\n"
+
+    # ------------------ 后台服务 ------------------
+    def start(self) -> "MetricsExporter":
+        """在后台线程启动 HTTP 服务, GET /metrics 获取指标"""
+        if self._server is not None:
+            return self
+
+        exporter = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 不打印访问日志
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self.port = self._server.server_address[1]  # port=0 时取实际端口
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"[Metrics] 指标服务启动: http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+
+
+if __name__ == "__main__":
+    import random
+    import urllib.request
+
+    stats = FrameStats()
+    exporter = MetricsExporter(port=0)
+    exporter.register("demo_value", lambda: random.random(), help="随机数")
+    exporter.register("demo_rate_hz", stats.rate, help="模拟帧率")
+    exporter.start()
+
+    for _ in range(100):
+        stats.tick()
+        time.sleep(0.005)
+
+    url = f"http://{exporter.host}:{exporter.port}/metrics"
+    print(urllib.request.urlopen(url).read().decode("utf-8"))
+    exporter.stop()
@@ -0,0 +1,367 @@
+"""
+共享内存帧缓冲 + 独立进程监视器
+
+Visualizer (VTK 渲染) 与 CommandLinePanel 放在采集循环里时, 渲染慢会直接拖慢采集
+(90 Hz → 30 Hz). 这里把它们放到独立进程, 采集进程只把最新一帧写入共享内存:
+
+- ShmFrameWriter: 采集进程写入姿态 (N, 7) 与面板字典, 从不等待读取方
+- ShmFrameReader: 监视进程按自己的刷新率读取最新一帧
+- RemoteMonitor:  启动可视化 / 面板进程, 提供与原对象同名的 update() 代理
+
+    monitor = RemoteMonitor(title="XR 控制器状态")
+    panel, visualizer = monitor.panel, monitor.visualizer   # 接口与 CommandLinePanel / Visualizer 相同
+    ...
+    panel.update(panel_dict)        # 只写共享内存, 约几十微秒
+    visualizer.update(all_poses)
+
+同步使用 seqlock: 写入前后各把序号加一 (写入期间为奇数), 读取方在序号为偶数且
+读取前后一致时才接受数据, 否则重试. 写入方无锁, 不会被慢的读取方阻塞.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# 头部 (uint64): [seq, 姿态数, 面板文本长度, 面板序号]
+_HDR_WORDS = 4
+_HDR_BYTES = _HDR_WORDS * 8
+
+
+def _layout(max_poses: int) -> Tuple[int, int]:
+    """返回 (浮点区字节数, 面板文本区起始偏移); 浮点区为 [t, poses...]"""
+    float_bytes = (1 + max_poses * 7) * 8
+    return float_bytes, _HDR_BYTES + float_bytes
+
+
+def _json_default(obj):
+    """面板数据中的 numpy 数组 / 枚举等转为可 JSON 化的值"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "name"):
+        return obj.name
+    return str(obj)
+
+
+class _ShmFrame:
+    def __init__(self, shm: shared_memory.SharedMemory, max_poses: int, text_bytes: int):
+        self.shm = shm
+        self.name = shm.name
+        self.max_poses = max_poses
+        self.text_bytes = text_bytes
+
+        float_bytes, text_off = _layout(max_poses)
+        self._hdr = np.ndarray((_HDR_WORDS,), dtype=np.uint64, buffer=shm.buf, offset=0)
+        floats = np.ndarray((1 + max_poses * 7,), dtype=np.float64, buffer=shm.buf, offset=_HDR_BYTES)
+        self._t = floats[:1]
+        self._poses = floats[1:].reshape(max_poses, 7)
+        self._text = np.ndarray((text_bytes,), dtype=np.uint8, buffer=shm.buf, offset=text_off)
+
+    def close(self) -> None:
+        # 先释放指向共享内存的 numpy 视图, 否则 close() 会报 BufferError
+        self._hdr = self._t = self._poses = self._text = None  # type: ignore
+        self.shm.close()
+
+
+class ShmFrameWriter(_ShmFrame):
+    """
+    共享内存帧写入方 (创建并拥有共享内存)
+
+    参数:
+    - name: 共享内存名, 默认按进程号生成
+    - max_poses: 最多姿态数
+    - text_bytes: 面板数据 (JSON) 区大小
+    - panel_interval: 面板数据最短写入间隔 (s), JSON 编码只按面板刷新率进行
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        max_poses: int = 8,
+        text_bytes: int = 64 * 1024,
+        panel_interval: float = 1 / 30,
+    ):
+        if name is None:
+            name = f"xrinput_{os.getpid()}_{id(self) & 0xFFFF:04x}"
+        _, text_off = _layout(max_poses)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=text_off + text_bytes)
+        super().__init__(shm, max_poses, text_bytes)
+        self._hdr[:] = 0
+        self.panel_interval = panel_interval
+        self._last_panel = -1e9
+        self.dropped_panels = 0  # 超出 text_bytes 而未写入的面板数据
+
+    def write(self, poses=None, panel: Optional[Dict[str, Any]] = None, t: Optional[float] = None) -> None:
+        """
+        写入最新一帧, poses 与 panel 均可省略 (保留上一次的值)
+
+        参数:
+        - poses: (N, 7) 姿态, N ≤ max_poses
+        - panel: 面板字典, 距上次写入不足 panel_interval 时跳过
+        """
+        now = time.perf_counter() if t is None else t
+
+        text = None
+        if panel is not None and now - self._last_panel >= self.panel_interval:
+            self._last_panel = now
+            text = json.dumps(panel, default=_json_default, ensure_ascii=False).encode("utf-8")
+            if len(text) > self.text_bytes:
+                self.dropped_panels += 1
+                text = None
+
+        if poses is not None:
+            poses = np.asarray(poses, dtype=np.float64).reshape(-1, 7)
+            n = min(poses.shape[0], self.max_poses)
+
+        hdr = self._hdr
+        hdr[0] += 1  # 奇数: 写入中
+        self._t[0] = now
+        if poses is not None:
+            self._poses[:n] = poses[:n]
+            hdr[1] = n
+        if text is not None:
+            self._text[: len(text)] = np.frombuffer(text, dtype=np.uint8)
+            hdr[2] = len(text)
+            hdr[3] += 1
+        hdr[0] += 1  # 偶数: 写入完成
+
+    def close(self, unlink: bool = True) -> None:
+        shm = self.shm
+        super().close()
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ShmFrameReader(_ShmFrame):
+    """共享内存帧读取方 (附加到已存在的共享内存)"""
+
+    def __init__(self, name: str, max_poses: int = 8, text_bytes: int = 64 * 1024):
+        try:
+            # Python 3.13+: 读取方不登记到 resource_tracker, 避免退出时误删写入方的共享内存
+            shm = shared_memory.SharedMemory(name=name, create=False, track=False)  # type: ignore[call-arg]
+        except TypeError:
+            # 更早的版本: 由 RemoteMonitor 启动的子进程与父进程共用同一个 resource_tracker, 不受影响
+            shm = shared_memory.SharedMemory(name=name, create=False)
+        super().__init__(shm, max_poses, text_bytes)
+        self._last_seq = 0
+        self._last_panel_seq = 0
+
+    @property
+    def seq(self) -> int:
+        return int(self._hdr[0])
+
+    def read_poses(self, only_new: bool = True, retries: int = 100) -> Optional[np.ndarray]:
+        """读取最新姿态 (副本); only_new 时没有新帧返回 None"""
+        hdr = self._hdr
+        for _ in range(retries):
+            s1 = int(hdr[0])
+            if s1 & 1:
+                continue  # 写入中
+            if only_new and s1 == self._last_seq:
+                return None
+            poses = self._poses[: int(hdr[1])].copy()
+            if int(hdr[0]) == s1:
+                self._last_seq = s1
+                return poses
+        return None
+
+    def read_panel(self, retries: int = 100) -> Optional[Dict[str, Any]]:
+        """读取面板字典, 面板数据未更新时返回 None"""
+        hdr = self._hdr
+        for _ in range(retries):
+            s1 = int(hdr[0])
+            if s1 & 1:
+                continue
+            panel_seq = int(hdr[3])
+            if panel_seq == self._last_panel_seq:
+                return None
+            raw = self._text[: int(hdr[2])].tobytes()
+            if int(hdr[0]) == s1:
+                self._last_panel_seq = panel_seq
+                return json.loads(raw.decode("utf-8"))
+        return None
+
+
+# ------------------ 监视进程 ------------------
+def _visualizer_main(name: str, max_poses: int, text_bytes: int, refresh_hz: float, range_meters: float) -> None:
+    from .visualizer import Visualizer
+
+    reader = ShmFrameReader(name, max_poses, text_bytes)
+    viz = Visualizer(range_meters=range_meters)
+    period = 1.0 / refresh_hz
+    try:
+        while True:
+            t0 = time.perf_counter()
+            poses = reader.read_poses()
+            if poses is not None and len(poses):
+                viz.update(poses.tolist())
+            else:
+                viz.plotter.update()  # 保持窗口响应
+            time.sleep(max(0.0, period - (time.perf_counter() - t0)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+def _panel_main(name: str, max_poses: int, text_bytes: int, refresh_hz: float, title: str) -> None:
+    from .panel import CommandLinePanel
+
+    reader = ShmFrameReader(name, max_poses, text_bytes)
+    panel = CommandLinePanel(refresh_hz=refresh_hz, title=title)
+    period = 1.0 / refresh_hz
+    try:
+        while True:
+            data = reader.read_panel()
+            if data is not None:
+                panel.update(data)
+            time.sleep(period)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+class _PanelProxy:
+    """与 CommandLinePanel.update 同名的代理, 只写共享内存"""
+
+    def __init__(self, writer: ShmFrameWriter):
+        self._writer = writer
+        self.data: Dict[str, Any] = {}
+
+    def update(self, data: Dict[str, Any]) -> None:
+        self.data.update(data)
+        self._writer.write(panel=self.data)
+
+
+class _VisualizerProxy:
+    """与 Visualizer.update 同名的代理, 只写共享内存"""
+
+    def __init__(self, writer: ShmFrameWriter):
+        self._writer = writer
+
+    def update(self, poses) -> None:
+        self._writer.write(poses=poses)
+
+
+class RemoteMonitor:
+    """
+    在独立进程中运行 Visualizer 与 CommandLinePanel
+
+    参数:
+    - visualizer / panel: 是否启动对应进程
+    - viz_hz / panel_hz: 各自的刷新率
+    - max_poses: 可视化的最多姿态数
+    - title: 面板标题
+    - range_meters: 可视化范围
+
+    子进程在所有平台上都以 spawn 方式启动: 调用方通常已经打开了 OpenXR 实例 / 会话,
+    fork 会把这些句柄 (以及 GL 上下文) 复制进渲染进程. 因此调用方脚本需要放在
+    if __name__ == "__main__": 下
+    """
+
+    def __init__(
+        self,
+        visualizer: bool = True,
+        panel: bool = True,
+        viz_hz: float = 30.0,
+        panel_hz: float = 8.0,
+        max_poses: int = 8,
+        title: str = "中控面板",
+        range_meters: float = 2.0,
+        text_bytes: int = 64 * 1024,
+    ):
+        self.writer = ShmFrameWriter(max_poses=max_poses, text_bytes=text_bytes, panel_interval=1.0 / panel_hz)
+        self.visualizer = _VisualizerProxy(self.writer)
+        self.panel = _PanelProxy(self.writer)
+
+        args = (self.writer.name, max_poses, text_bytes)
+        ctx = mp.get_context("spawn")
+        self._procs = []
+        if visualizer:
+            self._procs.append(ctx.Process(
+                target=_visualizer_main, args=args + (viz_hz, range_meters), daemon=True, name="xrinput-visualizer",
+            ))
+        if panel:
+            self._procs.append(ctx.Process(
+                target=_panel_main, args=args + (panel_hz, title), daemon=True, name="xrinput-panel",
+            ))
+        for p in self._procs:
+            p.start()
+
+    def update(self, poses=None, panel: Optional[Dict[str, Any]] = None) -> None:
+        """同时写入姿态与面板数据"""
+        if panel is not None:
+            self.panel.data.update(panel)
+            panel = self.panel.data
+        self.writer.write(poses=poses, panel=panel)
+
+    def close(self) -> None:
+        for p in self._procs:
+            if p.is_alive():
+                p.terminate()
+            p.join(timeout=1.0)
+        self._procs = []
+        self.writer.close()
+
+    def __enter__(self) -> "RemoteMonitor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _check_torn(name: str, max_poses: int, stop, result) -> None:
+    """演示用: 在另一个进程中持续读取, 统计读到的帧数与撕裂帧数"""
+    reader = ShmFrameReader(name, max_poses)
+    reads = torn = 0
+    while not stop.is_set():
+        poses = reader.read_poses()
+        if poses is None:
+            continue
+        reads += 1
+        if not (poses == poses[0, 0]).all():
+            torn += 1
+    result.put((reads, torn))
+    reader.close()
+
+
+if __name__ == "__main__":
+    writer = ShmFrameWriter(max_poses=4)
+
+    # 写入方全速写, 另一个进程并发读, 检查不会读到写了一半的帧 (每帧所有元素取值相同)
+    stop, result = mp.Event(), mp.Queue()
+    proc = mp.Process(target=_check_torn, args=(writer.name, 4, stop, result))
+    proc.start()
+    time.sleep(0.5)
+
+    n = 100000
+    frame = np.zeros((4, 7))
+    t0 = time.perf_counter()
+    for i in range(n):
+        frame.fill(i)
+        writer.write(poses=frame)
+    per = (time.perf_counter() - t0) / n * 1e6
+    stop.set()
+    reads, torn = result.get()
+    proc.join()
+    print(f"写入姿态: {per:.1f} us / 帧, 另一进程读取 {reads} 次, 撕裂帧 {torn}")
+
+    reader = ShmFrameReader(writer.name, max_poses=4)
+    panel = {"会话状态": "FOCUSED", "帧率": 90.0, "left_pos": [0.1, 0.2, 0.3], "grip_left": 0.0}
+    t0 = time.perf_counter()
+    for i in range(1000):
+        writer.write(panel=panel, t=float(i))  # 每次都超过 panel_interval, 测量编码开销
+    print(f"写入面板: {(time.perf_counter() - t0) / 1000 * 1e6:.1f} us / 次, 读取:", reader.read_panel())
+
+    reader.close()
+    writer.close()
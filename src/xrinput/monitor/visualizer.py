@@ -1,6 +1,7 @@
 import pyvista as pv
 import numpy as np
-from scipy.spatial.transform import Rotation as R
+
+from ..processing.quaternion import quat_normalize, quat_to_matrix
 
 
 class Visualizer:
@@ -102,13 +103,15 @@ class Visualizer:
         floor_pts = np.array([[x, y, 0], [x, y, z]], dtype=np.float32)
         obj["floor_line"].GetMapper().GetInput().points = floor_pts
 
-        # 坐标轴
-        rot = R.from_quat([qx, qy, qz, qw])
-        axis_vecs = rot.apply(np.eye(3) * 0.15)
-        p0 = np.array([x, y, z])
+        # 坐标轴: 旋转矩阵的第 i 列即物体自身第 i 个轴的方向
+        m = quat_to_matrix(quat_normalize((qx, qy, qz, qw)))
+        L = 0.15
 
         for i, axis in enumerate(obj["axes"]):
-            pts = np.vstack([p0, p0 + axis_vecs[i]]).astype(np.float32)
+            pts = np.array(
+                [[x, y, z], [x + L * m[0][i], y + L * m[1][i], z + L * m[2][i]]],
+                dtype=np.float32,
+            )
             axis.GetMapper().GetInput().points = pts
 
     def update(self, poses):
@@ -126,6 +129,8 @@ if __name__ == "__main__":
     import math
     import time
 
+    from scipy.spatial.transform import Rotation as R
+
     # 创建可视化器实例
     viz = Visualizer()
     
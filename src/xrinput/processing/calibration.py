@@ -0,0 +1,240 @@
+"""
+XR ↔ Robot 坐标系标定 (Kabsch / Umeyama)
+
+PoseTransform 的默认矩阵只适用于一套 Quest + 机器人的摆放. 这里由成对的
+XR / Robot 位置 (录制数据或实时采集) 求解最优变换:
+
+    robot ≈ scale · R · xr + t
+
+- 只累计矩统计量 (样本数, 一阶和, 3x3 互相关, 二阶和), add() 为一次矩阵乘法,
+  数千个样本也只需常数内存; 新样本到来后 solve() 只做一次 3x3 SVD, 重新标定很快
+- 残差 RMS 由矩统计量直接算出, 不需要保存样本; 逐样本残差可用 residuals() 计算
+- 可选把姿态也作为方向约束加入 (PoseTransform 的姿态模型为 q_robot = q_R ⊗ q_xr)
+
+    cal = PoseCalibrator(with_translation=True, with_scale=False)
+    cal.add_poses(xr_poses, robot_poses)      # (N, 7), 可多次调用
+    result = cal.solve()
+    print(result.rms, result.R, result.t)
+    tf = result.to_transform()                # 直接得到 PoseTransform
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from .pose_transform import PoseTransform
+from .quaternion import quat_to_matrix_batch
+
+
+class CalibrationResult:
+    """
+    标定结果
+
+    - R: (3, 3) 旋转矩阵, t: (3,) 平移, scale: 缩放
+    - rms: 位置残差均方根 (与输入同单位)
+    - n: 参与标定的位置样本数 (加权和)
+    """
+
+    def __init__(self, R: np.ndarray, t: np.ndarray, scale: float, rms: float, n: float):
+        self.R = R
+        self.t = t
+        self.scale = scale
+        self.rms = rms
+        self.n = n
+
+    def apply(self, xr_pos) -> np.ndarray:
+        """(N, 3) XR 位置 → Robot 位置"""
+        return self.scale * np.asarray(xr_pos, dtype=float) @ self.R.T + self.t
+
+    def residuals(self, xr_pos, robot_pos) -> np.ndarray:
+        """(N,) 逐样本位置残差"""
+        d = self.apply(xr_pos) - np.asarray(robot_pos, dtype=float)
+        return np.sqrt(np.einsum("ij,ij->i", d, d))
+
+    def to_transform(self) -> PoseTransform:
+        return PoseTransform(self.R, self.t, self.scale)
+
+    def load_into(self, tf: PoseTransform) -> PoseTransform:
+        """更新已有的 PoseTransform (正在使用它的流水线无需重建)"""
+        tf.set_matrix(self.R, self.t, self.scale)
+        return tf
+
+    def __repr__(self) -> str:
+        return (
+            f"CalibrationResult(rms={self.rms:.4g}, scale={self.scale:.6g}, "
+            f"t={np.round(self.t, 4).tolist()}, R={np.round(self.R, 4).tolist()}, n={self.n:g})"
+        )
+
+
+class PoseCalibrator:
+    """
+    增量式 Kabsch / Umeyama 标定
+
+    参数:
+    - with_translation: 是否求解平移; 否则假设两个坐标系原点重合
+    - with_scale: 是否求解缩放 (Umeyama); 否则 scale = 1 (Kabsch)
+    """
+
+    def __init__(self, with_translation: bool = True, with_scale: bool = False):
+        self.with_translation = with_translation
+        self.with_scale = with_scale
+        self.reset()
+
+    def reset(self) -> None:
+        self._n = 0.0                 # Σw
+        self._sx = np.zeros(3)        # Σw·x
+        self._sy = np.zeros(3)        # Σw·y
+        self._sxx = 0.0               # Σw·|x|²
+        self._syy = 0.0               # Σw·|y|²
+        self._sxy = np.zeros((3, 3))  # Σw·y·xᵀ
+        self._dirs = np.zeros((3, 3))  # 姿态方向约束 Σw·d_robot·d_xrᵀ
+        self._n_dirs = 0.0
+
+    @property
+    def n_samples(self) -> float:
+        return self._n
+
+    # ------------------ 累计样本 ------------------
+    def add(self, xr_pos, robot_pos, weights=None) -> None:
+        """加入成对位置样本, xr_pos / robot_pos: (N, 3) 或 (3,)"""
+        x = np.asarray(xr_pos, dtype=float).reshape(-1, 3)
+        y = np.asarray(robot_pos, dtype=float).reshape(-1, 3)
+        assert x.shape == y.shape, "XR 与 Robot 样本数不一致"
+
+        if weights is None:
+            wx, wy, n = x, y, float(x.shape[0])
+        else:
+            w = np.asarray(weights, dtype=float).reshape(-1, 1)
+            wx, wy, n = w * x, w * y, float(w.sum())
+
+        self._n += n
+        self._sx += wx.sum(axis=0)
+        self._sy += wy.sum(axis=0)
+        self._sxx += float(np.einsum("ij,ij->", wx, x))
+        self._syy += float(np.einsum("ij,ij->", wy, y))
+        self._sxy += wy.T @ x
+
+    def add_poses(self, xr_poses, robot_poses, weights=None, rot_weight: float = 0.0) -> None:
+        """
+        加入成对姿态样本 (N, 7), 位置参与标定; rot_weight > 0 时姿态也作为方向约束加入
+        (见 add_orientations), 权重相对于一个位置样本
+        """
+        xr = np.asarray(xr_poses, dtype=float).reshape(-1, 7)
+        robot = np.asarray(robot_poses, dtype=float).reshape(-1, 7)
+        self.add(xr[:, :3], robot[:, :3], weights)
+        if rot_weight > 0.0:
+            self.add_orientations(xr[:, 3:], robot[:, 3:], rot_weight)
+
+    def add_orientations(self, xr_quats, robot_quats, weight: float = 1.0) -> None:
+        """
+        加入成对姿态 (N, 4), 只约束旋转: 只转动手柄、不移动位置也能标定旋转
+
+        PoseTransform 的姿态模型为 q_robot = q_R ⊗ q_xr ⇒ M_robot = R · M_xr,
+        两侧旋转矩阵的各列即为成对的方向
+        """
+        m_x = quat_to_matrix_batch(np.asarray(xr_quats, dtype=float).reshape(-1, 4))
+        m_y = quat_to_matrix_batch(np.asarray(robot_quats, dtype=float).reshape(-1, 4))
+        self._dirs += weight * np.einsum("nij,nkj->ik", m_y, m_x)
+        self._n_dirs += weight * m_x.shape[0]
+
+    def forget(self, factor: float) -> None:
+        """按比例衰减已有统计量 (0 < factor < 1), 用于长时间在线标定时逐步淘汰旧样本"""
+        self._n *= factor
+        self._sx *= factor
+        self._sy *= factor
+        self._sxx *= factor
+        self._syy *= factor
+        self._sxy *= factor
+        self._dirs *= factor
+        self._n_dirs *= factor
+
+    # ------------------ 求解 ------------------
+    def solve(self) -> CalibrationResult:
+        n = self._n
+        if n <= 0.0 and self._n_dirs <= 0.0:
+            raise RuntimeError("PoseCalibrator 尚无样本")
+
+        n_pos = max(n, 1e-300)
+        mx, my = self._sx / n_pos, self._sy / n_pos
+        if self.with_translation:
+            # 去中心化的互相关与方差
+            cov = self._sxy / n_pos - np.outer(my, mx)
+            var_x = self._sxx / n_pos - mx @ mx
+        else:
+            cov = self._sxy / n_pos
+            var_x = self._sxx / n_pos
+
+        # 位置与方向约束合并到同一个 3x3 互相关矩阵: H = Σ_pos + Σ_dir
+        H = n * cov + self._dirs
+        U, S, Vt = np.linalg.svd(H)
+        d = np.sign(np.linalg.det(U @ Vt)) or 1.0
+        D = np.array([1.0, 1.0, d])
+        R = (U * D) @ Vt  # 保证 det(R) = +1, 不会解出镜像
+
+        # Umeyama: s = tr(R^T Σ_pos) / var_x (只由位置样本决定)
+        scale = 1.0
+        if self.with_scale and n > 0.0 and var_x > 0.0:
+            scale = float(np.sum(R * cov) / var_x)
+
+        t = my - scale * (R @ mx) if self.with_translation else np.zeros(3)
+
+        # 残差 E|y - sRx - t|² 由矩统计量展开, 无需保存样本
+        rms = 0.0
+        if n > 0.0:
+            msq = (
+                self._syy / n
+                + scale * scale * self._sxx / n
+                + t @ t
+                - 2.0 * scale * np.sum(R * self._sxy) / n
+                - 2.0 * t @ my
+                + 2.0 * scale * t @ (R @ mx)
+            )
+            rms = float(np.sqrt(max(msq, 0.0)))
+
+        return CalibrationResult(R, t, scale, rms, n)
+
+
+if __name__ == "__main__":
+    import time
+
+    from scipy.spatial.transform import Rotation as Rot
+
+    rng = np.random.default_rng(0)
+
+    # 真值: 默认 Quest → Robot 旋转 + 小角度偏差, 平移与缩放
+    R_true = Rot.from_euler("xyz", [3, -2, 5], degrees=True).as_matrix() @ PoseTransform().R
+    t_true = np.array([0.4, -0.1, 0.8])
+    s_true = 1.02
+    tf_true = PoseTransform(R_true, t_true, s_true)
+
+    N = 5000
+    xr = np.concatenate([rng.uniform(-0.6, 0.6, (N, 3)), Rot.random(N, random_state=1).as_quat()], axis=1)
+    robot = tf_true.pose_batch(xr)
+    robot[:, :3] += rng.normal(scale=2e-3, size=(N, 3))  # 2 mm 测量噪声
+
+    cal = PoseCalibrator(with_translation=True, with_scale=True)
+    t0 = time.perf_counter()
+    for chunk in range(0, N, 500):  # 分批加入, 模拟实时采集
+        cal.add_poses(xr[chunk:chunk + 500], robot[chunk:chunk + 500])
+    t1 = time.perf_counter()
+    result = cal.solve()
+    t2 = time.perf_counter()
+
+    res = result.residuals(xr[:, :3], robot[:, :3])
+    angle = np.degrees(np.arccos(np.clip((np.trace(result.R.T @ R_true) - 1) / 2, -1, 1)))
+    print(result)
+    print(f"旋转误差 {angle:.4f}°, 平移误差 {np.linalg.norm(result.t - t_true) * 1e3:.2f} mm, 缩放误差 {abs(result.scale - s_true):.2e}")
+    print(f"RMS (矩统计量) {result.rms * 1e3:.3f} mm, RMS (逐样本) {np.sqrt(np.mean(res ** 2)) * 1e3:.3f} mm, 最大 {res.max() * 1e3:.2f} mm")
+    print(f"累计 {N} 个样本: {(t1 - t0) * 1e3:.2f} ms, 求解: {(t2 - t1) * 1e6:.0f} us")
+
+    # 仅靠姿态 (方向约束) 标定旋转
+    cal_rot = PoseCalibrator(with_translation=False)
+    cal_rot.add_orientations(xr[:50, 3:], robot[:50, 3:])
+    R_rot = cal_rot.solve().R
+    print("仅姿态标定的旋转误差:", np.abs(R_rot - R_true).max())
+
+    # 结果直接载入 PoseTransform
+    tf = result.to_transform()
+    print("PoseTransform 位置最大误差:", np.abs(tf.pose_batch(xr)[:, :3] - robot[:, :3]).max())
+    print("标量接口与批量接口一致:", np.allclose(tf.pose(xr[0].tolist()), tf.pose_batch(xr[0])))
+    print("往返误差:", np.abs(tf.pose_inv_batch(tf.pose_batch(xr))[:, :3] - xr[:, :3]).max())
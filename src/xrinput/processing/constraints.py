@@ -0,0 +1,334 @@
+"""
+向量化的约束空间
+
+Box3D 只支持单个轴对齐盒体、每次一个点. 这里的约束体一次处理 (N, 3) 点集:
+- BoxVolume:      轴对齐盒体
+- SphereVolume:   球体
+- CylinderVolume: 任意朝向的有限圆柱
+- PolytopeVolume: 凸多面体 A·x ≤ b, 构建时预计算半空间矩阵与各面 / 棱 / 顶点的投影
+- UnionVolume:    多个允许区域的并集, 投影到最近的一个
+- OrientationCone: 姿态锥角限制, 约束设备某个本体轴与参考方向的夹角
+
+所有约束体的接口一致:
+    inside = vol.contains(points)             # (N,) bool
+    proj = vol.project(points)                # (N, 3), 区域内的点保持不变
+    clamped, violated = vol.clamp(points)     # 投影结果 + 越界掩码
+
+    chain = TransformChain().frame(tf).clamp(UnionVolume([table, shelf]))
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from itertools import combinations
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from .quaternion import quat_from_rotvec_batch, quat_mul_batch, quat_rotate_batch
+
+_TOL = 1e-9
+
+
+def _as_points(points) -> np.ndarray:
+    return np.asarray(points, dtype=float).reshape(-1, 3)
+
+
+class Volume(ABC):
+    """约束体基类, 子类必须实现 contains / project (否则实例化时即报错)"""
+
+    @abstractmethod
+    def contains(self, points) -> np.ndarray:
+        """(N,) 是否在区域内"""
+
+    @abstractmethod
+    def project(self, points) -> np.ndarray:
+        """(N, 3) 投影到区域内最近的点, 区域内的点保持不变"""
+
+    def clamp(self, points) -> Tuple[np.ndarray, np.ndarray]:
+        """返回 (投影后的点 (N, 3), 越界掩码 (N,))"""
+        points = _as_points(points)
+        return self.project(points), ~self.contains(points)
+
+    def distance(self, points) -> np.ndarray:
+        """到区域的欧氏距离, 区域内为 0"""
+        points = _as_points(points)
+        d = points - self.project(points)
+        return np.sqrt(np.einsum("ij,ij->i", d, d))
+
+
+class BoxVolume(Volume):
+    """轴对齐盒体 lo ≤ x ≤ hi"""
+
+    def __init__(self, lo, hi):
+        self.lo = np.asarray(lo, dtype=float).reshape(3)
+        self.hi = np.asarray(hi, dtype=float).reshape(3)
+        assert (self.lo <= self.hi).all()
+
+    @classmethod
+    def from_box3d(cls, box) -> "BoxVolume":
+        return cls((box.x_min, box.y_min, box.z_min), (box.x_max, box.y_max, box.z_max))
+
+    def contains(self, points) -> np.ndarray:
+        points = _as_points(points)
+        return ((points >= self.lo - _TOL) & (points <= self.hi + _TOL)).all(axis=1)
+
+    def project(self, points) -> np.ndarray:
+        return np.clip(_as_points(points), self.lo, self.hi)
+
+
+class SphereVolume(Volume):
+    """球体 |x - center| ≤ radius"""
+
+    def __init__(self, center, radius: float):
+        self.center = np.asarray(center, dtype=float).reshape(3)
+        self.radius = float(radius)
+
+    def contains(self, points) -> np.ndarray:
+        d = _as_points(points) - self.center
+        return np.einsum("ij,ij->i", d, d) <= (self.radius + _TOL) ** 2
+
+    def project(self, points) -> np.ndarray:
+        d = _as_points(points) - self.center
+        norm = np.sqrt(np.einsum("ij,ij->i", d, d))
+        scale = np.minimum(1.0, self.radius / np.maximum(norm, 1e-300))
+        return self.center + d * scale[:, None]
+
+
+class CylinderVolume(Volume):
+    """
+    有限实心圆柱, 轴线从 p0 到 p1, 半径 radius
+
+    圆柱是 "轴向线段 × 径向圆盘" 的乘积, 两个方向分别投影即为精确的最近点
+    """
+
+    def __init__(self, p0, p1, radius: float):
+        self.p0 = np.asarray(p0, dtype=float).reshape(3)
+        axis = np.asarray(p1, dtype=float).reshape(3) - self.p0
+        self.length = float(np.linalg.norm(axis))
+        assert self.length > 0.0
+        self.axis = axis / self.length
+        self.radius = float(radius)
+
+    def _split(self, points):
+        d = _as_points(points) - self.p0
+        h = d @ self.axis                   # 轴向坐标
+        radial = d - h[:, None] * self.axis  # 径向分量
+        r = np.sqrt(np.einsum("ij,ij->i", radial, radial))
+        return h, radial, r
+
+    def contains(self, points) -> np.ndarray:
+        h, _, r = self._split(points)
+        return (h >= -_TOL) & (h <= self.length + _TOL) & (r <= self.radius + _TOL)
+
+    def project(self, points) -> np.ndarray:
+        h, radial, r = self._split(points)
+        h = np.clip(h, 0.0, self.length)
+        scale = np.minimum(1.0, self.radius / np.maximum(r, 1e-300))
+        return self.p0 + h[:, None] * self.axis + radial * scale[:, None]
+
+
+class PolytopeVolume(Volume):
+    """
+    凸多面体 A·x ≤ b (A: (M, 3), b: (M,))
+
+    构建时把每行归一化为单位法向, A·x - b 即为到各个面的有符号距离,
+    contains 只需一次矩阵乘法.
+
+    三维凸多面体外一点的最近点必落在某个面 / 棱 / 顶点上, 即 1~3 个平面交集的仿射投影.
+    构建时预计算所有线性无关的平面组合的投影 x' = P·x + c, project 时一次算出全部候选点,
+    取其中可行且距离最近的一个, 结果是精确解. 候选数为 C(M,1)+C(M,2)+C(M,3),
+    适合几个到十几个面的工作空间.
+    """
+
+    def __init__(self, A, b):
+        A = np.asarray(A, dtype=float).reshape(-1, 3)
+        b = np.asarray(b, dtype=float).reshape(-1)
+        norms = np.linalg.norm(A, axis=1)
+        assert (norms > 0.0).all() and b.shape[0] == A.shape[0]
+        self.A = A / norms[:, None]
+        self.b = b / norms
+        self.AT = self.A.T.copy()
+
+        # 面 / 棱 / 顶点候选的仿射投影 x' = x @ PT + c
+        PT, c = [], []
+        eye = np.eye(3)
+        for k in (1, 2, 3):
+            for rows in combinations(range(len(self.b)), k):
+                As = self.A[list(rows)]
+                G = As @ As.T
+                if abs(np.linalg.det(G)) < 1e-10:
+                    continue  # 平行的面没有唯一交集
+                W = As.T @ np.linalg.inv(G)
+                PT.append((eye - W @ As).T)
+                c.append(W @ self.b[list(rows)])
+        # 拼成一个 (3, K·3) 矩阵, 所有候选只需一次 matmul
+        self._K = len(c)
+        self._PT = np.ascontiguousarray(np.array(PT).transpose(1, 0, 2).reshape(3, -1))
+        self._c = np.array(c).reshape(-1)
+
+    @classmethod
+    def from_box(cls, lo, hi) -> "PolytopeVolume":
+        eye = np.eye(3)
+        return cls(np.vstack([eye, -eye]), np.concatenate([np.asarray(hi, float), -np.asarray(lo, float)]))
+
+    def signed_distances(self, points) -> np.ndarray:
+        """(N, M) 到各个面的有符号距离, 正值表示在该面外侧"""
+        return _as_points(points) @ self.AT - self.b
+
+    def contains(self, points) -> np.ndarray:
+        return (self.signed_distances(points) <= _TOL).all(axis=1)
+
+    def project(self, points) -> np.ndarray:
+        points = _as_points(points)
+        out = points.copy()
+        outside = ~self.contains(points)
+        if not outside.any():
+            return out
+
+        x = points[outside]
+        n = x.shape[0]
+        cand = (x @ self._PT + self._c).reshape(n * self._K, 3)  # 全部候选点
+        infeasible = (cand @ self.AT - self.b > _TOL).any(axis=1)
+        d = (cand.reshape(n, self._K, 3) - x[:, None]).reshape(-1, 3)
+        dist = np.einsum("ij,ij->i", d, d)
+        dist[infeasible] = np.inf
+        best = np.argmin(dist.reshape(n, self._K), axis=1)
+        out[outside] = cand[np.arange(n) * self._K + best]
+        return out
+
+
+class UnionVolume(Volume):
+    """多个允许区域的并集, 越界点投影到距离最近的区域"""
+
+    def __init__(self, volumes: Sequence[Volume]):
+        assert len(volumes) > 0
+        self.volumes = list(volumes)
+
+    def contains(self, points) -> np.ndarray:
+        points = _as_points(points)
+        inside = self.volumes[0].contains(points)
+        for vol in self.volumes[1:]:
+            inside |= vol.contains(points)
+        return inside
+
+    def project(self, points) -> np.ndarray:
+        points = _as_points(points)
+        projs = np.stack([vol.project(points) for vol in self.volumes])  # (K, N, 3)
+        d = projs - points
+        best = np.argmin(np.einsum("knj,knj->kn", d, d), axis=0)
+        return projs[best, np.arange(points.shape[0])]
+
+
+class OrientationCone:
+    """
+    姿态锥角限制: 设备本体轴 body_axis 旋转到世界系后, 与 axis 的夹角不超过 max_angle
+
+    clamp 对越界的姿态施加最小旋转 (绕 v × axis), 把本体轴拉回锥面上,
+    绕该轴的自转分量保持不变
+
+    参数:
+    - axis: 世界系参考方向
+    - max_angle: 最大夹角 (rad)
+    - body_axis: 设备本体系下被约束的轴, 默认 z 轴
+    """
+
+    def __init__(self, axis, max_angle: float, body_axis=(0.0, 0.0, 1.0)):
+        axis = np.asarray(axis, dtype=float).reshape(3)
+        body_axis = np.asarray(body_axis, dtype=float).reshape(3)
+        self.axis = axis / np.linalg.norm(axis)
+        self.body_axis = body_axis / np.linalg.norm(body_axis)
+        self.max_angle = float(max_angle)
+        self._cos_max = np.cos(self.max_angle)
+
+        # v 与 axis 反向时 v × axis 退化, 改用任意一条与 axis 垂直的旋转轴
+        helper = np.eye(3)[np.argmin(np.abs(self.axis))]
+        perp = np.cross(self.axis, helper)
+        self._fallback = perp / np.linalg.norm(perp)
+
+    def angles(self, quats) -> np.ndarray:
+        """(N,) 本体轴与参考方向的夹角 (rad)"""
+        return np.arccos(np.clip(self._cos(quats), -1.0, 1.0))
+
+    def _cos(self, quats) -> np.ndarray:
+        q = np.asarray(quats, dtype=float).reshape(-1, 4)
+        v = quat_rotate_batch(q, np.broadcast_to(self.body_axis, (q.shape[0], 3)))
+        return v @ self.axis
+
+    def contains(self, quats) -> np.ndarray:
+        return self._cos(quats) >= self._cos_max - _TOL
+
+    def clamp(self, quats) -> Tuple[np.ndarray, np.ndarray]:
+        """返回 (修正后的四元数 (N, 4), 越界掩码 (N,))"""
+        q = np.array(quats, dtype=float).reshape(-1, 4)
+        v = quat_rotate_batch(q, np.broadcast_to(self.body_axis, (q.shape[0], 3)))
+        cos = v @ self.axis
+        violated = cos < self._cos_max - _TOL
+        if not violated.any():
+            return q, violated
+
+        v = v[violated]
+        n = np.cross(v, self.axis)
+        s = np.sqrt(np.einsum("ij,ij->i", n, n))
+        n = np.where(s[:, None] > 1e-12, n / np.maximum(s, 1e-300)[:, None], self._fallback)
+        excess = np.arccos(np.clip(cos[violated], -1.0, 1.0)) - self.max_angle
+        q[violated] = quat_mul_batch(quat_from_rotvec_batch(n * excess[:, None]), q[violated])
+        return q, violated
+
+
+if __name__ == "__main__":
+    import time
+
+    from .box3d import Box3D
+
+    rng = np.random.default_rng(0)
+    pts = rng.uniform(-1.5, 1.5, (500, 3))
+
+    # 盒体与 Box3D 逐点结果一致
+    box3d = Box3D((-1, 1), (-1, 1), (0.02, 1))
+    box = BoxVolume.from_box3d(box3d)
+    clamped, violated = box.clamp(pts)
+    ref = np.array([box3d.clamp(p) for p in pts])
+    ref_in = np.array([box3d.contains(p) for p in pts])
+    print("BoxVolume 与 Box3D 一致:", np.allclose(clamped, ref) and (violated == ~ref_in).all())
+
+    # 凸多面体 (盒体的半空间形式) 的投影与 clip 一致
+    poly = PolytopeVolume.from_box(box.lo, box.hi)
+    print("PolytopeVolume 投影误差:", np.abs(poly.project(pts) - clamped).max())
+
+    # 斜切的多面体: 投影结果在区域内, 且不比任意可行点更远
+    wedge = PolytopeVolume([[0, 0, -1], [1, 0, 1], [-1, 0, 1], [0, 1, 0], [0, -1, 0]], [0, 1, 1, 0.5, 0.5])
+    proj = wedge.project(pts)
+    feasible = pts[wedge.contains(pts)]
+    dist = np.linalg.norm(pts - proj, axis=1)
+    brute = np.linalg.norm(pts[:, None] - feasible[None], axis=2).min(axis=1)
+    print("楔形体投影在区域内:", wedge.contains(proj).all(), ", 不劣于可行样本:", (dist <= brute + 1e-6).all())
+
+    # 并集: 桌面盒体 + 球体 + 竖直圆柱
+    union = UnionVolume([
+        BoxVolume((-0.5, -0.5, 0.0), (0.5, 0.5, 0.3)),
+        SphereVolume((0.8, 0.0, 0.5), 0.3),
+        CylinderVolume((-0.8, 0.0, 0.0), (-0.8, 0.0, 1.0), 0.2),
+    ])
+    clamped, violated = union.clamp(pts)
+    print(f"并集: {violated.sum()}/{len(pts)} 个点越界, 投影后全部在区域内:", union.contains(clamped).all())
+
+    # 姿态锥: 工具 z 轴与竖直向下的夹角不超过 30°
+    from scipy.spatial.transform import Rotation as R
+
+    cone = OrientationCone((0, 0, -1), np.radians(30))
+    quats = R.random(500, random_state=0).as_quat()
+    fixed, violated = cone.clamp(quats)
+    print(f"锥角: {violated.sum()} 个越界, 修正后最大夹角 {np.degrees(cone.angles(fixed).max()):.3f}°")
+
+    n = 2000
+    for name, vol in (("BoxVolume", box), ("PolytopeVolume", wedge), ("UnionVolume", union)):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            vol.clamp(pts)
+        print(f"{name:>15}: {(time.perf_counter() - t0) / n * 1e6:.1f} us / {len(pts)} 点")
+    t0 = time.perf_counter()
+    for p in pts[:200]:
+        box3d.clamp(p)
+        box3d.contains(p)
+    print(f"{'Box3D 逐点':>15}: {(time.perf_counter() - t0) / 200 * len(pts) * 1e6:.1f} us / {len(pts)} 点")
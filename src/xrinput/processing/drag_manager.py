@@ -0,0 +1,251 @@
+"""
+多控制器拖拽管理器
+
+PoseMapper 每个实例管理一只手, 应用需要为每只手重复 "按下 → 开始拖拽, 按住 → 更新,
+松开 → 停止" 的状态机. DragManager 持有 N 个拖拽槽 (左右手柄 + 追踪器等),
+每帧一次向量化判断所有槽的状态, 并批量完成 start_drag / update 的计算:
+
+    dm = DragManager(n_slots=2, threshold=0.5)
+    dm.init_reference(INIT_POSE)                     # (7,) 或 (N, 7)
+    targets = dm.update(vr_poses, grips)             # vr_poses: (N, 7), grips: (N,)
+    dm.dragging                                      # (N,) 是否正在拖拽
+
+每个槽的计算与 PoseMapper 相同:
+- 开始拖拽: rel_q = q_vr* ⊗ q_obj, rel_t = t_obj - t_vr (世界坐标系偏移)
+- 拖拽期间: q_obj = q_vr ⊗ rel_q, t_obj = t_vr + rel_t
+
+槽数不超过 SCALAR_MAX_SLOTS 时逐槽用纯 Python 标量计算 (与 PoseMapper 相同的开销量级),
+否则整块向量化; 少量槽时 NumPy 的固定调用开销远大于计算本身. 两条路径结果一致.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+from .quaternion import (
+    quat_conj,
+    quat_conj_batch,
+    quat_mul,
+    quat_mul_batch,
+    quat_normalize,
+    quat_normalize_batch,
+)
+
+_IDENTITY = np.array([0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0])
+
+# 不超过该槽数时使用标量路径
+SCALAR_MAX_SLOTS = 4
+
+
+class DragManager:
+    """
+    N 槽拖拽管理器
+
+    参数:
+    - n_slots: 槽数, 每个槽对应一个控制器 / 追踪器和一个被拖拽的物体
+    - threshold: 握持阈值, grip > threshold 视为按下 (标量或 (N,) 逐槽设置)
+    """
+
+    def __init__(self, n_slots: int = 2, threshold=0.5):
+        self.n_slots = n_slots
+        self.threshold = np.broadcast_to(np.asarray(threshold, dtype=float), (n_slots,)).copy()
+
+        self._ref = np.tile(_IDENTITY, (n_slots, 1))      # 参考姿态, reset() 时恢复
+        self._target = np.tile(_IDENTITY, (n_slots, 1))   # 当前目标姿态
+        self._rel_t = np.zeros((n_slots, 3), dtype=float)  # 世界坐标系下的位置偏移
+        self._rel_q = np.tile(_IDENTITY[3:], (n_slots, 1))  # 相对旋转
+        self._dragging = np.zeros(n_slots, dtype=bool)
+        self._scalar = n_slots <= SCALAR_MAX_SLOTS
+        self._rel = [tuple(_IDENTITY)] * n_slots
+
+    # ------------------ 1. 初始化物体世界姿态 ------------------
+    def init_reference(self, poses) -> None:
+        """设置参考姿态并作为当前目标, poses 为 (7,) (所有槽相同) 或 (N, 7)"""
+        poses = np.broadcast_to(np.asarray(poses, dtype=float), (self.n_slots, 7))
+        self._ref[:, :3] = poses[:, :3]
+        self._ref[:, 3:] = quat_normalize_batch(poses[:, 3:])
+        self._target[...] = self._ref
+        self._dragging[:] = False
+
+    # ------------------ 2. 每帧更新 ------------------
+    def update(self, vr_poses, grips, valid=None) -> np.ndarray:
+        """
+        根据握持值更新所有槽
+
+        参数:
+        - vr_poses: (N, 7) 控制器姿态 (与目标姿态同一坐标系)
+        - grips: (N,) 握持值
+        - valid: 可选 (N,) 布尔数组; 无效的槽 (如追踪丢失) 本帧保持原状态与目标
+
+        返回:
+        - (N, 7) 目标姿态 (内部数组, 下次 update 会被覆盖)
+        """
+        if self._scalar:
+            return self._update_scalar(vr_poses, grips, valid)
+
+        vr = np.asarray(vr_poses, dtype=float).reshape(self.n_slots, 7)
+        pressed = np.asarray(grips, dtype=float).reshape(self.n_slots) > self.threshold
+
+        move = pressed
+        if valid is not None:
+            # 无效的槽沿用上一帧的拖拽状态 (因此不会触发开始), 也不更新目标
+            valid = np.asarray(valid, dtype=bool)
+            pressed = np.where(valid, pressed, self._dragging)
+            move = pressed & valid
+            vr = np.where(valid[:, None], vr, _IDENTITY)  # 避免 NaN 进入计算
+
+        # 1. 松开按钮 → 停止拖拽; 2. 刚按下 → 记录相对姿态; 3. 按住 → 更新目标
+        start = pressed & ~self._dragging
+        self._dragging = pressed
+
+        q_vr = quat_normalize_batch(vr[:, 3:])
+        if start.any():
+            self._rel_q[start] = quat_mul_batch(quat_conj_batch(q_vr[start]), self._target[start, 3:])
+            self._rel_t[start] = self._target[start, :3] - vr[start, :3]
+
+        if move.all():
+            # 常见情况: 所有槽都在拖拽, 整块写入目标数组, 不做花式索引
+            np.add(vr[:, :3], self._rel_t, out=self._target[:, :3])
+            quat_mul_batch(q_vr, self._rel_q, out=self._target[:, 3:])
+        elif move.any():
+            self._target[move, :3] = vr[move, :3] + self._rel_t[move]
+            self._target[move, 3:] = quat_mul_batch(q_vr[move], self._rel_q[move])
+
+        return self._target
+
+    def _update_scalar(self, vr_poses, grips, valid) -> np.ndarray:
+        """少量槽: 逐槽标量计算, 语义与 update 的向量化路径相同; 状态整块读出 / 写回"""
+        N = self.n_slots
+        if isinstance(vr_poses, np.ndarray):
+            vr = vr_poses.reshape(N, 7).tolist()
+        else:
+            vr = [list(p) for p in vr_poses]
+        grips = grips.tolist() if isinstance(grips, np.ndarray) else grips
+        if valid is not None:
+            valid = np.asarray(valid, dtype=bool).tolist()
+        thr = self.threshold.tolist()
+        dragging = self._dragging.tolist()
+        target = self._target.tolist()
+        rel = self._rel  # 标量路径的相对姿态 [tx, ty, tz, qx, qy, qz, qw], 只在开始拖拽时写入
+
+        moved = False
+        for k in range(N):
+            if valid is not None and not valid[k]:
+                continue  # 无效的槽保持拖拽状态与目标
+            pressed = grips[k] > thr[k]
+            started = pressed and not dragging[k]
+            dragging[k] = pressed
+            if not pressed:
+                continue
+
+            p = vr[k]
+            q_vr = quat_normalize(p[3:])
+            r = rel[k]
+            if started:
+                cur = target[k]
+                rel[k] = r = (cur[0] - p[0], cur[1] - p[1], cur[2] - p[2], *quat_mul(quat_conj(q_vr), cur[3:]))
+            target[k] = (p[0] + r[0], p[1] + r[1], p[2] + r[2], *quat_mul(q_vr, r[3:]))
+            moved = True
+
+        self._dragging[...] = dragging
+        if moved:
+            self._target[...] = target
+        return self._target
+
+    # ------------------ 3. 目标姿态 ------------------
+    @property
+    def targets(self) -> np.ndarray:
+        """(N, 7) 当前目标姿态"""
+        return self._target
+
+    @property
+    def dragging(self) -> np.ndarray:
+        """(N,) 是否正在拖拽"""
+        return self._dragging
+
+    def set_target(self, poses, mask=None) -> None:
+        """直接设置目标姿态, mask 为可选 (N,) 布尔数组, 只修改选中的槽"""
+        poses = np.broadcast_to(np.asarray(poses, dtype=float), (self.n_slots, 7))
+        rows = slice(None) if mask is None else np.asarray(mask, dtype=bool)
+        self._target[rows, :3] = poses[rows, :3]
+        self._target[rows, 3:] = quat_normalize_batch(poses[rows, 3:])
+        # 正在拖拽的槽重新开始, 否则下一帧会跳回原来的相对姿态
+        self._dragging[rows] = False
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        """恢复到参考姿态"""
+        self.set_target(self._ref, mask)
+
+
+if __name__ == "__main__":
+    import math
+    import time
+
+    from scipy.spatial.transform import Rotation as R
+
+    from .pose_mapper import PoseMapper
+
+    def controller(t, k):
+        pos = [0.5 + 0.1 * math.sin(t + k), 0.2 + 0.1 * math.sin(2 * t), 0.3 + 0.1 * math.cos(t)]
+        quat = R.from_euler("yz", [0.5 * math.sin(t), 0.3 * k]).as_quat().tolist()
+        return pos + quat
+
+    N = 4
+    init = [0.33, 0.0, 0.1, -0.56, -0.56, -0.43, -0.43]
+    dm = DragManager(n_slots=N)
+    dm.init_reference(init)
+    vec = DragManager(n_slots=N)  # 向量化路径对照
+    vec._scalar = False
+    vec.init_reference(init)
+    mappers = [PoseMapper() for _ in range(N)]
+    for m in mappers:
+        m.init_reference(init[:3], init[3:])
+
+    # 与逐个 PoseMapper 的状态机对照, 各槽的按下 / 松开时刻不同
+    max_err = vec_err = 0.0
+    for i in range(200):
+        t = i * 0.05
+        poses = np.array([controller(t, k) for k in range(N)])
+        grips = np.array([1.0 if (i // (20 + 7 * k)) % 2 == 0 else 0.0 for k in range(N)])
+        valid = np.array([(i + 3 * k) % 37 != 0 for k in range(N)])
+        vec_err = max(vec_err, np.abs(dm.update(poses, grips, valid) - vec.update(poses, grips, valid)).max())
+        targets = dm.update(poses, grips)
+        vec.update(poses, grips)
+
+        for k, m in enumerate(mappers):
+            pos, quat = poses[k, :3].tolist(), poses[k, 3:].tolist()
+            if grips[k] <= 0.5:
+                m.stop_drag()
+            elif not m.dragging:
+                m.start_drag(pos, quat)
+            else:
+                m.update(pos, quat)
+            ref_pos, ref_quat = m.get_target()
+            max_err = max(max_err, np.abs(targets[k] - np.array(ref_pos + ref_quat)).max())
+    print(f"{N} 个槽与 PoseMapper 最大误差: {max_err:.2e}, 标量与向量化路径最大误差: {vec_err:.2e}")
+
+    n = 5000
+    for N in (1, 2, 4, 8, 32):
+        for scalar in (True, False):
+            if scalar and N > SCALAR_MAX_SLOTS:
+                continue
+            dm = DragManager(n_slots=N)
+            dm._scalar = scalar
+            poses = np.tile(controller(0.0, 0), (N, 1))
+            grips = np.ones(N)
+            t0 = time.perf_counter()
+            for _ in range(n):
+                dm.update(poses, grips)
+            per = (time.perf_counter() - t0) / n * 1e6
+            print(f"DragManager ({'标量' if scalar else '向量化'}): {per:.1f} us / 帧 ({N} 个槽)")
+
+    m = PoseMapper()
+    m.init_reference(init[:3], init[3:])
+    pos, quat = controller(0.0, 0)[:3], controller(0.0, 0)[3:]
+    m.start_drag(pos, quat)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        m.update(pos, quat)
+    print(f"PoseMapper: {(time.perf_counter() - t0) / n * 1e6:.1f} us / 帧 (1 个槽)")
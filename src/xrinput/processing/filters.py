@@ -1,5 +1,16 @@
+import math
+import time
+
 import numpy as np
 
+from .quaternion import (
+    quat_conj_batch,
+    quat_from_rotvec_batch,
+    quat_mul_batch,
+    quat_normalize_batch,
+    quat_to_rotvec_batch,
+)
+
 class LowPassFilter:
     def __init__(self, alpha=0.5):
         """
@@ -35,6 +46,166 @@ class LowPassFilter:
         """
         self.previous_output = None
 
+class OrientationFilter:
+    """
+    姿态 (四元数) 低通滤波器, 用法与 LowPassFilter 一致, 可直接放在同一处理流程中
+
+    逐分量平均四元数是错误的 (不保持单位长度, 且 q 与 -q 会相互抵消),
+    这里在切空间中平滑:
+        delta = log(prev* ⊗ q)           # 取最短路径, 与输入符号无关
+        prev  = prev ⊗ exp(alpha * delta)
+
+    支持单个 (4,) 或批量 (N, 4) 四元数, 顺序 (x, y, z, w)
+    """
+
+    def __init__(self, alpha=0.5):
+        """
+        :param alpha: 滤波系数，值越小滤波效果越强，范围 0-1; 也可为 (N,) 数组逐个设置
+        """
+        self.alpha = alpha
+        self.previous_output = None
+
+    def update(self, input_data):
+        """
+        :param input_data: 四元数 [x, y, z, w] 或 (N, 4) 数组
+        :return: 滤波后的四元数, 单个输入返回列表, 批量输入返回 (N, 4) 数组
+        """
+        q = np.asarray(input_data, dtype=float)
+        single = q.ndim == 1
+        q = quat_normalize_batch(q.reshape(-1, 4))
+
+        if self.previous_output is None:
+            # 第一帧输出归一化后的输入, 类型与之后各帧一致
+            current = q
+        else:
+            prev = self.previous_output
+            delta = quat_to_rotvec_batch(quat_mul_batch(quat_conj_batch(prev), q))
+            delta *= np.reshape(self.alpha, (-1, 1))
+            current = quat_normalize_batch(quat_mul_batch(prev, quat_from_rotvec_batch(delta)))
+
+            # 输出与输入保持同一半球, 避免下游看到符号跳变
+            flip = np.sum(current * q, axis=-1, keepdims=True) < 0.0
+            np.negative(current, out=current, where=flip)
+
+        self.previous_output = current
+        # 批量输出返回副本, 调用方原地修改不会破坏滤波状态
+        return current[0].tolist() if single else current.copy()
+
+    def reset(self):
+        """
+        重置滤波器状态
+        """
+        self.previous_output = None
+
+
+class OneEuroFilterBank:
+    """
+    One Euro 自适应低通滤波器组
+
+    一次向量化更新所有通道 (如所有设备的位置), 状态保存在预分配数组中:
+    - 静止时截止频率接近 min_cutoff, 抑制抖动
+    - 快速运动时截止频率随速度升高 (beta * |速度|), 减少滞后
+
+    参数:
+    - shape: 通道形状, 如 (3,) 单个位置, (2, 3) 双手位置
+    - min_cutoff: 最小截止频率 (Hz), 越小静止越平稳
+    - beta: 速度系数, 越大快速运动时越跟手
+    - d_cutoff: 速度估计的截止频率 (Hz)
+    以上三个参数均可为标量或可广播到 shape 的数组 (逐通道设置)
+    - freq: 未提供时间戳或时间戳无效时使用的采样频率 (Hz)
+    """
+
+    def __init__(self, shape=(3,), min_cutoff=1.0, beta=0.0, d_cutoff=1.0, freq=90.0):
+        self.shape = tuple(np.atleast_1d(shape))
+        self.freq = freq
+        self.set_params(min_cutoff, beta, d_cutoff)
+
+        # 预分配状态与临时缓冲
+        self._x = np.zeros(self.shape, dtype=float)    # 滤波后的值
+        self._dx = np.zeros(self.shape, dtype=float)   # 滤波后的速度
+        self._raw = np.zeros(self.shape, dtype=float)  # 原始速度 / 临时量
+        self._a = np.zeros(self.shape, dtype=float)    # 平滑系数
+        self._t = None
+        self.initialized = False
+
+    def set_params(self, min_cutoff=None, beta=None, d_cutoff=None):
+        """运行中调整参数 (逐通道或整体)"""
+        if min_cutoff is not None:
+            self.min_cutoff = np.broadcast_to(np.asarray(min_cutoff, dtype=float), self.shape).copy()
+        if beta is not None:
+            self.beta = np.broadcast_to(np.asarray(beta, dtype=float), self.shape).copy()
+        if d_cutoff is not None:
+            # 速度滤波时间常数 tau = 1 / (2π fc)
+            self._tau_d = 1.0 / (2.0 * math.pi * np.broadcast_to(np.asarray(d_cutoff, dtype=float), self.shape))
+
+    def update(self, input_data, t=None, out=None):
+        """
+        更新所有通道并返回滤波结果
+
+        :param input_data: 形状为 shape 的数组 / 嵌套列表
+        :param t: 时间戳 (秒), 默认 time.perf_counter()
+        :param out: 可选输出数组, 默认返回内部状态数组 (下次 update 会被覆盖)
+        """
+        if t is None:
+            t = time.perf_counter()
+        x = np.asarray(input_data, dtype=float)
+
+        if not self.initialized:
+            self._x[...] = x
+            self._dx.fill(0.0)
+            self._t = t
+            self.initialized = True
+            return self._output(out)
+
+        dt = t - self._t
+        if dt <= 0.0:
+            dt = 1.0 / self.freq
+        self._t = t
+
+        raw, a = self._raw, self._a
+
+        # 1. 速度估计并低通: dx += a_d * (dx_raw - dx), a_d = dt / (dt + tau_d)
+        np.subtract(x, self._x, out=raw)
+        raw /= dt
+        np.add(self._tau_d, dt, out=a)
+        np.divide(dt, a, out=a)
+        raw -= self._dx
+        raw *= a
+        self._dx += raw
+
+        # 2. 自适应截止频率: fc = min_cutoff + beta * |dx|
+        np.abs(self._dx, out=a)
+        a *= self.beta
+        a += self.min_cutoff
+
+        # 3. 位置平滑: x += a * (x_raw - x), a = dt / (dt + 1 / (2π fc))
+        a *= 2.0 * math.pi
+        np.reciprocal(a, out=a)
+        a += dt
+        np.divide(dt, a, out=a)
+        np.subtract(x, self._x, out=raw)
+        raw *= a
+        self._x += raw
+
+        return self._output(out)
+
+    def _output(self, out):
+        if out is None:
+            return self._x
+        out[...] = self._x
+        return out
+
+    @property
+    def velocity(self):
+        """当前滤波后的速度估计 (单位/秒)"""
+        return self._dx
+
+    def reset(self):
+        """重置滤波器状态"""
+        self._t = None
+        self.initialized = False
+
+
 if __name__ == '__main__':
     # 创建低通滤波器实例，alpha=0.3
     filter = LowPassFilter(alpha=0.3)
@@ -71,6 +242,66 @@ if __name__ == '__main__':
     filtered_new_data = filter.update(new_data)
     print(f"重置后输入: {new_data} -> 输出: {filtered_new_data}")
 
+    print("-" * 50)
+    print("One Euro 滤波器组测试 (双手位置, 90 Hz):")
+    bank = OneEuroFilterBank(shape=(2, 3), min_cutoff=1.0, beta=0.5)
+    rng = np.random.default_rng(0)
+    dt = 1 / 90
+    truth = np.zeros((2, 3))
+    err_raw, err_filt = [], []
+    for i in range(180):
+        truth[1, 0] = 0.5 * math.sin(i * dt * 2 * math.pi)  # 右手运动, 左手静止
+        noisy = truth + rng.normal(scale=0.002, size=(2, 3))
+        filtered = bank.update(noisy, t=i * dt)
+        err_raw.append(np.abs(noisy - truth)[0].mean())
+        err_filt.append(np.abs(filtered - truth)[0].mean())
+    print(f"静止通道平均误差: 原始 {np.mean(err_raw) * 1e3:.3f} mm -> 滤波 {np.mean(err_filt[30:]) * 1e3:.3f} mm")
+
+    def one_euro_scalar(samples, times, min_cutoff, beta, d_cutoff):
+        """逐通道标量参考实现 (Casiez 等 2012 的原始写法)"""
+        def alpha(cutoff, dt):
+            tau = 1.0 / (2.0 * math.pi * cutoff)
+            return 1.0 / (1.0 + tau / dt)
+
+        x_hat, dx_hat, t_prev = samples[0], 0.0, times[0]
+        out = [x_hat]
+        for x, t in zip(samples[1:], times[1:]):
+            dt = t - t_prev
+            t_prev = t
+            dx_hat += alpha(d_cutoff, dt) * ((x - x_hat) / dt - dx_hat)
+            x_hat += alpha(min_cutoff + beta * abs(dx_hat), dt) * (x - x_hat)
+            out.append(x_hat)
+        return out
+
+    # 与标量参考实现对照: 逐通道不同参数, 不等间隔时间戳
+    min_cutoffs, betas, d_cutoffs = [0.5, 1.0, 2.0], [0.0, 0.5, 4.0], [1.0, 1.5, 0.8]
+    times = np.cumsum(rng.uniform(0.005, 0.02, 300))
+    samples = np.sin(times[:, None] * [1.0, 3.0, 7.0]) + rng.normal(scale=0.01, size=(300, 3))
+    bank = OneEuroFilterBank(shape=(3,), min_cutoff=min_cutoffs, beta=betas, d_cutoff=d_cutoffs)
+    vec = np.array([bank.update(x, t=t).copy() for x, t in zip(samples, times)])
+    ref = np.array([
+        one_euro_scalar(samples[:, c].tolist(), times.tolist(), min_cutoffs[c], betas[c], d_cutoffs[c])
+        for c in range(3)
+    ]).T
+    ref_err = np.abs(vec - ref).max()
+    assert ref_err < 1e-12, ref_err
+    print(f"与标量参考实现最大差异: {ref_err:.1e}")
+
+    print("-" * 50)
+    print("姿态滤波器测试 (静止姿态 + 噪声, 输入符号随机翻转):")
+    from .quaternion import quat_from_rotvec_batch as exp_map
+    rot_filter = OrientationFilter(alpha=0.2)
+    true_q = quat_normalize_batch(np.array([[0.1, 0.2, 0.3, 0.9], [0.0, 0.0, 0.0, 1.0]]))
+    ang_raw, ang_filt = [], []
+    for i in range(200):
+        noise = exp_map(rng.normal(scale=0.01, size=(2, 3)))
+        noisy = quat_mul_batch(true_q, noise) * rng.choice([-1.0, 1.0], size=(2, 1))
+        filtered = rot_filter.update(noisy)
+        rel = lambda a: 2 * np.arccos(np.clip(np.abs(np.sum(a * true_q, axis=-1)), 0, 1))
+        ang_raw.append(rel(noisy).mean())
+        ang_filt.append(rel(filtered).mean())
+    print(f"平均角误差: 原始 {np.degrees(np.mean(ang_raw)):.3f}° -> 滤波 {np.degrees(np.mean(ang_filt[20:])):.3f}°")
+
     import time
     while True:
         pass
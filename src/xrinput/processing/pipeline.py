@@ -0,0 +1,389 @@
+"""
+声明式处理流水线
+
+各示例都手写同一个 "变换 → 映射 → 滤波 → 限幅 → 发布" 循环, 步骤之间用
+left_raw_pos + left_raw_orient 之类的列表拼接传递数据. Pipeline 把这些步骤声明为阶段,
+所有阶段原地读写同一个 Frame 缓冲区, 每个阶段可单独启用 / 停用并统计耗时:
+
+    pipe = (
+        Pipeline(devices=("left", "right"))
+        .transform(PoseTransform())                 # XR → Robot
+        .tap("controllers")                         # 保存一份控制器姿态供可视化
+        .drag(DragManager(2, threshold=0.5))        # 或 [PoseMapper(), PoseMapper()]
+        .filter(LowPassFilter(alpha=0.3))           # 位置滤波
+        .clamp(Box3D(...))                          # 工作空间限幅
+        .publish(ZMQPublisher())
+    )
+    frame = pipe.run(xr_runtime.read_input())
+    frame.poses        # (N, 7) 目标姿态
+    pipe.disable("filter")
+    print(pipe.timings())
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..monitor.latency import mark_timing
+
+_IDENTITY = np.array([0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0])
+
+
+class Frame:
+    """
+    流水线共享的帧缓冲, 缓冲区在构造时分配, 每帧原地覆盖
+
+    - inputs: (N, 7) 本帧读取的设备原始姿态, 追踪丢失的设备保持上一次的有效值
+    - poses:  (N, 7) 工作缓冲区, 各阶段原地修改, 流水线结束后即为输出
+    - valid:  (N,) 本帧设备姿态是否有效
+    - grips:  (N,) 握持值, 无握持键的设备 (如 hmd) 为 0
+    - data:   本帧的原始输入字典 (read_input 的返回值)
+    - taps:   tap() 阶段保存的中间结果
+    - t:      时间戳 (秒)
+    """
+
+    def __init__(self, devices: Sequence[str]):
+        n = len(devices)
+        self.devices = tuple(devices)
+        self.inputs = np.tile(_IDENTITY, (n, 1))
+        self.poses = np.tile(_IDENTITY, (n, 1))
+        self.valid = np.zeros(n, dtype=bool)
+        self.grips = np.zeros(n, dtype=float)
+        self.data: Dict[str, Any] = {}
+        self.taps: Dict[str, np.ndarray] = {}
+        self.t = 0.0
+
+    def load(self, data: Dict[str, Any], t: Optional[float] = None) -> None:
+        """从 read_input() 的字典填充缓冲区, 不做列表拼接"""
+        self.data = data
+        self.t = time.perf_counter() if t is None else t
+        inputs = self.inputs
+        for i, dev in enumerate(self.devices):
+            pos = data.get(f"{dev}_pos")
+            rot = data.get(f"{dev}_rot")
+            ok = pos is not None and rot is not None
+            if ok:
+                inputs[i, :3] = pos
+                inputs[i, 3:] = rot
+            self.valid[i] = ok
+            grip = data.get(f"grip_{dev}")
+            self.grips[i] = 0.0 if grip is None else grip
+        self.poses[...] = inputs
+
+    def pose(self, device: str) -> List[float]:
+        """按设备名取一行输出姿态 (列表)"""
+        return self.poses[self.devices.index(device)].tolist()
+
+
+# ------------------ 内置阶段 ------------------
+# 阶段即可调用对象 fn(frame), 原地修改 frame.poses
+
+
+class TransformStage:
+    """坐标系变换, 包装 PoseTransform (basis=True 时姿态使用 rot_basis 基变换)"""
+
+    def __init__(self, tf, basis: bool = False):
+        self._apply = tf.pose_basis_batch if basis else tf.pose_batch
+
+    def __call__(self, frame: Frame) -> None:
+        self._apply(frame.poses, out=frame.poses)
+
+
+class DragStage:
+    """
+    拖拽映射, 输出被拖拽物体的目标姿态
+
+    mapper 可为 DragManager (向量化) 或与设备一一对应的 PoseMapper 序列 (逐个处理,
+    需已调用 init_reference)
+    """
+
+    def __init__(self, mapper, threshold: float = 0.5):
+        self.mapper = mapper
+        self.threshold = threshold
+        self._vectorized = hasattr(mapper, "n_slots")
+
+    def __call__(self, frame: Frame) -> None:
+        if self._vectorized:
+            valid = None if frame.valid.all() else frame.valid  # 全部有效时走无掩码的快速路径
+            frame.poses[...] = self.mapper.update(frame.poses, frame.grips, valid)
+            return
+
+        for i, m in enumerate(self.mapper):
+            if frame.valid[i]:
+                pos, quat = frame.poses[i, :3].tolist(), frame.poses[i, 3:].tolist()
+                # 1. 松开 → 停止; 2. 刚按下 → 开始拖拽; 3. 按住 → 持续更新
+                if frame.grips[i] <= self.threshold:
+                    m.stop_drag()
+                elif not m.dragging:
+                    m.start_drag(pos, quat)
+                else:
+                    m.update(pos, quat)
+            target_pos, target_quat = m.get_target()
+            frame.poses[i, :3] = target_pos
+            frame.poses[i, 3:] = target_quat
+
+
+class FilterStage:
+    """
+    滤波, 包装 LowPassFilter / OneEuroFilterBank (field="pos") 或 OrientationFilter (field="rot")
+    """
+
+    def __init__(self, flt, field: str = "pos"):
+        self.flt = flt
+        self._cols = slice(0, 3) if field == "pos" else slice(3, 7)
+        self._timestamped = hasattr(flt, "set_params")  # OneEuroFilterBank 需要时间戳
+
+    def __call__(self, frame: Frame) -> None:
+        block = frame.poses[:, self._cols]
+        if self._timestamped:
+            self.flt.update(block, t=frame.t, out=block)
+        else:
+            block[...] = self.flt.update(block)
+
+
+class ClampStage:
+    """位置限幅, box 为 Box3D 或 constraints 中的约束体"""
+
+    def __init__(self, box):
+        if hasattr(box, "project"):
+            self._project = box.project
+        else:
+            self._project = None
+            self._lo = np.array([box.x_min, box.y_min, box.z_min], dtype=float)
+            self._hi = np.array([box.x_max, box.y_max, box.z_max], dtype=float)
+
+    def __call__(self, frame: Frame) -> None:
+        pos = frame.poses[:, :3]
+        if self._project is not None:
+            pos[...] = self._project(pos)
+        else:
+            np.maximum(pos, self._lo, out=pos)
+            np.minimum(pos, self._hi, out=pos)
+
+
+class TapStage:
+    """把当前的 poses 复制到 frame.taps[name], 便于取用中间结果 (如变换后的控制器姿态)"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self, frame: Frame) -> None:
+        buf = frame.taps.get(self.name)
+        if buf is None:
+            frame.taps[self.name] = frame.poses.copy()
+        else:
+            buf[...] = frame.poses
+
+
+class PublishStage:
+    """
+    发布, 包装 ZMQPublisher
+
+    默认消息为本帧原始输入字典加上每个设备的 "<device>_target_pose";
+    build(frame) -> dict 可自定义消息内容
+    """
+
+    def __init__(self, pub, build: Optional[Callable[[Frame], Dict[str, Any]]] = None):
+        self.pub = pub
+        self.build = build or self._default_message
+
+    @staticmethod
+    def _default_message(frame: Frame) -> Dict[str, Any]:
+        msg = dict(frame.data)
+        timing = msg.get("timing")
+        if timing is not None:
+            msg["timing"] = dict(timing)  # 不修改原始输入字典
+        for dev, pose in zip(frame.devices, frame.poses.tolist()):
+            msg[f"{dev}_target_pose"] = pose
+        return msg
+
+    def __call__(self, frame: Frame) -> None:
+        msg = self.build(frame)
+        if isinstance(msg, dict):
+            mark_timing(msg, "process")
+        self.pub.send(msg)
+
+
+class _Stage:
+    def __init__(self, name: str, fn: Callable[[Frame], None], enabled: bool):
+        self.name = name
+        self.fn = fn
+        self.enabled = enabled
+        self.ns = 0
+        self.calls = 0
+
+
+class Pipeline:
+    """
+    阶段化处理流水线, 构建方法均返回 self 以便链式调用
+
+    参数:
+    - devices: 设备名, 对应 read_input() 中的 "<device>_pos" / "<device>_rot" / "grip_<device>"
+    - timed: 是否统计各阶段耗时
+    """
+
+    def __init__(self, devices: Sequence[str] = ("left", "right"), timed: bool = True):
+        self.frame = Frame(devices)
+        self.timed = timed
+        self._stages: List[_Stage] = []
+        self._runs = 0
+
+    # ------------------ 构建 ------------------
+    def stage(self, name: str, fn: Callable[[Frame], None], enabled: bool = True) -> "Pipeline":
+        """添加自定义阶段, fn(frame) 原地修改 frame.poses; 同名阶段自动加序号"""
+        names = {s.name for s in self._stages}
+        unique, k = name, 1
+        while unique in names:
+            unique = f"{name}#{k}"
+            k += 1
+        self._stages.append(_Stage(unique, fn, enabled))
+        return self
+
+    def transform(self, tf, basis: bool = False) -> "Pipeline":
+        return self.stage("transform", TransformStage(tf, basis))
+
+    def drag(self, mapper, threshold: float = 0.5) -> "Pipeline":
+        return self.stage("drag", DragStage(mapper, threshold))
+
+    def filter(self, flt, field: str = "pos") -> "Pipeline":
+        return self.stage("filter", FilterStage(flt, field))
+
+    def clamp(self, box) -> "Pipeline":
+        return self.stage("clamp", ClampStage(box))
+
+    def tap(self, name: str) -> "Pipeline":
+        return self.stage(f"tap:{name}", TapStage(name))
+
+    def publish(self, pub, build: Optional[Callable[[Frame], Dict[str, Any]]] = None) -> "Pipeline":
+        return self.stage("publish", PublishStage(pub, build))
+
+    # ------------------ 启用 / 停用 ------------------
+    def enable(self, name: str, enabled: bool = True) -> None:
+        self._find(name).enabled = enabled
+
+    def disable(self, name: str) -> None:
+        self.enable(name, False)
+
+    def is_enabled(self, name: str) -> bool:
+        return self._find(name).enabled
+
+    @property
+    def stage_names(self) -> List[str]:
+        return [s.name for s in self._stages]
+
+    # ------------------ 执行 ------------------
+    def run(self, data: Dict[str, Any], t: Optional[float] = None) -> Frame:
+        """
+        处理一帧 read_input() 数据
+
+        返回:
+        - 共享的 Frame (下次 run 会被覆盖)
+        """
+        frame = self.frame
+        frame.load(data, t)
+
+        timed = self.timed
+        for s in self._stages:
+            if not s.enabled:
+                continue
+            if timed:
+                t0 = time.perf_counter_ns()
+                s.fn(frame)
+                s.ns += time.perf_counter_ns() - t0
+                s.calls += 1
+            else:
+                s.fn(frame)
+        self._runs += 1
+        return frame
+
+    def timings(self) -> Dict[str, float]:
+        """各阶段每次执行的平均耗时 (微秒), 停用期间不计入"""
+        return {s.name: (s.ns / s.calls / 1e3 if s.calls else 0.0) for s in self._stages}
+
+    def reset_timings(self) -> None:
+        for s in self._stages:
+            s.ns = 0
+            s.calls = 0
+        self._runs = 0
+
+    # ------------------ 内部 ------------------
+    def _find(self, name: str) -> _Stage:
+        for s in self._stages:
+            if s.name == name:
+                return s
+        raise KeyError(f"没有名为 {name!r} 的阶段, 可用: {self.stage_names}")
+
+
+if __name__ == "__main__":
+    import math
+
+    from scipy.spatial.transform import Rotation as R
+
+    from .box3d import Box3D
+    from .drag_manager import DragManager
+    from .filters import LowPassFilter
+    from .pose_mapper import PoseMapper
+    from .pose_transform import PoseTransform
+
+    class _FakePublisher:
+        def __init__(self):
+            self.last = None
+
+        def send(self, data):
+            mark_timing(data, "publish")
+            self.last = data
+
+    def fake_input(t):
+        data: Dict[str, Any] = {"timing": {"capture": time.monotonic_ns()}}
+        for k, side in enumerate(("left", "right")):
+            data[f"{side}_pos"] = [0.1 * math.sin(t + k), 1.0 + 0.05 * math.cos(t), -0.3]
+            data[f"{side}_rot"] = R.from_euler("y", 0.3 * math.sin(t)).as_quat().tolist()
+            data[f"grip_{side}"] = 1.0 if t > 0.5 else 0.0
+        return data
+
+    init = [0.33, 0.0, 0.1, -0.56, -0.56, -0.43, -0.43]
+    dm = DragManager(2)
+    dm.init_reference(init)
+    pub = _FakePublisher()
+
+    pipe = (
+        Pipeline()
+        .transform(PoseTransform())
+        .tap("controllers")
+        .drag(dm)
+        .filter(LowPassFilter(alpha=0.3))
+        .clamp(Box3D((-0.5, 0.5), (-0.5, 0.5), (0.0, 1.0)))
+        .publish(pub)
+    )
+
+    # 与手写循环 (PoseMapper 逐手处理) 对照
+    tf = PoseTransform()
+    mappers = [PoseMapper(), PoseMapper()]
+    for m in mappers:
+        m.init_reference(init[:3], init[3:])
+    ref = (
+        Pipeline()
+        .transform(tf)
+        .drag(mappers)
+        .filter(LowPassFilter(alpha=0.3))
+        .clamp(Box3D((-0.5, 0.5), (-0.5, 0.5), (0.0, 1.0)))
+    )
+
+    err = 0.0
+    for i in range(300):
+        data = fake_input(i / 90)
+        out = pipe.run(data).poses
+        err = max(err, np.abs(out - ref.run(data).poses).max())
+    print(f"DragManager 与 PoseMapper 流水线最大误差: {err:.2e}")
+    print("发布内容:", {k: v for k, v in pub.last.items() if k.endswith("target_pose")})
+    print("控制器姿态 (tap):", pipe.frame.taps["controllers"][0].round(3))
+
+    pipe.reset_timings()
+    pipe.disable("publish")
+    for i in range(5000):
+        pipe.run(fake_input(i / 90))
+    for name, us in pipe.timings().items():
+        print(f"{name:>16}: {us:.2f} us" + ("" if pipe.is_enabled(name) else " (停用)"))
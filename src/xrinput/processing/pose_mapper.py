@@ -3,8 +3,7 @@
 # 基于 VR 拖拽方式的姿态映射器
 # 用于: 初始化物体姿态 + 使用 VR 手柄拖拽物体(输出绝对位姿)
 
-from scipy.spatial.transform import Rotation as R
-import numpy as np
+from .quaternion import quat_conj, quat_mul, quat_normalize
 
 
 class PoseMapper:
@@ -18,17 +17,18 @@ class PoseMapper:
     - stop_drag(): 停止拖拽
     - get_target(): 获取当前维护的目标姿态
 
-    整个类内部持续维护 "current_t, current_R" 作为目标姿态
+    整个类内部持续维护 "current_t, current_q" 作为目标姿态
+    (位置与四元数均为 float 元组, 四元数顺序 x, y, z, w)
     """
 
     def __init__(self):
-        self.ref_R = None
+        self.ref_q = None
         self.ref_t = None
 
-        self.rel_R = None
+        self.rel_q = None
         self.rel_t_world = None
 
-        self.current_R = None
+        self.current_q = None
         self.current_t = None
 
         self.ref_inited = False
@@ -36,25 +36,27 @@ class PoseMapper:
 
     # ------------------ 1. 初始化物体世界姿态 ------------------
     def init_reference(self, obj_pos, obj_quat):
-        self.ref_R = R.from_quat(obj_quat)
-        self.ref_t = np.array(obj_pos)
+        self.ref_q = quat_normalize(obj_quat)
+        self.ref_t = tuple(obj_pos)
 
-        self.current_R = self.ref_R
-        self.current_t = self.ref_t.copy()
+        self.current_q = self.ref_q
+        self.current_t = self.ref_t
 
         self.ref_inited = True
 
     # ------------------ 2. 正式开始拖拽 ------------------
     def start_drag(self, vr_pos, vr_quat):
-        assert self.ref_inited and self.current_R is not None and self.current_t is not None, "必须先调用 init_reference()"
+        assert self.ref_inited and self.current_q is not None and self.current_t is not None, "必须先调用 init_reference()"
 
-        R_vr = R.from_quat(vr_quat)
+        q_vr = quat_normalize(vr_quat)
 
         # 记录完整相对姿态（以后可能要恢复旋转）
-        self.rel_R = R_vr.inv() * self.current_R
+        self.rel_q = quat_mul(quat_conj(q_vr), self.current_q)
 
         # 关键：记录“世界坐标系”的偏移，而不是 VR 坐标系
-        self.rel_t_world = self.current_t - vr_pos
+        tx, ty, tz = self.current_t
+        vx, vy, vz = vr_pos
+        self.rel_t_world = (tx - vx, ty - vy, tz - vz)
 
         self.dragging = True
     
@@ -64,32 +66,34 @@ class PoseMapper:
 
     # ------------------ 4. 拖拽期间持续更新 ------------------
     def update(self, vr_pos, vr_quat):
-        assert self.dragging and self.rel_R is not None and self.rel_t_world is not None and self.current_R is not None, "必须先调用 start_drag()"
-
-        R_vr = R.from_quat(vr_quat)
+        assert self.dragging and self.rel_q is not None and self.rel_t_world is not None and self.current_q is not None, "必须先调用 start_drag()"
 
         # 旋转部分正常更新
-        self.current_R = R_vr * self.rel_R
+        self.current_q = quat_mul(quat_normalize(vr_quat), self.rel_q)
 
         # 平移只跟 VR 平移，不受旋转影响
-        self.current_t = vr_pos + self.rel_t_world
+        rx, ry, rz = self.rel_t_world
+        vx, vy, vz = vr_pos
+        self.current_t = (vx + rx, vy + ry, vz + rz)
 
-        return self.current_t.tolist(), self.current_R.as_quat().tolist()
+        return list(self.current_t), list(self.current_q)
 
     # ------------------ 5. 获取当前维护的目标姿态 ------------------
     def get_target(self):
-        if self.current_t is None or self.current_R is None:
+        if self.current_t is None or self.current_q is None:
             return None, None
-        return self.current_t.tolist(), self.current_R.as_quat().tolist()
+        return list(self.current_t), list(self.current_q)
 
     def set_target(self, target_pos, target_quat):
-        self.current_t = np.array(target_pos)
-        self.current_R = R.from_quat(target_quat)
+        self.current_t = tuple(target_pos)
+        self.current_q = quat_normalize(target_quat)
 
 
 if __name__ == "__main__":
     import time
     import math
+
+    from scipy.spatial.transform import Rotation as R
     
     def generate_test_data(t):
         """生成基于时间t的测试数据"""
@@ -1,5 +1,28 @@
 import numpy as np
-from scipy.spatial.transform import Rotation as R
+
+from .quaternion import (
+    quat_conj,
+    quat_from_matrix,
+    quat_left_matrix,
+    quat_mul,
+    quat_normalize,
+    quat_right_matrix,
+)
+
+
+def _pose_matrix(R_mat, Q_mat):
+    """拼接位置 3x3 与四元数 4x4 线性变换为 7x7 分块对角矩阵"""
+    M = np.zeros((7, 7), dtype=float)
+    M[:3, :3] = R_mat
+    M[3:, 3:] = Q_mat
+    return M
+
+
+def _mat_vec(rows, v):
+    """3x3 矩阵 (嵌套元组) 乘向量, 纯 Python 计算"""
+    (a, b, c), (d, e, f), (g, h, i) = rows
+    x, y, z = v
+    return [a * x + b * y + c * z, d * x + e * y + f * z, g * x + h * y + i * z]
 
 
 class PoseTransform:
@@ -9,9 +32,13 @@ class PoseTransform:
 
     参数:
         R_mat: 3x3 ndarray, 表示 Robot = R_mat * XR
+        t: 可选位置平移 (3,), 默认 0
+        scale: 可选位置缩放, 默认 1
+        完整的位置变换为 Robot = scale * R_mat * XR + t (可由 PoseCalibrator 标定得到),
+        姿态只受 R_mat 影响
     """
 
-    def __init__(self, R_mat=None):
+    def __init__(self, R_mat=None, t=None, scale=1.0):
         # 默认：你的 Quest → Robot 变换矩阵
         if R_mat is None:
             R_mat = np.array([
@@ -19,23 +46,65 @@ class PoseTransform:
                 [-1,  0,  0],  # Robot Y = -Quest X
                 [ 0,  1,  0]   # Robot Z =  Quest Y
             ], dtype=float)
+        self.set_matrix(R_mat, t, scale)
 
+    # ------------------------------------------------
+    # 允许动态更新矩阵
+    # ------------------------------------------------
+    def set_matrix(self, R_mat, t=None, scale=1.0):
+        """更新变换并重建全部缓存"""
         self.R = np.array(R_mat, dtype=float)            # XR → Robot 旋转矩阵
-        self.R_rot = R.from_matrix(self.R)               # 对应 Rotation 对象
         self.R_inv = self.R.T                            # Robot → XR 的矩阵
-        self.R_inv_rot = R.from_matrix(self.R_inv)       # Rotation 对象
+        self.t = np.zeros(3) if t is None else np.array(t, dtype=float).reshape(3)
+        self.scale = float(scale)
+
+        # 位置为仿射变换: p_robot = A p_xr + t, p_xr = A_inv p_robot + t_inv
+        A = self.scale * self.R
+        A_inv = self.R_inv / self.scale
+        t_inv = -A_inv @ self.t
+        self._has_offset = bool(self.t.any())
+
+        # 标量接口缓存: 纯 Python 元组, 避免每次调用构造数组 / Rotation
+        self._R_rows = tuple(map(tuple, A.tolist()))
+        self._R_inv_rows = tuple(map(tuple, A_inv.tolist()))
+        self._t = tuple(self.t.tolist())
+        self._t_inv = tuple(t_inv.tolist())
+        self.q_R = quat_from_matrix(tuple(map(tuple, self.R.tolist())))  # XR → Robot 旋转四元数
+        self.q_R_inv = quat_conj(self.q_R)               # Robot → XR 旋转四元数
+        q_R, q_R_inv = self.q_R, self.q_R_inv
+
+        # 批量接口使用的 7x7 线性算子: [pos, quat] @ M.T (+ 偏置) 一次完成坐标系变换
+        # 四元数左乘 q_R ⊗ q 与共轭 q_R ⊗ q ⊗ q_R* 都是对 q 的线性变换
+        self._M_pose = _pose_matrix(A, quat_left_matrix(q_R))
+        self._M_pose_inv = _pose_matrix(A_inv, quat_left_matrix(q_R_inv))
+        self._M_basis = _pose_matrix(A, quat_left_matrix(q_R) @ quat_right_matrix(q_R_inv))
+        self._M_basis_inv = _pose_matrix(A_inv, quat_left_matrix(q_R_inv) @ quat_right_matrix(q_R))
+        self._b = np.concatenate([self.t, np.zeros(4)])
+        self._b_inv = np.concatenate([t_inv, np.zeros(4)])
+
+    def as_affine(self, basis=False, inverse=False):
+        """
+        返回批量接口使用的 (M, b): poses @ M.T + b 等价于 pose_batch 等方法
+        (TransformChain 据此融合坐标系变换)
+        """
+        if inverse:
+            M = self._M_basis_inv if basis else self._M_pose_inv
+            return M.copy(), self._b_inv.copy()
+        M = self._M_basis if basis else self._M_pose
+        return M.copy(), self._b.copy()
 
     # ------------------------------------------------
     # XR → Robot
     # ------------------------------------------------
     def pos(self, xr_pos):
-        xr_pos = np.array(xr_pos)
-        return (self.R @ xr_pos).tolist()
+        p = _mat_vec(self._R_rows, xr_pos)
+        if self._has_offset:
+            tx, ty, tz = self._t
+            p = [p[0] + tx, p[1] + ty, p[2] + tz]
+        return p
 
     def rot(self, xr_quat):
-        xr_R = R.from_quat(xr_quat)
-        robot_R = self.R_rot * xr_R
-        return robot_R.as_quat().tolist()
+        return list(quat_mul(self.q_R, quat_normalize(xr_quat)))
 
     def pose(self, xr_pose):
         p = self.pos(xr_pose[:3])
@@ -46,13 +115,14 @@ class PoseTransform:
     # Robot → XR
     # ------------------------------------------------
     def pos_inv(self, robot_pos):
-        robot_pos = np.array(robot_pos)
-        return (self.R_inv @ robot_pos).tolist()
+        p = _mat_vec(self._R_inv_rows, robot_pos)
+        if self._has_offset:
+            tx, ty, tz = self._t_inv
+            p = [p[0] + tx, p[1] + ty, p[2] + tz]
+        return p
 
     def rot_inv(self, robot_quat):
-        robot_R = R.from_quat(robot_quat)
-        xr_R = self.R_inv_rot * robot_R
-        return xr_R.as_quat().tolist()
+        return list(quat_mul(self.q_R_inv, quat_normalize(robot_quat)))
 
     def pose_inv(self, robot_pose):
         p = robot_pose[:3]
@@ -60,23 +130,47 @@ class PoseTransform:
         return self.pos_inv(p) + self.rot_inv(q)
 
     # ------------------------------------------------
-    # 允许动态更新矩阵
+    # 批量接口: 输入 (..., 7) 数组 [x, y, z, qx, qy, qz, qw]
+    # 可一次处理双手 + HMD + 追踪器, 或整段录制数据 (T, N, 7)
+    # 四元数需为单位四元数 (OpenXR 输出即满足)
     # ------------------------------------------------
-    def set_matrix(self, R_mat):
-        self.__init__(R_mat)   # 重新初始化全部缓存
+    def _apply_batch(self, M, poses, out=None, b=None):
+        poses = np.asarray(poses, dtype=float)
+        assert poses.shape[-1] == 7, "输入形状需为 (..., 7)"
+        out = np.matmul(poses, M.T, out=out)
+        if self._has_offset:
+            out += b
+        return out
+
+    def pose_batch(self, xr_poses, out=None):
+        """XR → Robot, 等价于逐个调用 pose()"""
+        return self._apply_batch(self._M_pose, xr_poses, out, self._b)
+
+    def pose_inv_batch(self, robot_poses, out=None):
+        """Robot → XR, 等价于逐个调用 pose_inv()"""
+        return self._apply_batch(self._M_pose_inv, robot_poses, out, self._b_inv)
+
+    def pose_basis_batch(self, xr_poses, out=None):
+        """XR → Robot, 姿态使用 rot_basis() 的基变换"""
+        return self._apply_batch(self._M_basis, xr_poses, out, self._b)
+
+    def pose_basis_inv_batch(self, robot_poses, out=None):
+        """Robot → XR, 姿态使用 rot_basis_inv() 的基变换"""
+        return self._apply_batch(self._M_basis_inv, robot_poses, out, self._b_inv)
 
     def rot_basis(self, xr_quat):
-        xr_R = R.from_quat(xr_quat).as_matrix()
-        robot_R = self.R @ xr_R @ self.R.T
-        return R.from_matrix(robot_R).as_quat().tolist()
+        # R @ xr_R @ R.T 的四元数形式: q_R ⊗ q ⊗ q_R*
+        q = quat_mul(self.q_R, quat_normalize(xr_quat))
+        return list(quat_mul(q, self.q_R_inv))
 
     def rot_basis_inv(self, robot_quat):
-        robot_R = R.from_quat(robot_quat).as_matrix()
-        xr_R = self.R.T @ robot_R @ self.R
-        return R.from_matrix(xr_R).as_quat().tolist()
+        q = quat_mul(self.q_R_inv, quat_normalize(robot_quat))
+        return list(quat_mul(q, self.q_R))
 
 # 测试
 if __name__ == "__main__":
+    from scipy.spatial.transform import Rotation as R
+
     cc = PoseTransform()
 
     xr_pose = [0.1, 0.2, 0.3, 0, 0.1, 0, 0.99]
@@ -105,4 +199,31 @@ if __name__ == "__main__":
 
         q_frame = tf.rot_basis(q)
         print("rot_basis:", (q_frame))
-        print()
\ No newline at end of file
+        print()
+
+    # 批量接口与逐个调用结果一致
+    import time
+
+    poses = np.concatenate([
+        np.random.uniform(-1, 1, (10000, 3)),
+        R.random(10000, random_state=0).as_quat(),
+    ], axis=1)
+    out = np.empty_like(poses)
+
+    t0 = time.perf_counter()
+    single = np.array([tf.pose(p) for p in poses])
+    t1 = time.perf_counter()
+    tf.pose_batch(poses, out=out)
+    t2 = time.perf_counter()
+
+    print("pose_batch 最大误差:", np.abs(out - single).max())
+    print(f"逐个: {(t1 - t0) * 1e3:.1f} ms, 批量: {(t2 - t1) * 1e3:.3f} ms")
+
+    def same_rot(a, b):
+        # q 与 -q 表示同一旋转
+        return np.minimum(np.abs(a - b), np.abs(a + b)).max()
+
+    basis = np.array([tf.rot_basis(p[3:]) for p in poses])
+    print("pose_basis_batch 最大误差:", same_rot(tf.pose_basis_batch(poses)[:, 3:], basis))
+    back = tf.pose_inv_batch(tf.pose_batch(poses))
+    print("pose_inv_batch 往返误差:", max(np.abs(back[:, :3] - poses[:, :3]).max(), same_rot(back[:, 3:], poses[:, 3:])))
\ No newline at end of file
@@ -0,0 +1,380 @@
+"""
+轻量四元数运算
+
+用于替代热路径上的 scipy Rotation, 约定与 scipy / OpenXR 一致:
+- 四元数顺序 (x, y, z, w)
+- 乘法为 Hamilton 积, quat_mul(a, b) 对应 R.from_quat(a) * R.from_quat(b)
+
+两套接口:
+- 标量版: 输入输出均为 float 元组, 纯 Python 计算, 单个姿态开销最低
+- 批量版 (*_batch): 输入输出为 (..., 4) 的 NumPy 数组, 支持广播
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+IDENTITY = (0.0, 0.0, 0.0, 1.0)
+
+
+# ================================================================
+# 标量版 (float 元组)
+# ================================================================
+def quat_normalize(q):
+    x, y, z, w = q
+    n = math.sqrt(x * x + y * y + z * z + w * w)
+    return (x / n, y / n, z / n, w / n)
+
+
+def quat_conj(q):
+    x, y, z, w = q
+    return (-x, -y, -z, w)
+
+
+def quat_inv(q):
+    x, y, z, w = q
+    n2 = x * x + y * y + z * z + w * w
+    return (-x / n2, -y / n2, -z / n2, w / n2)
+
+
+def quat_mul(a, b):
+    ax, ay, az, aw = a
+    bx, by, bz, bw = b
+    return (
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    )
+
+
+def quat_rotate(q, v):
+    """用单位四元数旋转向量 v, 等价于 R.from_quat(q).apply(v)"""
+    x, y, z, w = q
+    vx, vy, vz = v
+    # v' = v + 2w (u × v) + 2 u × (u × v), u = (x, y, z)
+    tx = 2.0 * (y * vz - z * vy)
+    ty = 2.0 * (z * vx - x * vz)
+    tz = 2.0 * (x * vy - y * vx)
+    return (
+        vx + w * tx + (y * tz - z * ty),
+        vy + w * ty + (z * tx - x * tz),
+        vz + w * tz + (x * ty - y * tx),
+    )
+
+
+def quat_to_matrix(q):
+    """单位四元数 → 3x3 旋转矩阵 (嵌套元组, 按行)"""
+    x, y, z, w = q
+    xx, yy, zz = x * x, y * y, z * z
+    xy, xz, yz = x * y, x * z, y * z
+    wx, wy, wz = w * x, w * y, w * z
+    return (
+        (1.0 - 2.0 * (yy + zz), 2.0 * (xy - wz), 2.0 * (xz + wy)),
+        (2.0 * (xy + wz), 1.0 - 2.0 * (xx + zz), 2.0 * (yz - wx)),
+        (2.0 * (xz - wy), 2.0 * (yz + wx), 1.0 - 2.0 * (xx + yy)),
+    )
+
+
+def quat_from_matrix(m):
+    """3x3 旋转矩阵 → 单位四元数 (Shepperd 方法, 数值稳定)"""
+    (m00, m01, m02), (m10, m11, m12), (m20, m21, m22) = m
+    trace = m00 + m11 + m22
+
+    if trace >= m00 and trace >= m11 and trace >= m22:
+        s = 2.0 * math.sqrt(1.0 + trace)
+        q = ((m21 - m12) / s, (m02 - m20) / s, (m10 - m01) / s, 0.25 * s)
+    elif m00 >= m11 and m00 >= m22:
+        s = 2.0 * math.sqrt(1.0 + m00 - m11 - m22)
+        q = (0.25 * s, (m01 + m10) / s, (m02 + m20) / s, (m21 - m12) / s)
+    elif m11 >= m22:
+        s = 2.0 * math.sqrt(1.0 + m11 - m00 - m22)
+        q = ((m01 + m10) / s, 0.25 * s, (m12 + m21) / s, (m02 - m20) / s)
+    else:
+        s = 2.0 * math.sqrt(1.0 + m22 - m00 - m11)
+        q = ((m02 + m20) / s, (m12 + m21) / s, 0.25 * s, (m10 - m01) / s)
+
+    return quat_normalize(q)
+
+
+def quat_slerp(a, b, t):
+    """球面线性插值, 自动走最短路径"""
+    ax, ay, az, aw = a
+    bx, by, bz, bw = b
+    dot = ax * bx + ay * by + az * bz + aw * bw
+    if dot < 0.0:
+        bx, by, bz, bw, dot = -bx, -by, -bz, -bw, -dot
+
+    if dot > 1.0 - 1e-12:
+        # 夹角 < 1e-6 rad 时退化为归一化线性插值 (误差 ~θ³), 避免除以接近 0 的 sin
+        q = (ax + t * (bx - ax), ay + t * (by - ay), az + t * (bz - az), aw + t * (bw - aw))
+        return quat_normalize(q)
+
+    theta = math.acos(dot)
+    sin_theta = math.sin(theta)
+    s0 = math.sin((1.0 - t) * theta) / sin_theta
+    s1 = math.sin(t * theta) / sin_theta
+    return (s0 * ax + s1 * bx, s0 * ay + s1 * by, s0 * az + s1 * bz, s0 * aw + s1 * bw)
+
+
+def quat_to_rotvec(q):
+    """单位四元数 → 旋转向量 (对数映射, 取最短路径, 模长为旋转角)"""
+    x, y, z, w = q
+    if w < 0.0:
+        x, y, z, w = -x, -y, -z, -w
+    s = math.sqrt(x * x + y * y + z * z)
+    if s < 1e-12:
+        k = 2.0 / w  # 小角度近似: 2·atan2(s, w) / s ≈ 2 / w
+    else:
+        k = 2.0 * math.atan2(s, w) / s
+    return (k * x, k * y, k * z)
+
+
+def quat_from_rotvec(r):
+    """旋转向量 → 单位四元数 (指数映射)"""
+    rx, ry, rz = r
+    theta = math.sqrt(rx * rx + ry * ry + rz * rz)
+    if theta < 1e-6:
+        k = 0.5 - theta * theta / 48.0  # sin(θ/2)/θ 的泰勒展开
+    else:
+        k = math.sin(0.5 * theta) / theta
+    return (k * rx, k * ry, k * rz, math.cos(0.5 * theta))
+
+
+# ================================================================
+# 批量版 (NumPy, 形状 (..., 4))
+# ================================================================
+def quat_normalize_batch(q):
+    q = np.asarray(q, dtype=float)
+    return q / _norm(q)
+
+
+def quat_conj_batch(q):
+    q = np.array(q, dtype=float)
+    q[..., :3] *= -1.0
+    return q
+
+
+def quat_inv_batch(q):
+    q = quat_conj_batch(q)
+    return q / np.einsum("...i,...i->...", q, q)[..., None]
+
+
+def _mul_structure():
+    """Hamilton 积的结构张量 T, 使 (a ⊗ b)_k = Σ a_i b_j T[i, j, k], 展平为 (16, 4)"""
+    T = np.zeros((4, 4, 4), dtype=float)
+    E = [tuple(row) for row in np.eye(4)]
+    for i in range(4):
+        for j in range(4):
+            T[i, j] = quat_mul(E[i], E[j])
+    return T.reshape(16, 4)
+
+
+_MUL_T16 = _mul_structure()
+
+
+def quat_mul_batch(a, b, out=None):
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    shape = a.shape if a.shape == b.shape else np.broadcast_shapes(a.shape, b.shape)
+
+    # 少量四元数 (逐帧的几个设备) 时, 外积 + 一次 matmul 的调用开销最低;
+    # 数量较多时逐分量计算更省内存带宽
+    if len(shape) < 2 or shape[-2] <= 64:
+        outer = a[..., :, None] * b[..., None, :]
+        return np.matmul(outer.reshape(shape[:-1] + (16,)), _MUL_T16, out=out)
+
+    ax, ay, az, aw = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    bx, by, bz, bw = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+
+    if out is None:
+        out = np.empty(shape, dtype=float)
+    out[..., 0] = aw * bx + ax * bw + ay * bz - az * by
+    out[..., 1] = aw * by - ax * bz + ay * bw + az * bx
+    out[..., 2] = aw * bz + ax * by - ay * bx + az * bw
+    out[..., 3] = aw * bw - ax * bx - ay * by - az * bz
+    return out
+
+
+def _norm(v):
+    """最后一维的模长, 保留维度 (比 np.linalg.norm 调用开销低)"""
+    return np.sqrt(np.einsum("...i,...i->...", v, v))[..., None]
+
+
+def quat_rotate_batch(q, v):
+    """批量旋转向量, q: (..., 4), v: (..., 3)"""
+    q = np.asarray(q, dtype=float)
+    v = np.asarray(v, dtype=float)
+    u = q[..., :3]
+    w = q[..., 3:]
+    t = 2.0 * np.cross(u, v)
+    return v + w * t + np.cross(u, t)
+
+
+def quat_to_matrix_batch(q):
+    """(..., 4) → (..., 3, 3)"""
+    q = np.asarray(q, dtype=float)
+    x, y, z, w = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    xx, yy, zz = x * x, y * y, z * z
+    xy, xz, yz = x * y, x * z, y * z
+    wx, wy, wz = w * x, w * y, w * z
+
+    m = np.empty(q.shape[:-1] + (3, 3), dtype=float)
+    m[..., 0, 0] = 1.0 - 2.0 * (yy + zz)
+    m[..., 0, 1] = 2.0 * (xy - wz)
+    m[..., 0, 2] = 2.0 * (xz + wy)
+    m[..., 1, 0] = 2.0 * (xy + wz)
+    m[..., 1, 1] = 1.0 - 2.0 * (xx + zz)
+    m[..., 1, 2] = 2.0 * (yz - wx)
+    m[..., 2, 0] = 2.0 * (xz - wy)
+    m[..., 2, 1] = 2.0 * (yz + wx)
+    m[..., 2, 2] = 1.0 - 2.0 * (xx + yy)
+    return m
+
+
+def quat_from_matrix_batch(m):
+    """(..., 3, 3) → (..., 4), 每个矩阵按 Shepperd 方法选取最稳定的分支"""
+    m = np.asarray(m, dtype=float)
+    m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+    m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+    m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+
+    # 四个候选分支 (未归一化的 4q·q_i), 每个矩阵取对角量最大的那一支
+    candidates = np.stack([
+        np.stack([1.0 + m00 - m11 - m22, m01 + m10, m02 + m20, m21 - m12], axis=-1),
+        np.stack([m01 + m10, 1.0 + m11 - m00 - m22, m12 + m21, m02 - m20], axis=-1),
+        np.stack([m02 + m20, m12 + m21, 1.0 + m22 - m00 - m11, m10 - m01], axis=-1),
+        np.stack([m21 - m12, m02 - m20, m10 - m01, 1.0 + m00 + m11 + m22], axis=-1),
+    ], axis=-2)
+    diag = np.stack([m00, m11, m22, m00 + m11 + m22], axis=-1)
+    best = np.argmax(diag, axis=-1)
+
+    q = np.take_along_axis(candidates, best[..., None, None], axis=-2)[..., 0, :]
+    return quat_normalize_batch(q)
+
+
+def quat_slerp_batch(a, b, t):
+    """批量球面插值, t 可为标量或 (...,) 数组"""
+    a = np.asarray(a, dtype=float)
+    b = np.array(b, dtype=float)
+    t = np.asarray(t, dtype=float)[..., None]
+
+    dot = np.sum(a * b, axis=-1, keepdims=True)
+    b = np.where(dot < 0.0, -b, b)
+    dot = np.abs(dot)
+
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_theta = np.sin(theta)
+    near = dot > 1.0 - 1e-12
+    safe_sin = np.where(near, 1.0, sin_theta)
+
+    s0 = np.where(near, 1.0 - t, np.sin((1.0 - t) * theta) / safe_sin)
+    s1 = np.where(near, t, np.sin(t * theta) / safe_sin)
+    return quat_normalize_batch(s0 * a + s1 * b)
+
+
+def quat_to_rotvec_batch(q):
+    """(..., 4) → (..., 3), 自动取 w >= 0 的半球 (最短路径)"""
+    q = np.asarray(q, dtype=float)
+    q = q * np.copysign(1.0, q[..., 3:])
+    v = q[..., :3]
+    s = _norm(v)
+    # 2·atan2(s, w) / s 在 s → 0 时趋于 2 / w, 用极小下限避免 0 / 0
+    return v * (2.0 * np.arctan2(s, q[..., 3:]) / np.maximum(s, 1e-300))
+
+
+def quat_from_rotvec_batch(r):
+    """(..., 3) → (..., 4)"""
+    r = np.asarray(r, dtype=float)
+    theta = _norm(r)
+    half = 0.5 * theta
+    # θ = 0 时 r 也为 0, sin(θ/2) / max(θ, ε) 的取值不影响结果
+    return np.concatenate([r * (np.sin(half) / np.maximum(theta, 1e-300)), np.cos(half)], axis=-1)
+
+
+def quat_left_matrix(q):
+    """q ⊗ p 对 p 的 4x4 线性矩阵"""
+    x, y, z, w = q
+    return np.array([
+        [ w, -z,  y,  x],
+        [ z,  w, -x,  y],
+        [-y,  x,  w,  z],
+        [-x, -y, -z,  w],
+    ], dtype=float)
+
+
+def quat_right_matrix(q):
+    """p ⊗ q 对 p 的 4x4 线性矩阵"""
+    x, y, z, w = q
+    return np.array([
+        [ w,  z, -y,  x],
+        [-z,  w,  x,  y],
+        [ y, -x,  w,  z],
+        [-x, -y, -z,  w],
+    ], dtype=float)
+
+
+if __name__ == "__main__":
+    # 与 scipy 对照, 误差需小于 1e-12
+    import time
+
+    from scipy.spatial.transform import Rotation as R
+    from scipy.spatial.transform import Slerp
+
+    TOL = 1e-12
+    N = 2000
+    ra = R.random(N, random_state=1)
+    rb = R.random(N, random_state=2)
+    qa, qb = ra.as_quat(), rb.as_quat()
+    # 后半部分为夹角很小的四元数对, 覆盖插值的近似分支附近
+    small = R.from_rotvec(np.random.default_rng(5).normal(size=(N // 2, 3)) * np.logspace(-8, -1, N // 2)[:, None])
+    qb[N // 2:] = (ra[N // 2:] * small).as_quat()
+    rb = R.from_quat(qb)
+    vs = np.random.default_rng(3).uniform(-1, 1, (N, 3))
+    ts = np.random.default_rng(4).uniform(0, 1, N)
+
+    def same_rot(a, b):
+        a, b = np.asarray(a), np.asarray(b)
+        return np.minimum(np.abs(a - b), np.abs(a + b)).max()
+
+    slerp_ref = np.array([Slerp([0, 1], R.from_quat([qa[i], qb[i]]))(ts[i]).as_quat() for i in range(N)])
+
+    errors = {
+        "mul": max(same_rot(quat_mul(qa[i], qb[i]), (ra[i] * rb[i]).as_quat()) for i in range(N)),
+        "mul_batch": same_rot(quat_mul_batch(qa, qb), (ra * rb).as_quat()),
+        "mul_batch_small": same_rot(quat_mul_batch(qa[:8], qb[:8]), (ra[:8] * rb[:8]).as_quat()),
+        "inv": max(same_rot(quat_inv(qa[i]), ra[i].inv().as_quat()) for i in range(N)),
+        "inv_batch": same_rot(quat_inv_batch(qa), ra.inv().as_quat()),
+        "rotate": max(np.abs(np.subtract(quat_rotate(qa[i], vs[i]), ra[i].apply(vs[i]))).max() for i in range(N)),
+        "rotate_batch": np.abs(quat_rotate_batch(qa, vs) - ra.apply(vs)).max(),
+        "to_matrix": max(np.abs(np.subtract(quat_to_matrix(qa[i]), ra[i].as_matrix())).max() for i in range(N)),
+        "to_matrix_batch": np.abs(quat_to_matrix_batch(qa) - ra.as_matrix()).max(),
+        "from_matrix": max(same_rot(quat_from_matrix(ra[i].as_matrix()), qa[i]) for i in range(N)),
+        "from_matrix_batch": same_rot(quat_from_matrix_batch(ra.as_matrix()), qa),
+        "slerp": max(same_rot(quat_slerp(qa[i], qb[i], ts[i]), slerp_ref[i]) for i in range(N)),
+        "slerp_batch": same_rot(quat_slerp_batch(qa, qb, ts), slerp_ref),
+        "normalize_batch": np.abs(quat_normalize_batch(qa * 3.0) - qa).max(),
+        "to_rotvec": max(np.abs(np.subtract(quat_to_rotvec(qb[i]), rb[i].as_rotvec())).max() for i in range(N)),
+        "to_rotvec_batch": np.abs(quat_to_rotvec_batch(qb) - rb.as_rotvec()).max(),
+        "rotvec_zero": np.abs(quat_to_rotvec_batch([0.0, 0.0, 0.0, -1.0])).max()
+        + np.abs(quat_from_rotvec_batch([0.0, 0.0, 0.0]) - [0.0, 0.0, 0.0, 1.0]).max(),
+        "from_rotvec": max(same_rot(quat_from_rotvec(rb[i].as_rotvec()), qb[i]) for i in range(N)),
+        "from_rotvec_batch": same_rot(quat_from_rotvec_batch(rb.as_rotvec()), qb),
+    }
+
+    for name, err in errors.items():
+        print(f"{name:>18}: {err:.2e} {'OK' if err < TOL else 'FAIL'}")
+
+    # 单次调用耗时对比
+    a, b = tuple(qa[0]), tuple(qb[0])
+    n = 20000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        quat_mul(a, b)
+    t1 = time.perf_counter()
+    for _ in range(n):
+        (R.from_quat(a) * R.from_quat(b)).as_quat()
+    t2 = time.perf_counter()
+    print(f"quat_mul: {(t1 - t0) / n * 1e6:.2f} us, scipy: {(t2 - t1) / n * 1e6:.2f} us")
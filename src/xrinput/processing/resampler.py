@@ -0,0 +1,231 @@
+"""
+固定频率姿态重采样器
+
+头显输出约 72~120 Hz, 机械臂控制器需要稳定的 500 Hz / 1 kHz 设定点.
+PoseResampler 保存最近几帧带时间戳的 (D, 7) 姿态, 在任意时刻输出插值 / 外推结果:
+- 位置线性插值, 姿态球面插值 (slerp)
+- 超出最新一帧时按最后两帧的速度外推, 最多外推 max_extrapolation 秒后保持不动
+- 设置 delay (如一个输入周期) 可以用插值代替外推, 以少量延迟换取平滑
+
+    rs = PoseResampler(n_devices=2, delay=1 / 90)
+    rs.push(poses, t=capture_time)                  # 采集线程, poses: (2, 7)
+    for t, setpoint in rs.stream(1000):             # 控制线程, 1 kHz
+        arm.send(setpoint)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .quaternion import quat_slerp_batch
+
+
+class PoseResampler:
+    """
+    多设备姿态重采样器
+
+    参数:
+    - n_devices: 设备数, 每帧输入为 (D, 7) 姿态 [x, y, z, qx, qy, qz, qw]
+    - capacity: 保留的历史帧数
+    - max_extrapolation: 最长外推时间 (s), 输入中断时输出在此之后保持不动
+    - delay: 输出相对输入时钟的固定延迟 (s)
+    """
+
+    def __init__(
+        self,
+        n_devices: int = 1,
+        capacity: int = 8,
+        max_extrapolation: float = 0.05,
+        delay: float = 0.0,
+    ):
+        if capacity < 2:
+            raise ValueError("capacity 至少为 2")
+        self.n_devices = n_devices
+        self.capacity = capacity
+        self.max_extrapolation = max_extrapolation
+        self.delay = delay
+
+        # 按时间顺序排列的历史帧, 满后整体前移一格 (容量很小, 比环形索引更简单)
+        self._times = np.zeros(capacity, dtype=float)
+        self._poses = np.zeros((capacity, n_devices, 7), dtype=float)
+        self._n = 0
+        # push 与 sample 通常在不同线程, 历史帧前移期间不能被读取
+        self._lock = threading.Lock()
+
+        self.overruns = 0  # stream() 错过的输出周期数
+
+    # ------------------ 输入 ------------------
+    def push(self, poses, t: Optional[float] = None) -> None:
+        """
+        加入一帧姿态
+
+        参数:
+        - poses: (D, 7) 或 (7,) (单设备); 含 NaN 的行沿用上一帧, 即保持最后的有效姿态
+        - t: 采样时间戳 (秒), 默认 time.perf_counter(); 早于最新一帧的样本会被丢弃
+        """
+        if t is None:
+            t = time.perf_counter()
+        poses = np.asarray(poses, dtype=float).reshape(self.n_devices, 7)
+        lost = ~np.isfinite(poses).all(axis=-1)
+
+        with self._lock:
+            n = self._n
+            if n and t <= self._times[n - 1]:
+                return
+
+            if n == self.capacity:
+                self._times[:-1] = self._times[1:]
+                self._poses[:-1] = self._poses[1:]
+                n -= 1
+
+            self._times[n] = t
+            self._poses[n] = poses
+            if n and lost.any():
+                self._poses[n, lost] = self._poses[n - 1, lost]
+            self._n = n + 1
+
+    # ------------------ 输出 ------------------
+    def sample(self, t: Optional[float] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        输出 t - delay 时刻的 (D, 7) 姿态
+
+        尚无数据时抛出 RuntimeError
+        """
+        if t is None:
+            t = time.perf_counter()
+        result = self.sample_many(np.array([t], dtype=float))[0]
+        if out is not None:
+            out[...] = result
+            return out
+        return result
+
+    def sample_many(self, ts) -> np.ndarray:
+        """一次输出多个时刻的姿态, ts: (T,) → (T, D, 7)"""
+        ts = np.asarray(ts, dtype=float).reshape(-1) - self.delay
+
+        with self._lock:
+            n = self._n
+            if n == 0:
+                raise RuntimeError("PoseResampler 尚无数据")
+            if n == 1:
+                return np.broadcast_to(self._poses[0], (ts.size, self.n_devices, 7)).copy()
+
+            times = self._times[:n]
+            # 早于最旧一帧时保持最旧一帧; 晚于最新一帧时外推, 最多 max_extrapolation
+            ts = np.clip(ts, times[0], times[-1] + self.max_extrapolation)
+
+            # 每个时刻所在区间 [i0, i1]; 外推时使用最后两帧
+            i1 = np.clip(np.searchsorted(times, ts, side="right"), 1, n - 1)
+            i0 = i1 - 1
+            t0 = times[i0]
+            u = (ts - t0) / (times[i1] - t0)  # (T,), 插值时 ∈ [0, 1], 外推时 > 1
+
+            p0, p1 = self._poses[i0], self._poses[i1]  # 花式索引, 得到副本 (T, D, 7)
+        out = np.empty_like(p0)
+        uu = u[:, None, None]
+        out[..., :3] = p0[..., :3] + (p1[..., :3] - p0[..., :3]) * uu
+        # slerp 公式在 u > 1 时即为沿同一测地线的匀角速度外推
+        out[..., 3:] = quat_slerp_batch(p0[..., 3:], p1[..., 3:], np.broadcast_to(u[:, None], p0.shape[:2]))
+        return out
+
+    def stream(
+        self,
+        rate_hz: float,
+        clock: Callable[[], float] = time.perf_counter,
+        spin: float = 0.002,
+    ) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        以固定频率输出 (t, (D, 7) 姿态) 的生成器
+
+        按绝对截止时刻调度, 不会累积漂移; 调用方处理过慢时跳过错过的周期 (计入 overruns),
+        不会连续补发. 距截止时刻不足 spin 秒时改为忙等, 以获得亚毫秒精度.
+        尚无数据时等待第一帧.
+        """
+        period = 1.0 / rate_hz
+        while self._n == 0:
+            time.sleep(period)
+
+        deadline = clock()
+        while True:
+            now = clock()
+            remaining = deadline - now
+            if remaining > spin:
+                time.sleep(remaining - spin)
+            while clock() < deadline:
+                pass
+
+            yield deadline, self.sample(deadline)
+
+            deadline += period
+            now = clock()
+            if now - deadline > period:
+                missed = int((now - deadline) / period)
+                self.overruns += missed
+                deadline += missed * period
+
+    def latest_time(self) -> Optional[float]:
+        """最新一帧的时间戳, 尚无数据时返回 None"""
+        with self._lock:
+            return float(self._times[self._n - 1]) if self._n else None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._n = 0
+        self.overruns = 0
+
+
+if __name__ == "__main__":
+    from scipy.spatial.transform import Rotation as R
+
+    def truth(t):
+        """左手匀速直线 + 匀速旋转, 右手静止"""
+        left = [0.2 * t, 1.0, 0.0, *R.from_rotvec([0.0, 0.0, 1.0 * t]).as_quat()]
+        right = [0.3, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+        return np.array([left, right])
+
+    rs = PoseResampler(n_devices=2)
+    in_dt = 1 / 90
+    for i in range(10):
+        rs.push(truth(i * in_dt), t=i * in_dt)
+
+    # 1 kHz 输出: 覆盖保留的 8 帧 (插值) 与其后 20 ms (外推)
+    ts = np.arange(2 * in_dt, 9 * in_dt + 0.02, 0.001)
+    out = rs.sample_many(ts)
+    gt = np.array([truth(t) for t in np.minimum(ts, 9 * in_dt + rs.max_extrapolation)])
+    pos_err = np.abs(out[..., :3] - gt[..., :3]).max()
+    rot_err = np.abs(np.abs(np.sum(out[..., 3:] * gt[..., 3:], axis=-1)) - 1.0).max()
+    print(f"{ts.size} 个输出, 位置最大误差 {pos_err:.2e}, 姿态最大误差 (1-|dot|) {rot_err:.2e}")
+
+    # 单设备丢失: 含 NaN 的行保持上一帧
+    lost = truth(10 * in_dt)
+    lost[0] = np.nan
+    rs.push(lost, t=10 * in_dt)
+    print("丢失后左手位置:", rs.sample(10 * in_dt)[0, :3].round(4))
+
+    # 实时流: 采集线程 90 Hz 推送, 输出 1 kHz
+    import threading
+
+    rs = PoseResampler(n_devices=2, delay=in_dt)
+    t_start = time.perf_counter()
+    stop = threading.Event()
+
+    def producer():
+        while not stop.is_set():
+            t = time.perf_counter()
+            rs.push(truth(t - t_start), t=t)
+            time.sleep(in_dt)
+
+    threading.Thread(target=producer, daemon=True).start()
+    stamps = []
+    for t, pose in rs.stream(1000):
+        stamps.append(time.perf_counter() - t)
+        if len(stamps) >= 1000:
+            break
+    stop.set()
+    lag = np.array(stamps) * 1e6
+    print(f"1 kHz 输出 {len(stamps)} 帧, 唤醒滞后 p50={np.percentile(lag, 50):.0f} us, "
+          f"p99={np.percentile(lag, 99):.0f} us, 跳过 {rs.overruns} 个周期")
@@ -0,0 +1,249 @@
+"""
+预合成的姿态变换链
+
+将 "坐标系变换 + 缩放 + 固定偏移 + 限幅" 等处理串成一条链:
+- 相邻的静态仿射阶段 (frame / scale / offset / orient_offset) 在构建时融合为一个
+  7x7 线性算子 + 偏置, 运行时只需一次 matmul
+- 所有阶段在同一个预分配的 (N, 7) 缓冲区上原地运行, 不产生中间 Python 列表
+- 可统计每个阶段的平均耗时
+
+    chain = (
+        TransformChain()
+        .frame(PoseTransform())             # XR → Robot
+        .scale(1.5)                         # 手部运动放大
+        .offset([0.3, 0.0, 0.1])            # 固定偏移
+        .stage("filter", my_inplace_fn)     # 自定义动态阶段, fn(buf) 原地修改
+        .clamp(Box3D(...))                  # 工作空间限幅
+    )
+    out = chain.apply(poses)                # poses: (N, 7) 或 (7,)
+    print(chain.timings())
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .quaternion import quat_conj, quat_from_matrix, quat_left_matrix, quat_normalize, quat_right_matrix
+
+
+class _Affine:
+    """静态仿射阶段: x' = M @ x + b, x 为 7 维姿态"""
+
+    def __init__(self, name: str, M: np.ndarray, b: Optional[np.ndarray] = None):
+        self.name = name
+        self.M = M
+        self.MT = M.T.copy()  # 行向量形式 buf @ M.T, 预先转置为连续内存
+        self.b = np.zeros(7, dtype=float) if b is None else b
+
+    def then(self, other: "_Affine") -> "_Affine":
+        """先执行 self 再执行 other 的合成算子"""
+        return _Affine(
+            f"{self.name}+{other.name}",
+            other.M @ self.M,
+            other.M @ self.b + other.b,
+        )
+
+
+class _Dynamic:
+    """动态阶段: fn(buf) 原地修改 (N, 7) 缓冲区"""
+
+    def __init__(self, name: str, fn: Callable[[np.ndarray], None]):
+        self.name = name
+        self.fn = fn
+
+
+class TransformChain:
+    """可组合的姿态变换链, 构建方法均返回 self 以便链式调用"""
+
+    def __init__(self, timed: bool = True):
+        self.timed = timed
+        self._stages: List = []
+        self._ops: Optional[List] = None  # 融合后的执行序列, 惰性编译
+        self._names: List[str] = []       # 与 _ops 一一对应的计时名
+
+        # 预分配缓冲区, 按输入行数 N 重新分配
+        self._buf = np.zeros((0, 7), dtype=float)
+        self._tmp = np.zeros((0, 7), dtype=float)
+
+        self._ns: Dict[str, int] = {}
+        self._calls = 0
+
+    # ------------------ 静态阶段 ------------------
+    def frame(self, R_mat, basis: bool = False) -> "TransformChain":
+        """
+        坐标系变换, 等价于 PoseTransform.pose() (basis=True 时姿态等价于 rot_basis())
+        R_mat 可为 3x3 矩阵或 PoseTransform 实例 (含标定得到的平移 / 缩放)
+        """
+        if hasattr(R_mat, "as_affine"):
+            M, b = R_mat.as_affine(basis=basis)
+            return self._add(_Affine("frame", M, b))
+
+        R_mat = np.array(R_mat, dtype=float)
+        q_R = quat_from_matrix(tuple(map(tuple, R_mat.tolist())))
+        Q = quat_left_matrix(q_R)
+        if basis:
+            Q = Q @ quat_right_matrix(quat_conj(q_R))
+        return self._add(_Affine("frame", self._block(R_mat, Q)))
+
+    def scale(self, s) -> "TransformChain":
+        """位置缩放, s 为标量或 (sx, sy, sz)"""
+        S = np.diag(np.broadcast_to(np.asarray(s, dtype=float), (3,)))
+        return self._add(_Affine("scale", self._block(S, np.eye(4))))
+
+    def offset(self, t) -> "TransformChain":
+        """位置固定偏移"""
+        b = np.zeros(7, dtype=float)
+        b[:3] = t
+        return self._add(_Affine("offset", np.eye(7), b))
+
+    def orient_offset(self, q) -> "TransformChain":
+        """姿态固定偏移 (右乘, 即在物体自身坐标系下旋转): q' = q ⊗ q_off"""
+        Q = quat_right_matrix(quat_normalize(q))
+        return self._add(_Affine("orient_offset", self._block(np.eye(3), Q)))
+
+    def clamp(self, box) -> "TransformChain":
+        """位置限幅, box 为 Box3D 或 constraints 中的约束体 (BoxVolume / UnionVolume 等)"""
+        if hasattr(box, "project"):
+            def _project(buf):
+                buf[:, :3] = box.project(buf[:, :3])
+
+            return self._add(_Dynamic("clamp", _project))
+
+        lo = np.array([box.x_min, box.y_min, box.z_min], dtype=float)
+        hi = np.array([box.x_max, box.y_max, box.z_max], dtype=float)
+
+        def _clamp(buf):
+            pos = buf[:, :3]
+            np.maximum(pos, lo, out=pos)
+            np.minimum(pos, hi, out=pos)
+
+        return self._add(_Dynamic("clamp", _clamp))
+
+    # ------------------ 动态阶段 ------------------
+    def stage(self, name: str, fn: Callable[[np.ndarray], None]) -> "TransformChain":
+        """自定义阶段, fn(buf) 接收 (N, 7) 缓冲区并原地修改"""
+        return self._add(_Dynamic(name, fn))
+
+    # ------------------ 执行 ------------------
+    def apply(self, poses, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        对 (N, 7) 或 (7,) 姿态执行整条链
+
+        返回:
+        - 未指定 out 时返回内部缓冲区 (下次调用会被覆盖, 需要保留请自行 copy)
+        """
+        if self._ops is None:
+            self._compile()
+
+        poses = np.asarray(poses, dtype=float)
+        single = poses.ndim == 1
+        src = poses.reshape(-1, 7)
+
+        n = src.shape[0]
+        if self._buf.shape[0] != n:
+            self._buf = np.zeros((n, 7), dtype=float)
+            self._tmp = np.zeros((n, 7), dtype=float)
+        buf, tmp = self._buf, self._tmp
+        buf[...] = src
+
+        timed = self.timed
+        ns = self._ns
+        for op, name in zip(self._ops, self._names):  # type: ignore
+            t0 = time.perf_counter_ns() if timed else 0
+            if isinstance(op, _Affine):
+                np.matmul(buf, op.MT, out=tmp)
+                np.add(tmp, op.b, out=buf)
+            else:
+                op.fn(buf)
+            if timed:
+                ns[name] += time.perf_counter_ns() - t0
+        self._calls += 1
+
+        result = buf[0] if single else buf
+        if out is not None:
+            out[...] = result
+            return out
+        return result
+
+    def timings(self) -> Dict[str, float]:
+        """各阶段平均耗时 (微秒), 融合后的阶段名以 "+" 连接"""
+        if self._calls == 0:
+            return {name: 0.0 for name in self._ns}
+        return {name: t / self._calls / 1e3 for name, t in self._ns.items()}
+
+    def reset_timings(self) -> None:
+        for name in self._ns:
+            self._ns[name] = 0
+        self._calls = 0
+
+    # ------------------ 内部 ------------------
+    @staticmethod
+    def _block(A: np.ndarray, Q: np.ndarray) -> np.ndarray:
+        M = np.zeros((7, 7), dtype=float)
+        M[:3, :3] = A
+        M[3:, 3:] = Q
+        return M
+
+    def _add(self, stage) -> "TransformChain":
+        self._stages.append(stage)
+        self._ops = None
+        return self
+
+    def _compile(self) -> None:
+        """融合相邻的静态仿射阶段"""
+        ops: List = []
+        for stage in self._stages:
+            if isinstance(stage, _Affine) and ops and isinstance(ops[-1], _Affine):
+                ops[-1] = ops[-1].then(stage)
+            else:
+                ops.append(stage)
+
+        # 同名阶段 (如两次 clamp) 的计时名加序号区分; 只生成显示名, 不修改阶段对象,
+        # 否则追加阶段后重新编译时序号会叠加并相互冲突
+        names: List[str] = []
+        seen: Dict[str, int] = {}
+        for op in ops:
+            k = seen.get(op.name, 0)
+            seen[op.name] = k + 1
+            names.append(f"{op.name}#{k}" if k else op.name)
+
+        self._ops = ops
+        self._names = names
+        self._ns = {name: 0 for name in names}
+        self._calls = 0
+
+
+if __name__ == "__main__":
+    from scipy.spatial.transform import Rotation as R
+
+    from .box3d import Box3D
+    from .pose_transform import PoseTransform
+
+    tf = PoseTransform()
+    box = Box3D((-0.5, 0.5), (-0.5, 0.5), (0.0, 1.0))
+    offset = [0.3, 0.0, 0.1]
+
+    chain = TransformChain().frame(tf).scale(1.5).offset(offset).clamp(box)
+
+    poses = np.concatenate([
+        np.random.uniform(-1, 1, (3, 3)),
+        R.random(3, random_state=0).as_quat(),
+    ], axis=1)
+
+    # 与逐阶段的列表写法对照
+    ref = []
+    for p in poses:
+        q = tf.pose(p.tolist())
+        pos = [1.5 * v + o for v, o in zip(q[:3], offset)]
+        ref.append(box.clamp(pos) + q[3:])
+
+    out = chain.apply(poses)
+    print("最大误差:", np.abs(out - np.array(ref)).max())
+
+    for _ in range(10000):
+        chain.apply(poses)
+    for name, us in chain.timings().items():
+        print(f"{name:>20}: {us:.2f} us")